@@ -0,0 +1,12 @@
+"""
+Benchmarks for the piquant analysis pipeline. Synthetic transcriptomes are
+generated at a range of sizes, and the pipeline's annotation, data assembly
+and analysis scripts are timed on them. Modules:
+
+generators: Write synthetic GTF, expression profile and quantifier output
+files.
+results: Read and write benchmark results in JSON format.
+run_benchmarks: Time the pipeline stages on synthetic transcriptomes.
+compare_benchmarks: Compare two sets of benchmark results.
+time_startup: Time the start-up of piquant commands and support scripts.
+"""
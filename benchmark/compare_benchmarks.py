@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+
+"""Usage:
+    compare_benchmarks [{log_option_spec} --time-threshold=<percent> --memory-threshold=<percent>] <baseline-file> <results-file>
+
+{help_option_spec}                         {help_option_description}
+{ver_option_spec}                      {ver_option_description}
+{log_option_spec}           {log_option_description}
+--time-threshold=<percent>        Percentage increase in the elapsed time of a pipeline stage regarded as a regression [default: 20].
+--memory-threshold=<percent>      Percentage increase in the peak memory of a pipeline stage regarded as a regression [default: 10].
+<baseline-file>                   JSON file of benchmark results to compare against.
+<results-file>                    JSON file of benchmark results to compare.
+"""
+
+import collections
+import docopt
+import piquant.options as opt
+import results
+import schema
+import sys
+
+TIME_THRESHOLD = "--time-threshold"
+MEMORY_THRESHOLD = "--memory-threshold"
+BASELINE_FILE = "<baseline-file>"
+RESULTS_FILE = "<results-file>"
+
+# Increases in elapsed time smaller than this, in seconds, are attributed to
+# noise rather than regarded as regressions
+MIN_TIME_INCREASE = 0.5
+
+Comparison = collections.namedtuple(
+    "Comparison", ["size", "stage", "baseline", "result", "time_change",
+                   "memory_change", "regression"])
+
+_HEADER = "{:>10}  {:<38}{:>10}{:>10}{:>9}{:>10}{:>10}{:>9}".format(
+    "size", "stage", "base (s)", "time (s)", "change", "base (MB)",
+    "mem (MB)", "change")
+_ROW = "{size:>10}  {stage:<38}{bt:>10.2f}{t:>10.2f}{tc:>+8.1f}%" + \
+    "{bm:>10.1f}{m:>10.1f}{mc:>+8.1f}%{flag}"
+
+
+def _validate_command_line_options(options):
+    try:
+        opt.validate_log_level(options)
+
+        for threshold in [TIME_THRESHOLD, MEMORY_THRESHOLD]:
+            options[threshold] = opt.validate_int_option(
+                options[threshold],
+                "Regression threshold must be a non-negative integer",
+                nonneg=True)
+        opt.validate_file_option(
+            options[BASELINE_FILE], "Baseline results file should exist")
+        opt.validate_file_option(
+            options[RESULTS_FILE], "Results file should exist")
+    except schema.SchemaError as exc:
+        exit("Exiting. " + exc.code)
+
+
+def _percentage_change(baseline_value, value):
+    if baseline_value == 0:
+        return 0.0
+    return 100.0 * (value - baseline_value) / baseline_value
+
+
+def compare_results(baseline_data, data, time_threshold, memory_threshold):
+    """
+    Compare two sets of benchmark results.
+
+    Return a list of Comparison instances, one for each transcriptome size
+    and pipeline stage present in both sets of results. A stage is marked as
+    a regression if its elapsed time (by at least MIN_TIME_INCREASE seconds)
+    or peak memory increased by more than the corresponding threshold
+    percentage, or if it failed where it had previously succeeded.
+    baseline_data: Benchmark results, as returned by results.read_results,
+    to compare against.
+    data: Benchmark results to compare.
+    time_threshold: Percentage increase in elapsed time regarded as a
+    regression.
+    memory_threshold: Percentage increase in peak memory regarded as a
+    regression.
+    """
+    comparisons = []
+    for size, stage, baseline in results.get_stage_results(baseline_data):
+        result = data[results.RESULTS].get(size, {}).get(stage)
+        if result is None:
+            continue
+
+        time_change = _percentage_change(
+            baseline[results.WALL_TIME], result[results.WALL_TIME])
+        memory_change = _percentage_change(
+            baseline[results.PEAK_MEMORY], result[results.PEAK_MEMORY])
+        time_increase = \
+            result[results.WALL_TIME] - baseline[results.WALL_TIME]
+        regression = (time_change > time_threshold and
+                      time_increase >= MIN_TIME_INCREASE) or \
+            memory_change > memory_threshold or \
+            (baseline[results.SUCCEEDED] and not result[results.SUCCEEDED])
+
+        comparisons.append(Comparison(
+            size, stage, baseline, result, time_change, memory_change,
+            regression))
+
+    return comparisons
+
+
+def _print_comparisons(comparisons):
+    print(_HEADER)
+    for c in comparisons:
+        flag = "  REGRESSION" if c.regression else ""
+        if not c.result[results.SUCCEEDED]:
+            flag += "  (failed)"
+        print(_ROW.format(
+            size=c.size, stage=c.stage,
+            bt=c.baseline[results.WALL_TIME], t=c.result[results.WALL_TIME],
+            tc=c.time_change, bm=c.baseline[results.PEAK_MEMORY],
+            m=c.result[results.PEAK_MEMORY], mc=c.memory_change, flag=flag))
+
+
+def _compare_benchmarks(logger, options):
+    baseline_data = results.read_results(options[BASELINE_FILE])
+    data = results.read_results(options[RESULTS_FILE])
+
+    logger.info("Comparing results for commit {c} against {b}...".format(
+        c=data[results.ENVIRONMENT]["commit"],
+        b=baseline_data[results.ENVIRONMENT]["commit"]))
+    if data[results.SETTINGS] != baseline_data[results.SETTINGS]:
+        logger.warning("Benchmarks were run with different settings.")
+
+    comparisons = compare_results(
+        baseline_data, data,
+        options[TIME_THRESHOLD], options[MEMORY_THRESHOLD])
+    _print_comparisons(comparisons)
+
+    num_regressions = len([c for c in comparisons if c.regression])
+    if num_regressions > 0:
+        logger.error("{n} pipeline stage(s) regressed.".format(
+            n=num_regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    # Read in command-line options
+    __doc__ = opt.substitute_common_options_into_usage(__doc__)
+    options = docopt.docopt(__doc__, version="compare_benchmarks v0.1")
+
+    # Validate command-line options
+    _validate_command_line_options(options)
+
+    # Set up logger
+    logger = opt.get_logger_for_options(options)
+
+    # Compare benchmark results, exiting with an error status if any pipeline
+    # stage has regressed
+    _compare_benchmarks(logger, options)
@@ -0,0 +1,203 @@
+"""
+Functions for writing synthetic transcriptome data in the formats consumed
+by the piquant analysis pipeline. Exports:
+
+write_gtf: Write a GTF file describing synthetic genes and transcripts.
+write_expression_profile: Write a FluxSimulator .pro file for transcripts.
+write_quantifier_output: Write abundances estimated by a quantifier.
+
+SyntheticTranscript: A transcript written to a synthetic GTF file.
+QUANTIFIER_OUTPUTS: Quantification methods for which output can be written.
+"""
+
+import collections
+import numpy as np
+import os
+import os.path
+import piquant.gtf as gtf
+
+NUM_SEQUENCES = 24
+
+# For each quantification method, the file (relative to the quantification
+# run directory) from which abundances are read, and the columns holding
+# transcript IDs and abundances
+QUANTIFIER_OUTPUTS = {
+    "Cufflinks": ("transcriptome/isoforms.fpkm_tracking",
+                  "tracking_id", "FPKM"),
+    "RSEM": ("rsem_sample.isoforms.results", "transcript_id", "TPM"),
+    "Express": ("results.xprs", "target_id", "tpm"),
+    "Sailfish": ("quant_filtered.csv", "Transcript", "TPM"),
+    "Salmon": ("quant_filtered.csv", "Name", "TPM"),
+}
+
+SyntheticTranscript = collections.namedtuple(
+    "SyntheticTranscript", ["transcript_id", "gene_id", "sequence",
+                            "start", "end", "strand", "length"])
+
+_MEAN_EXTRA_ISOFORMS = 1.5
+_MIN_EXONS_PER_GENE = 2
+_MAX_EXONS_PER_GENE = 12
+_EXON_LENGTH_RANGE = (50, 500)
+_INTRON_LENGTH_RANGE = (100, 5000)
+_INTERGENIC_LENGTH_RANGE = (1000, 20000)
+_EXON_INCLUSION_PROBABILITY = 0.7
+_ALTERNATIVE_END_PROBABILITY = 0.1
+
+_EXPRESSED_FRACTION = 0.7
+_FALSE_NEGATIVE_FRACTION = 0.1
+_FALSE_POSITIVE_FRACTION = 0.05
+
+_GTF_LINE = "{seq}\tpiquant\t" + gtf.EXON_FEATURE + "\t{start}\t{end}\t.\t" + \
+    "{strand}\t.\t" + gtf.GENE_ID_ATTRIBUTE + " \"{gene}\"; " + \
+    gtf.TRANSCRIPT_ID_ATTRIBUTE + " \"{transcript}\";\n"
+_PRO_FILE_LINE = \
+    "{seq}:{start}-{end}{strand}\t{transcript}\t{type}\t{length}\t" + \
+    "{frac:.6e}\t{num}\t0.0\t0\n"
+
+
+def _get_gene_exons(start, random_state):
+    num_exons = random_state.randint(
+        _MIN_EXONS_PER_GENE, _MAX_EXONS_PER_GENE + 1)
+    exon_lengths = random_state.randint(*_EXON_LENGTH_RANGE, size=num_exons)
+    intron_lengths = random_state.randint(
+        *_INTRON_LENGTH_RANGE, size=num_exons)
+
+    exons = []
+    for exon_length, intron_length in zip(exon_lengths, intron_lengths):
+        exons.append((start, start + exon_length - 1))
+        start += exon_length + intron_length
+    return exons
+
+
+def _get_isoform_exons(exons, random_state):
+    # Select a subset of a gene's exons; some exons use an alternative end
+    # position, so that different transcripts' exons overlap
+    included = random_state.rand(len(exons)) < _EXON_INCLUSION_PROBABILITY
+    if not included.any():
+        included[random_state.randint(len(exons))] = True
+
+    isoform_exons = []
+    for start, end in [e for e, i in zip(exons, included) if i]:
+        if random_state.rand() < _ALTERNATIVE_END_PROBABILITY:
+            end = start + random_state.randint(end - start + 1)
+        isoform_exons.append((start, end))
+    return isoform_exons
+
+
+def write_gtf(gtf_file, num_transcripts, random_state):
+    """
+    Write a GTF file describing synthetic genes and transcripts.
+
+    Genes are placed one after another across a number of sequences. Each
+    gene has a set of exons, from which each of its transcripts takes a
+    random subset, so that transcripts share some exons and overlap others.
+    Return a list of SyntheticTranscript instances.
+    gtf_file: Path of the GTF file to write.
+    num_transcripts: The number of transcripts to write.
+    random_state: A numpy RandomState from which random numbers are drawn.
+    """
+    transcripts = []
+    positions = [1] * NUM_SEQUENCES
+
+    with open(gtf_file, "w") as out_file:
+        gene_index = 0
+        while len(transcripts) < num_transcripts:
+            seq_index = gene_index % NUM_SEQUENCES
+            sequence = "chr" + str(seq_index + 1)
+            gene_id = "G{i:07d}".format(i=gene_index)
+            strand = "+" if random_state.rand() < 0.5 else "-"
+
+            exons = _get_gene_exons(positions[seq_index], random_state)
+            num_isoforms = min(1 + random_state.poisson(_MEAN_EXTRA_ISOFORMS),
+                               num_transcripts - len(transcripts))
+
+            for i in range(num_isoforms):
+                transcript_id = "T{i:08d}".format(i=len(transcripts))
+                isoform_exons = _get_isoform_exons(exons, random_state)
+                for start, end in isoform_exons:
+                    out_file.write(_GTF_LINE.format(
+                        seq=sequence, start=start, end=end, strand=strand,
+                        gene=gene_id, transcript=transcript_id))
+
+                transcripts.append(SyntheticTranscript(
+                    transcript_id, gene_id, sequence,
+                    isoform_exons[0][0], isoform_exons[-1][1], strand,
+                    sum([end - start + 1 for start, end in isoform_exons])))
+
+            positions[seq_index] = exons[-1][1] + \
+                random_state.randint(*_INTERGENIC_LENGTH_RANGE)
+            gene_index += 1
+
+    return transcripts
+
+
+def write_expression_profile(pro_file, transcripts, random_state,
+                             num_molecules=30000000):
+    """
+    Write a FluxSimulator .pro file for a set of transcripts.
+
+    A random subset of transcripts is expressed, with log-normally
+    distributed abundances. Return a numpy array of the fraction of
+    molecules deriving from each transcript.
+    pro_file: Path of the expression profile file to write.
+    transcripts: A list of SyntheticTranscript instances.
+    random_state: A numpy RandomState from which random numbers are drawn.
+    num_molecules: The number of molecules in the simulated transcriptome.
+    """
+    expressed = random_state.rand(len(transcripts)) < _EXPRESSED_FRACTION
+    abundances = random_state.lognormal(0, 2, size=len(transcripts))
+    fractions = np.where(expressed, abundances, 0)
+    fractions /= fractions.sum()
+    counts = np.round(fractions * num_molecules).astype(int)
+
+    with open(pro_file, "w") as out_file:
+        for transcript, frac, num in zip(transcripts, fractions, counts):
+            out_file.write(_PRO_FILE_LINE.format(
+                seq=transcript.sequence, start=transcript.start,
+                end=transcript.end,
+                strand="W" if transcript.strand == "+" else "C",
+                transcript=transcript.transcript_id, type="CDS",
+                length=transcript.length, frac=frac, num=num))
+
+    return fractions
+
+
+def write_quantifier_output(quant_method, run_dir, transcripts, fractions,
+                            random_state):
+    """
+    Write transcript abundances as estimated by a quantification method.
+
+    Estimated abundances are the real abundances with log-normal noise; some
+    expressed transcripts are estimated as not being expressed, and vice
+    versa. Abundances are written, as TPMs, to the file from which piquant
+    reads the output of the quantification method.
+    quant_method: The name of a quantification method (a key of
+    QUANTIFIER_OUTPUTS).
+    run_dir: The quantification run directory.
+    transcripts: A list of SyntheticTranscript instances.
+    fractions: A numpy array of the real fraction of molecules deriving from
+    each transcript.
+    random_state: A numpy RandomState from which random numbers are drawn.
+    """
+    num_transcripts = len(transcripts)
+    tpms = fractions * random_state.lognormal(0, 0.5, size=num_transcripts)
+
+    false_negative = \
+        random_state.rand(num_transcripts) < _FALSE_NEGATIVE_FRACTION
+    false_positive = (fractions == 0) & \
+        (random_state.rand(num_transcripts) < _FALSE_POSITIVE_FRACTION)
+    tpms[false_negative] = 0
+    tpms[false_positive] = tpms.mean() * random_state.lognormal(
+        -2, 1, size=false_positive.sum())
+    tpms *= 1000000 / tpms.sum()
+
+    out_file_name, id_column, value_column = QUANTIFIER_OUTPUTS[quant_method]
+    out_file_name = os.path.join(run_dir, out_file_name)
+    if not os.path.exists(os.path.dirname(out_file_name)):
+        os.makedirs(os.path.dirname(out_file_name))
+
+    with open(out_file_name, "w") as out_file:
+        out_file.write("{i}\t{v}\n".format(i=id_column, v=value_column))
+        for transcript, tpm in zip(transcripts, tpms):
+            out_file.write("{i}\t{v:.6f}\n".format(
+                i=transcript.transcript_id, v=tpm))
@@ -0,0 +1,93 @@
+"""
+Functions for reading and writing benchmark results. Results are stored as a
+JSON object holding details of the code and environment benchmarked, the
+benchmark settings, and, for each transcriptome size and pipeline stage, the
+time and memory taken. Exports:
+
+write_results: Write benchmark results to a JSON file.
+read_results: Read benchmark results from a JSON file.
+get_stage_results: Yield results for each transcriptome size and stage.
+
+FORMAT_VERSION: Version of the benchmark results format.
+WALL_TIME: Key for the elapsed time taken by a stage, in seconds.
+CPU_TIME: Key for the CPU time taken by a stage, in seconds.
+PEAK_MEMORY: Key for the peak memory used by a stage, in megabytes.
+SUCCEEDED: Key for whether a stage completed successfully.
+"""
+
+import json
+import os
+import os.path
+import tempfile
+
+FORMAT_VERSION = 1
+
+VERSION = "format_version"
+ENVIRONMENT = "environment"
+SETTINGS = "settings"
+RESULTS = "results"
+
+WALL_TIME = "wall_time"
+CPU_TIME = "cpu_time"
+PEAK_MEMORY = "peak_memory_mb"
+SUCCEEDED = "succeeded"
+
+
+def write_results(results_file, environment, settings, results):
+    """
+    Write benchmark results to a JSON file.
+
+    The file is written atomically, so that an interrupted benchmark run
+    never leaves a partial results file.
+    results_file: Path of the JSON file to write.
+    environment: A dictionary describing the code and machine benchmarked.
+    settings: A dictionary of the settings with which benchmarks were run.
+    results: A dictionary mapping each transcriptome size to a dictionary
+    mapping each pipeline stage name to a dictionary of stage results.
+    """
+    data = {
+        VERSION: FORMAT_VERSION,
+        ENVIRONMENT: environment,
+        SETTINGS: settings,
+        RESULTS: {str(size): stages for size, stages in results.items()}
+    }
+
+    results_dir = os.path.dirname(os.path.abspath(results_file))
+    fd, tmp_file = tempfile.mkstemp(dir=results_dir)
+    with os.fdopen(fd, "w") as out_file:
+        json.dump(data, out_file, indent=2, sort_keys=True,
+                  separators=(",", ": "))
+        out_file.write("\n")
+    os.rename(tmp_file, results_file)
+
+
+def read_results(results_file):
+    """
+    Read benchmark results from a JSON file.
+
+    Return a dictionary with the same structure as that written by
+    write_results, except that transcriptome sizes are integers. Raise a
+    ValueError if the file is not in the current results format.
+    results_file: Path of a JSON file written by write_results.
+    """
+    with open(results_file) as in_file:
+        data = json.load(in_file)
+
+    if data.get(VERSION) != FORMAT_VERSION:
+        raise ValueError(
+            "Unsupported benchmark results format in {f}: {v}".format(
+                f=results_file, v=data.get(VERSION)))
+
+    data[RESULTS] = {int(size): stages
+                     for size, stages in data[RESULTS].items()}
+    return data
+
+
+def get_stage_results(data):
+    """
+    Yield (size, stage name, stage results) for each transcriptome size and
+    pipeline stage in a set of benchmark results, in order of size.
+    """
+    for size in sorted(data[RESULTS]):
+        for stage, stage_results in sorted(data[RESULTS][size].items()):
+            yield size, stage, stage_results
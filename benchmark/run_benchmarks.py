@@ -0,0 +1,282 @@
+#!/usr/bin/env python
+
+"""Usage:
+    run_benchmarks [{log_option_spec} --sizes=<sizes> --quant-method=<quant-method> --data-format=<data-format> --repeats=<repeats> --seed=<seed> --work-dir=<work-dir>] <results-file>
+
+{help_option_spec}                       {help_option_description}
+{ver_option_spec}                    {ver_option_description}
+{log_option_spec}         {log_option_description}
+--sizes=<sizes>                 Comma-separated list of the numbers of transcripts in the synthetic transcriptomes to benchmark [default: {sizes}].
+--quant-method=<quant-method>   Quantification method whose output is simulated (one of {quant_methods}) [default: RSEM].
+--data-format=<data-format>     Format in which assembled per-transcript data is stored (one of {data_formats}) [default: csv].
+--repeats=<repeats>             Number of times to run each pipeline stage; the fastest run is reported [default: 1].
+--seed=<seed>                   Seed for the random number generator used to create synthetic data [default: 0].
+--work-dir=<work-dir>           Directory in which synthetic data and pipeline output are written and retained; if not specified, a temporary directory is used and removed afterwards.
+<results-file>                  JSON file to which benchmark results are written.
+"""
+
+import docopt
+import generators
+import numpy as np
+import os
+import os.path
+import piquant
+import piquant.columnar as columnar
+import piquant.options as opt
+import piquant.resource_usage as ru
+import platform
+import results
+import schema
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+SIZES = "--sizes"
+QUANT_METHOD = "--quant-method"
+DATA_FORMAT = "--data-format"
+REPEATS = "--repeats"
+SEED = "--seed"
+WORK_DIRECTORY = "--work-dir"
+RESULTS_FILE = "<results-file>"
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+
+TRANSCRIPT_COUNTS_STAGE = "count_transcripts_for_genes"
+UNIQUE_SEQUENCE_STAGE = "calculate_unique_transcript_sequence"
+ASSEMBLE_DATA_STAGE = "assemble_quantification_data"
+ANALYSE_RUN_STAGE = "analyse_quantification_run"
+
+_GTF_FILE = "transcripts.gtf"
+_PRO_FILE = "expression.pro"
+_CACHE_DIRECTORY = "annotation_cache"
+_RUN_DIRECTORY = "run"
+_TPMS_FILE_BASENAME = "tpms"
+_STAGE_LOG_SUFFIX = ".log"
+
+# Simulation parameters reported to the analysis script; these only label its
+# output
+_ANALYSIS_PARAMS = ["--read-length=50", "--read-depth=30",
+                    "--paired-end=False", "--error=False", "--bias=False"]
+
+
+def _validate_command_line_options(options):
+    try:
+        opt.validate_log_level(options)
+
+        options[SIZES] = opt.validate_options_list(
+            options[SIZES], int, "transcriptome size")
+        if min(options[SIZES]) <= 0:
+            raise schema.SchemaError(
+                None, "Transcriptome sizes must be positive integers")
+        opt.validate_dict_option(
+            options[QUANT_METHOD], generators.QUANTIFIER_OUTPUTS,
+            "Unknown quantification method")
+        opt.validate_list_option(
+            options[DATA_FORMAT], columnar.DATA_FORMATS,
+            "Invalid data format")
+        options[REPEATS] = opt.validate_int_option(
+            options[REPEATS], "Number of repeats must be a positive integer",
+            positive=True)
+        options[SEED] = opt.validate_int_option(
+            options[SEED], "Random seed must be a non-negative integer",
+            nonneg=True)
+        opt.validate_dir_option(
+            options[WORK_DIRECTORY], "Working directory should exist",
+            nullable=True)
+    except schema.SchemaError as exc:
+        exit("Exiting. " + exc.code)
+
+
+def _get_script_path(script_name):
+    return os.path.join(
+        os.path.abspath(os.path.dirname(piquant.__file__)),
+        script_name + ".py")
+
+
+def _get_git_commit():
+    repo_dir = os.path.dirname(os.path.abspath(piquant.__file__))
+    try:
+        with open(os.devnull, "w") as devnull:
+            return subprocess.check_output(
+                ["git", "rev-parse", "HEAD"], cwd=repo_dir,
+                stderr=devnull).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _get_environment():
+    return {
+        "commit": _get_git_commit(),
+        "piquant_version": piquant.__version__,
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+
+
+def _get_stage_environment():
+    # Plots are drawn without a display
+    env = dict(os.environ)
+    env.setdefault("MPLBACKEND", "Agg")
+    return env
+
+
+def _time_command(command, working_dir, log_file):
+    # Run a command in a separate process, returning its elapsed time, CPU
+    # time and peak memory usage. Waiting with wait4() gives the resource
+    # usage of this process alone.
+    with open(log_file, "w") as log, open(os.devnull, "w") as devnull:
+        start = time.time()
+        process = subprocess.Popen(
+            command, cwd=working_dir, env=_get_stage_environment(),
+            stdout=devnull, stderr=log)
+        _, status, usage = os.wait4(process.pid, 0)
+        wall_time = time.time() - start
+    process.returncode = status
+
+    return {
+        results.WALL_TIME: wall_time,
+        results.CPU_TIME: usage.ru_utime + usage.ru_stime,
+        results.PEAK_MEMORY: ru.get_peak_memory_megabytes(usage),
+        results.SUCCEEDED: os.WIFEXITED(status) and
+        os.WEXITSTATUS(status) == 0
+    }
+
+
+def _get_stage_commands(size_dir, options):
+    gtf_file = os.path.join(size_dir, _GTF_FILE)
+    pro_file = os.path.join(size_dir, _PRO_FILE)
+    cache_dir = os.path.join(size_dir, _CACHE_DIRECTORY)
+    run_dir = os.path.join(size_dir, _RUN_DIRECTORY)
+    tpms_file = columnar.get_data_file(
+        _TPMS_FILE_BASENAME, options[DATA_FORMAT])
+    python = [sys.executable]
+
+    return [
+        (TRANSCRIPT_COUNTS_STAGE, size_dir,
+         python + [_get_script_path(TRANSCRIPT_COUNTS_STAGE),
+                   "--cache-dir=" + cache_dir, gtf_file]),
+        (UNIQUE_SEQUENCE_STAGE, size_dir,
+         python + [_get_script_path(UNIQUE_SEQUENCE_STAGE),
+                   "--cache-dir=" + cache_dir, gtf_file]),
+        (ASSEMBLE_DATA_STAGE, run_dir,
+         python + [_get_script_path(ASSEMBLE_DATA_STAGE),
+                   "--method=" + options[QUANT_METHOD],
+                   "--out=" + tpms_file, "--cache-dir=" + cache_dir,
+                   pro_file, gtf_file]),
+        (ANALYSE_RUN_STAGE, run_dir,
+         python + [_get_script_path(ANALYSE_RUN_STAGE),
+                   "--quant-method=" + options[QUANT_METHOD]] +
+         _ANALYSIS_PARAMS + [tpms_file, options[QUANT_METHOD]])
+    ]
+
+
+def _create_synthetic_data(logger, size_dir, size, options):
+    random_state = np.random.RandomState(options[SEED])
+    run_dir = os.path.join(size_dir, _RUN_DIRECTORY)
+    os.makedirs(run_dir)
+
+    logger.info("Writing GTF file for {n} transcripts...".format(n=size))
+    transcripts = generators.write_gtf(
+        os.path.join(size_dir, _GTF_FILE), size, random_state)
+
+    logger.info("Writing expression profile...")
+    fractions = generators.write_expression_profile(
+        os.path.join(size_dir, _PRO_FILE), transcripts, random_state)
+
+    logger.info("Writing {m} output...".format(m=options[QUANT_METHOD]))
+    generators.write_quantifier_output(
+        options[QUANT_METHOD], run_dir, transcripts, fractions, random_state)
+
+
+def _get_last_line(log_file):
+    with open(log_file) as log:
+        lines = [line.strip() for line in log if line.strip()]
+    return lines[-1] if lines else ""
+
+
+def _get_fastest_result(stage_results):
+    fastest = min(stage_results, key=lambda r: r[results.WALL_TIME])
+    fastest = dict(fastest)
+    fastest[results.SUCCEEDED] = \
+        all([r[results.SUCCEEDED] for r in stage_results])
+    return fastest
+
+
+def _benchmark_size(logger, size_dir, options):
+    stage_results = {}
+
+    for repeat in range(options[REPEATS]):
+        # Cached annotation data would otherwise short-circuit the annotation
+        # stages on repeated runs
+        cache_dir = os.path.join(size_dir, _CACHE_DIRECTORY)
+        if os.path.exists(cache_dir):
+            shutil.rmtree(cache_dir)
+
+        for stage, working_dir, command in \
+                _get_stage_commands(size_dir, options):
+            log_file = os.path.join(size_dir, stage + _STAGE_LOG_SUFFIX)
+            result = _time_command(command, working_dir, log_file)
+            stage_results.setdefault(stage, []).append(result)
+
+            logger.info("...{s}: {t:.2f}s, {m:.1f}MB".format(
+                s=stage, t=result[results.WALL_TIME],
+                m=result[results.PEAK_MEMORY]))
+            if not result[results.SUCCEEDED]:
+                logger.warning("{s} failed: {e}".format(
+                    s=stage, e=_get_last_line(log_file)))
+
+    return {stage: _get_fastest_result(stage_results[stage])
+            for stage in stage_results}
+
+
+def _run_benchmarks(logger, options):
+    work_dir = options[WORK_DIRECTORY]
+    if work_dir is None:
+        work_dir = tempfile.mkdtemp()
+
+    try:
+        size_results = {}
+        for size in options[SIZES]:
+            size_dir = os.path.join(work_dir, "transcripts_" + str(size))
+            if os.path.exists(size_dir):
+                shutil.rmtree(size_dir)
+
+            _create_synthetic_data(logger, size_dir, size, options)
+            logger.info(("Benchmarking pipeline stages for {n} " +
+                         "transcripts...").format(n=size))
+            size_results[size] = _benchmark_size(logger, size_dir, options)
+    finally:
+        if options[WORK_DIRECTORY] is None:
+            shutil.rmtree(work_dir)
+
+    settings = {
+        "quant_method": options[QUANT_METHOD],
+        "data_format": options[DATA_FORMAT],
+        "repeats": options[REPEATS],
+        "seed": options[SEED]
+    }
+
+    logger.info("Writing results to {f}".format(f=options[RESULTS_FILE]))
+    results.write_results(
+        options[RESULTS_FILE], _get_environment(), settings, size_results)
+
+
+if __name__ == "__main__":
+    # Read in command-line options
+    __doc__ = opt.substitute_common_options_into_usage(
+        __doc__, sizes=",".join([str(s) for s in DEFAULT_SIZES]),
+        quant_methods=sorted(generators.QUANTIFIER_OUTPUTS.keys()),
+        data_formats=columnar.DATA_FORMATS)
+    options = docopt.docopt(__doc__, version="run_benchmarks v0.1")
+
+    # Validate command-line options
+    _validate_command_line_options(options)
+
+    # Set up logger
+    logger = opt.get_logger_for_options(options)
+
+    # Time each pipeline stage on synthetic transcriptomes of each size
+    _run_benchmarks(logger, options)
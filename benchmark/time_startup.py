@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+
+"""Usage:
+    time_startup [{log_option_spec} --repeats=<repeats>]
+
+{help_option_spec}                       {help_option_description}
+{ver_option_spec}                    {ver_option_description}
+{log_option_spec}         {log_option_description}
+--repeats=<repeats>             Number of times to start each command or script; the fastest start is reported [default: 3].
+"""
+
+import collections
+import docopt
+import json
+import os.path
+import piquant
+import piquant.options as opt
+import piquant.piquant_options as po
+import schema
+import subprocess
+import sys
+import time
+
+REPEATS = "--repeats"
+
+# Support scripts executed as separate processes by simulation and
+# quantification scripts
+SUPPORT_SCRIPTS = [
+    "analyse_quantification_run",
+    "assemble_quantification_data",
+    "calculate_reads_for_depth",
+    "calculate_unique_transcript_sequence",
+    "count_transcripts_for_genes",
+    "shuffle_reads",
+    "simulate_read_bias",
+    "subsample_reads",
+    "time_stage"
+]
+
+PIQUANT_COMMANDS = [
+    po.PREPARE_READ_DIRS, po.CREATE_READS, po.CHECK_READS,
+    po.PREPARE_QUANT_DIRS, po.PREQUANTIFY, po.QUANTIFY,
+    po.CHECK_QUANTIFICATION, po.ANALYSE_RUNS
+]
+
+# Third-party modules whose import dominates start-up time
+HEAVY_MODULES = ["pandas", "scipy", "matplotlib", "seaborn"]
+
+StartupTime = collections.namedtuple(
+    "StartupTime", ["target", "wall_time", "heavy_modules"])
+
+# Executed in a new Python process to import the modules needed by a piquant
+# command or support script, as when it is run, and then print the heavy
+# modules that were imported. Scripts use implicit relative imports, and so
+# the piquant source directory is placed first on the module search path.
+_IMPORT_CODE = """
+import json, sys
+sys.path.insert(0, {piquant_dir!r})
+{import_code}
+print(json.dumps([m for m in {heavy_modules!r} if m in sys.modules]))
+"""
+
+_PIQUANT_COMMAND_CODE = """
+import piquant
+piquant._get_executables_for_commands()[{command!r}]()
+"""
+
+_SUPPORT_SCRIPT_CODE = "import {script}"
+
+_HEADER = "{:<40}{:>10}  {}".format("command", "time (s)", "heavy modules")
+_ROW = "{target:<40}{t:>10.2f}  {modules}"
+
+
+def _validate_command_line_options(options):
+    try:
+        opt.validate_log_level(options)
+
+        options[REPEATS] = opt.validate_int_option(
+            options[REPEATS], "Number of repeats must be a positive integer",
+            positive=True)
+    except schema.SchemaError as exc:
+        exit("Exiting. " + exc.code)
+
+
+def _get_import_code(import_code):
+    return _IMPORT_CODE.format(
+        piquant_dir=os.path.dirname(os.path.abspath(piquant.__file__)),
+        import_code=import_code, heavy_modules=HEAVY_MODULES)
+
+
+def get_piquant_command_code(command):
+    """
+    Return Python code importing the modules needed to run a piquant command.
+    """
+    return _get_import_code(_PIQUANT_COMMAND_CODE.format(command=command))
+
+
+def get_support_script_code(script):
+    """
+    Return Python code importing the modules needed to run a support script.
+    """
+    return _get_import_code(_SUPPORT_SCRIPT_CODE.format(script=script))
+
+
+def time_startup(target, code, repeats=1):
+    """
+    Time the start-up of a piquant command or support script.
+
+    Return a StartupTime instance holding the fastest elapsed time, over a
+    number of repeats, taken to start a Python process and import the modules
+    needed by the command or script, and the heavy third-party modules (see
+    HEAVY_MODULES) which were imported.
+    target: Name of the command or script.
+    code: Python code importing the modules needed by the command or script,
+    as returned by get_piquant_command_code() or get_support_script_code().
+    repeats: Number of times to start the command or script.
+    """
+    wall_times = []
+    for repeat in range(repeats):
+        start = time.time()
+        output = subprocess.check_output([sys.executable, "-c", code])
+        wall_times.append(time.time() - start)
+
+    return StartupTime(target, min(wall_times), json.loads(output))
+
+
+def _print_startup_times(startup_times):
+    print(_HEADER)
+    for s in startup_times:
+        print(_ROW.format(target=s.target, t=s.wall_time,
+                          modules=", ".join(s.heavy_modules) or "-"))
+
+
+def _time_startup(logger, options):
+    targets = \
+        [("piquant " + c, get_piquant_command_code(c))
+         for c in PIQUANT_COMMANDS] + \
+        [(s, get_support_script_code(s)) for s in SUPPORT_SCRIPTS]
+
+    startup_times = []
+    for target, code in targets:
+        logger.info("Timing start-up of {t}...".format(t=target))
+        startup_times.append(time_startup(target, code, options[REPEATS]))
+
+    _print_startup_times(startup_times)
+
+
+if __name__ == "__main__":
+    # Read in command-line options
+    __doc__ = opt.substitute_common_options_into_usage(__doc__)
+    options = docopt.docopt(__doc__, version="time_startup v0.1")
+
+    # Validate command-line options
+    _validate_command_line_options(options)
+
+    # Set up logger
+    logger = opt.get_logger_for_options(options)
+
+    # Time the start-up of each piquant command and support script
+    _time_startup(logger, options)
@@ -1,30 +1,37 @@
 #!/usr/bin/env python
 
 """Usage:
-    analyse_quantification_run [{log_option_spec} --plot-format=<plot-format> --grouped-threshold=<threshold>] --quant-method=<quant-method> --read-length=<read-length> --read-depth=<read-depth> --paired-end=<paired-end> --error=<errors> --bias=<bias> <tpm-file> <out-file>
+    analyse_quantification_run [{log_option_spec} --plot-format=<plot-format> --grouped-threshold=<threshold> --distribution-points=<num-points> --metrics-file=<metrics-file> --read-count-file=<read-count-file>] --quant-method=<quant-method> --read-length=<read-length> --read-depth=<read-depth> --paired-end=<paired-end> --error=<errors> --bias=<bias> <tpm-file> <out-file>
 
 {help_option_spec}                                    {help_option_description}
 {ver_option_spec}                                 {ver_option_description}
 {log_option_spec}                      {log_option_description}
 --plot-format=<plot-format>                  Output format for graphs (one of {plot_formats}) [default: pdf].
 --grouped-threshold=<threshold>              Minimum number of data points required for a group of transcripts to be shown on a plot [default: 300].
+--distribution-points=<num-points>           Number of threshold values at which cumulative transcript distributions are calculated [default: {distribution_points}].
+--metrics-file=<metrics-file>                File recording the resources used by each stage of the quantification run, from which resource statistics are calculated.
+--read-count-file=<read-count-file>          File containing the number of reads quantified, used to calculate quantification throughput; throughput is not calculated if the file does not exist.
 --quant-method=<quant-method>                Method used to quantify transcript abundances.
 --read-length=<read-length>                  The length of sequence reads.
 --read-depth=<read-depth>                    The depth of reads sequenced across the transcriptome.
 --paired-end=<paired-end>                    Whether paired-end sequence reads were used.
 --error=<errors>                             Whether the reads contain sequencing errors.
 --bias=<bias>                                Whether the reads contain sequence bias.
-<tpm-file>                                   File containing real and calculated TPMs.
+<tpm-file>                                   File containing real and calculated TPMs, as CSV or, if the file name ends in '{columnar_suffix}', in columnar binary format.
 <out-file>                                   Basename for output graph and data files.
 """
 
 import classifiers
 import collections
+import columnar
 import docopt
+import file_system as fsys
 import itertools
 import options as opt
-import pandas as pd
+import os.path
 import parameters
+import piquant_options as po
+import resource_usage as ru
 import statistics
 import tpms as t
 import plot
@@ -36,6 +43,12 @@ TPM_FILE = "<tpm-file>"
 OUT_FILE_BASENAME = "<out-file>"
 PLOT_FORMAT = "--plot-format"
 GROUPED_THRESHOLD = "--grouped-threshold"
+DISTRIBUTION_POINTS = "--distribution-points"
+METRICS_FILE = "--metrics-file"
+READ_COUNT_FILE = "--read-count-file"
+
+TPM_COLUMNS = [t.LENGTH, t.UNIQUE_SEQ_LENGTH, t.TRANSCRIPT_COUNT,
+               t.REAL_TPM, t.CALCULATED_TPM]
 
 TpmInfo = collections.namedtuple("TpmInfo", ["tpms", "label"])
 
@@ -44,13 +57,26 @@ def _validate_command_line_options(options):
     try:
         opt.validate_log_level(options)
 
-        opt.validate_file_option(options[TPM_FILE], "Could not open TPM file")
+        if options[TPM_FILE].endswith(columnar.COLUMNAR_SUFFIX):
+            opt.validate_dir_option(
+                options[TPM_FILE], "Could not open TPM file")
+        else:
+            opt.validate_file_option(
+                options[TPM_FILE], "Could not open TPM file")
 
         opt.validate_list_option(
-            options[PLOT_FORMAT], plot.PLOT_FORMATS, "Invalid plot format")
+            options[PLOT_FORMAT], po.PLOT_FORMATS, "Invalid plot format")
         options[GROUPED_THRESHOLD] = opt.validate_int_option(
             options[GROUPED_THRESHOLD],
             "Invalid minimum value for number of data points for boxplots")
+        options[DISTRIBUTION_POINTS] = opt.validate_int_option(
+            options[DISTRIBUTION_POINTS],
+            "Number of distribution points must be a positive integer",
+            positive=True)
+
+        opt.validate_file_option(
+            options[METRICS_FILE], "Could not open metrics file",
+            nullable=True)
     except schema.SchemaError as exc:
         exit(exc.code)
 
@@ -69,11 +95,41 @@ def _add_parameter_values_to_stats(stats):
         stats[param.name] = options[param.option_name]
 
 
+def _get_quantification_usage(options):
+    if options[METRICS_FILE] is None:
+        return None
+
+    for usage in ru.read_stage_usage(options[METRICS_FILE]):
+        if usage.stage == ru.QUANTIFICATION_STAGE:
+            return usage
+    return None
+
+
+def _get_number_of_reads(options):
+    # The read count file is written when reads are created, and so is
+    # missing for reads created by earlier versions of piquant
+    read_count_file = options[READ_COUNT_FILE]
+    if read_count_file is None or not os.path.exists(read_count_file):
+        return None
+    with open(read_count_file) as f:
+        return int(f.read())
+
+
+def _add_resource_stats_to_stats(stats, options):
+    # Statistics describing the resources used by the quantification tool are
+    # calculated from those recorded for the quantification stage of the run
+    usage = _get_quantification_usage(options)
+    num_reads = _get_number_of_reads(options) if usage is not None else None
+    for stat in statistics.get_resource_statistics():
+        stats[stat.name] = stat.calculate_for_usage(usage, num_reads)
+
+
 def _write_overall_stats(tpms, tp_tpms, options):
     stats = t.get_stats(tpms, tp_tpms, statistics.get_statistics())
+    _add_resource_stats_to_stats(stats, options)
     _add_parameter_values_to_stats(stats)
 
-    stats_file_name = statistics.get_stats_file(
+    stats_file_name = fsys.get_stats_file(
         ".", options[OUT_FILE_BASENAME])
     statistics.write_stats_data(stats_file_name, stats, index=False)
 
@@ -89,17 +145,18 @@ def _write_stratified_stats(tpms, tp_tpms, non_zero, options):
             _add_parameter_values_to_stats(stats)
             clsfr_stats[classifier] = stats
 
-            stats_file_name = statistics.get_stats_file(
+            stats_file_name = fsys.get_stats_file(
                 ".", options[OUT_FILE_BASENAME], classifier)
             statistics.write_stats_data(stats_file_name, stats)
 
         elif classifier.produces_distribution_plots():
             for ascending in [True, False]:
                 stats = t.get_distribution_stats(
-                    non_zero, tp_tpms, classifier, ascending)
+                    non_zero, tp_tpms, classifier, ascending,
+                    options[DISTRIBUTION_POINTS])
                 _add_parameter_values_to_stats(stats)
 
-                stats_file_name = statistics.get_stats_file(
+                stats_file_name = fsys.get_stats_file(
                     ".", options[OUT_FILE_BASENAME], classifier, ascending)
                 statistics.write_stats_data(
                     stats_file_name, stats, index=False)
@@ -146,7 +203,8 @@ def _draw_cumulative_transcript_distribution_graphs(
     for c, asc, ti in itertools.product(clsfrs, ascending, tpm_infos):
         plot.plot_cumulative_transcript_distribution(
             options[PLOT_FORMAT], ti.tpms,
-            options[OUT_FILE_BASENAME], ti.label, c, asc)
+            options[OUT_FILE_BASENAME], ti.label, c, asc,
+            options[DISTRIBUTION_POINTS])
 
 
 def _prepare_data(tpms):
@@ -201,7 +259,7 @@ def _draw_graphs(options, tp_tpms, non_zero, clsfr_stats):
 def _analyse_run(logger, options):
     # Read TPMs into a data frame
     logger.info("Reading TPMs...")
-    tpms = pd.read_csv(options[TPM_FILE])
+    tpms = columnar.read_data(options[TPM_FILE], columns=TPM_COLUMNS)
 
     _prepare_data(tpms)
 
@@ -221,7 +279,9 @@ def _analyse_run(logger, options):
 if __name__ == "__main__":
     # Read in command-line options
     __doc__ = opt.substitute_common_options_into_usage(
-        __doc__, plot_formats=plot.PLOT_FORMATS)
+        __doc__, plot_formats=po.PLOT_FORMATS,
+        columnar_suffix=columnar.COLUMNAR_SUFFIX,
+        distribution_points=t.CUMULATIVE_DISTRIBUTION_POINTS)
     options = docopt.docopt(
         __doc__, version="analyse_quantification_run v0.1")
 
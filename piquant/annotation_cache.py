@@ -0,0 +1,113 @@
+"""
+Functions for caching tables of per-transcript annotation data derived from a
+GTF file, keyed by the content of that file. Exports:
+
+get_file_hash: Return a hash of the content of a file.
+get_cached_table_file: Return the path of a cached table for a GTF file.
+write_table: Write a table of named columns to a compact binary file.
+read_table: Read a table of named columns from a compact binary file.
+
+CACHE_DIRECTORY: Default name for a directory of cached tables.
+TRANSCRIPT_COUNTS_TABLE: Name of the table of per-gene transcript counts.
+UNIQUE_SEQUENCE_TABLE: Name of the table of unique sequence lengths.
+"""
+
+import collections
+import errno
+import hashlib
+import numpy as np
+import os
+import os.path
+import tempfile
+
+CACHE_DIRECTORY = "annotation_cache"
+TABLE_SUFFIX = ".npz"
+
+TRANSCRIPT_COUNTS_TABLE = "transcript_counts"
+UNIQUE_SEQUENCE_TABLE = "unique_sequence"
+
+_COLUMNS_KEY = "__columns__"
+_HASH_BLOCK_SIZE = 1 << 20
+
+_file_hashes = {}
+
+
+def get_file_hash(file_name):
+    """
+    Return a hash of the content of a file.
+
+    Return the hexadecimal SHA-1 digest of the content of a file. Digests are
+    remembered for the lifetime of the process, keyed by the file's path,
+    size and modification time.
+    file_name: Path to the file to hash.
+    """
+    file_stat = os.stat(file_name)
+    key = (os.path.abspath(file_name), file_stat.st_size, file_stat.st_mtime)
+
+    if key not in _file_hashes:
+        sha1 = hashlib.sha1()
+        with open(file_name, 'rb') as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b''):
+                sha1.update(block)
+        _file_hashes[key] = sha1.hexdigest()
+
+    return _file_hashes[key]
+
+
+def get_cached_table_file(cache_dir, gtf_file, table_name):
+    """
+    Return the path of a cached table of data derived from a GTF file.
+
+    cache_dir: Path to the directory containing cached tables.
+    gtf_file: Path to the GTF file from which the table's data is derived.
+    table_name: Name of the table (e.g. TRANSCRIPT_COUNTS_TABLE).
+    """
+    return os.path.join(
+        cache_dir, get_file_hash(gtf_file), table_name + TABLE_SUFFIX)
+
+
+def _make_directory(dir_name):
+    try:
+        os.makedirs(dir_name)
+    except OSError as exc:
+        if exc.errno != errno.EEXIST:
+            raise
+
+
+def write_table(table_file, columns):
+    """
+    Write a table of named columns to a compact binary file.
+
+    Write a table as a compressed NumPy archive. The file is first written
+    under a temporary name and then renamed, so that concurrent readers never
+    see a partially written table.
+    table_file: Path of the file to write.
+    columns: A list of (column name, column values) pairs.
+    """
+    dir_name = os.path.dirname(table_file)
+    _make_directory(dir_name)
+
+    arrays = {name: np.asarray(values) for name, values in columns}
+    arrays[_COLUMNS_KEY] = np.array([name for name, values in columns])
+
+    tmp_fd, tmp_file = tempfile.mkstemp(dir=dir_name, suffix=TABLE_SUFFIX)
+    os.close(tmp_fd)
+    try:
+        np.savez_compressed(tmp_file, **arrays)
+        os.rename(tmp_file, table_file)
+    except:
+        os.remove(tmp_file)
+        raise
+
+
+def read_table(table_file):
+    """
+    Read a table of named columns from a compact binary file.
+
+    Return an OrderedDict mapping from column names to NumPy arrays of column
+    values, in the order in which the columns were written.
+    table_file: Path of a file written by write_table().
+    """
+    with np.load(table_file) as archive:
+        return collections.OrderedDict(
+            [(str(name), archive[name]) for name in archive[_COLUMNS_KEY]])
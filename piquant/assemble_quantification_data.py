@@ -1,22 +1,24 @@
 #!/usr/bin/env python
 
 """Usage:
-    assemble_quantification_data [{log_option_spec}] --method=<quantification-method> --out=<output-file> <pro-file> <transcript-count-file> <unique-sequence-file>
+    assemble_quantification_data [{log_option_spec}] --method=<quantification-method> --out=<output-file> --cache-dir=<cache-dir> <pro-file> <transcript-gtf-file>
 
 {help_option_spec}                    {help_option_description}
 {ver_option_spec}                 {ver_option_description}
 {log_option_spec}      {log_option_description}
 -m --method=<quant-method>   Method used to quantify transcript abundances.
 -o <output-file> --out=<output-file>
-                             Output file for real and calculated TPMs.
+                             Output file for real and calculated TPMs; if the file name ends in '{columnar_suffix}', data is written in columnar binary format, and otherwise as CSV.
+--cache-dir=<cache-dir>      Annotation cache directory containing per-gene transcript counts and unique sequence lengths per-transcript.
 <pro-file>                   Flux Simulator gene expression profile file.
-<transcript-count-file>      File containing per-gene transcript counts.
-<unique-sequence-file>       File containing unique sequence lengths per-transcript.
+<transcript-gtf-file>        GTF file from which cached transcript annotation data was derived.
 """
 
 from docopt import docopt
 from schema import SchemaError
 
+import annotation_cache as ac
+import columnar
 import flux_simulator as fs
 import options as opt
 import pandas
@@ -25,9 +27,9 @@ import tpms
 
 QUANT_METHOD = "--method"
 OUT_FILE = "--out"
+CACHE_DIR = "--cache-dir"
 PRO_FILE = "<pro-file>"
-COUNT_FILE = "<transcript-count-file>"
-UNIQUE_SEQ_FILE = "<unique-sequence-file>"
+GTF_FILE = "<transcript-gtf-file>"
 
 TRANSCRIPT_COL = "transcript"
 COUNT_COL = "transcript_count"
@@ -43,11 +45,20 @@ def _validate_command_line_options(options):
 
         opt.validate_file_option(
             options[PRO_FILE], "Could not open expression profile file")
+        opt.validate_dir_option(
+            options[CACHE_DIR], "Annotation cache directory does not exist")
         opt.validate_file_option(
-            options[COUNT_FILE], "Could not open transcript count file")
+            options[GTF_FILE], "Could not open transcript GTF file")
         opt.validate_file_option(
-            options[UNIQUE_SEQ_FILE],
-            "Could not open unique sequence lengths file")
+            ac.get_cached_table_file(
+                options[CACHE_DIR], options[GTF_FILE],
+                ac.TRANSCRIPT_COUNTS_TABLE),
+            "Transcript counts have not been cached for the GTF file")
+        opt.validate_file_option(
+            ac.get_cached_table_file(
+                options[CACHE_DIR], options[GTF_FILE],
+                ac.UNIQUE_SEQUENCE_TABLE),
+            "Unique sequence lengths have not been cached for the GTF file")
         options[QUANT_METHOD] = opt.validate_dict_option(
             options[QUANT_METHOD], qs.get_quantification_methods(),
             "Unknown quantification method")
@@ -56,37 +67,49 @@ def _validate_command_line_options(options):
 
 
 def _read_expression_profiles(pro_file):
-    profiles = fs.read_expression_profiles(pro_file)
-    profiles[tpms.REAL_TPM] = \
-        profiles[fs.PRO_FILE_FRAC_COL].map(lambda x: 1000000 * x)
+    profiles = fs.read_expression_profiles(
+        pro_file, columns=[fs.PRO_FILE_TRANSCRIPT_ID_COL,
+                           fs.PRO_FILE_LENGTH_COL, fs.PRO_FILE_FRAC_COL])
+    profiles[tpms.REAL_TPM] = 1000000 * profiles[fs.PRO_FILE_FRAC_COL]
     return profiles
 
 
+def _get_values_for_profiles(values, profiles):
+    # Left join a Series of per-transcript values onto the expression
+    # profiles by transcript ID; transcripts without a value are given zero.
+    # Where a transcript ID is repeated (as in the output of some
+    # quantifiers), its first value is used.
+    if not values.index.is_unique:
+        values = values.groupby(level=0).first()
+    joined = values.reindex(profiles[fs.PRO_FILE_TRANSCRIPT_ID_COL])
+    return joined.fillna(0).astype(values.dtype).values
+
+
 def _read_transcript_abundances(quantifier, profiles):
-    profiles[tpms.CALCULATED_TPM] = profiles[fs.PRO_FILE_TRANSCRIPT_ID_COL].\
-        map(quantifier.get_transcript_abundance)
+    profiles[tpms.CALCULATED_TPM] = _get_values_for_profiles(
+        quantifier.get_abundances(), profiles)
 
 
-def _read_transcript_counts(count_file, profiles):
-    transcript_counts = pandas.read_csv(count_file, index_col=TRANSCRIPT_COL)
+def _read_cached_table(cache_dir, gtf_file, table_name):
+    table_file = ac.get_cached_table_file(cache_dir, gtf_file, table_name)
+    table = pandas.DataFrame(ac.read_table(table_file))
+    return table.set_index(TRANSCRIPT_COL)
 
-    set_transcript_count = lambda t_id: \
-        transcript_counts.ix[t_id][COUNT_COL] \
-        if t_id in transcript_counts.index else 0
 
-    profiles[tpms.TRANSCRIPT_COUNT] = \
-        profiles[fs.PRO_FILE_TRANSCRIPT_ID_COL].map(set_transcript_count)
+def _read_transcript_counts(cache_dir, gtf_file, profiles):
+    transcript_counts = _read_cached_table(
+        cache_dir, gtf_file, ac.TRANSCRIPT_COUNTS_TABLE)
 
+    profiles[tpms.TRANSCRIPT_COUNT] = _get_values_for_profiles(
+        transcript_counts[COUNT_COL], profiles)
 
-def _read_unique_sequence_lengths(unique_seq_file, profiles):
-    unique_seqs = pandas.read_csv(unique_seq_file, index_col=TRANSCRIPT_COL)
 
-    set_unique_length = lambda t_id: \
-        unique_seqs.ix[t_id][UNIQUE_SEQ_LENGTH_COL] \
-        if t_id in unique_seqs.index else 0
+def _read_unique_sequence_lengths(cache_dir, gtf_file, profiles):
+    unique_seqs = _read_cached_table(
+        cache_dir, gtf_file, ac.UNIQUE_SEQUENCE_TABLE)
 
-    profiles[tpms.UNIQUE_SEQ_LENGTH] = \
-        profiles[fs.PRO_FILE_TRANSCRIPT_ID_COL].map(set_unique_length)
+    profiles[tpms.UNIQUE_SEQ_LENGTH] = _get_values_for_profiles(
+        unique_seqs[UNIQUE_SEQ_LENGTH_COL], profiles)
 
 
 def _write_quantification_data(out_file, profiles):
@@ -97,10 +120,10 @@ def _write_quantification_data(out_file, profiles):
         },
         inplace=True)
 
-    profiles.to_csv(
-        out_file, index=False,
-        cols=[TRANSCRIPT_COL, tpms.LENGTH, tpms.UNIQUE_SEQ_LENGTH,
-              tpms.TRANSCRIPT_COUNT, tpms.REAL_TPM, tpms.CALCULATED_TPM])
+    columnar.write_data(
+        out_file, profiles,
+        columns=[TRANSCRIPT_COL, tpms.LENGTH, tpms.UNIQUE_SEQ_LENGTH,
+                 tpms.TRANSCRIPT_COUNT, tpms.REAL_TPM, tpms.CALCULATED_TPM])
 
 
 def _assemble_and_write_quantification_data(logger, options):
@@ -116,11 +139,12 @@ def _assemble_and_write_quantification_data(logger, options):
 
     # Read per-gene transcript counts
     logger.info("Reading per-gene transcript counts...")
-    _read_transcript_counts(options[COUNT_FILE], profiles)
+    _read_transcript_counts(options[CACHE_DIR], options[GTF_FILE], profiles)
 
     # Read unique sequence lengths per-transcript
     logger.info("Reading unique sequence lengths per-transcript")
-    _read_unique_sequence_lengths(options[UNIQUE_SEQ_FILE], profiles)
+    _read_unique_sequence_lengths(
+        options[CACHE_DIR], options[GTF_FILE], profiles)
 
     # Write TPMs and other relevant data to output file
     logger.info("Writing TPMs to file {out}".format(out=options[OUT_FILE]))
@@ -129,7 +153,8 @@ def _assemble_and_write_quantification_data(logger, options):
 
 if __name__ == "__main__":
     # Read in command-line options
-    __doc__ = opt.substitute_common_options_into_usage(__doc__)
+    __doc__ = opt.substitute_common_options_into_usage(
+        __doc__, columnar_suffix=columnar.COLUMNAR_SUFFIX)
     options = docopt(__doc__, version="assemble_quantification_data v0.1")
 
     # Validate command-line options
@@ -37,24 +37,22 @@ def _validate_command_line_options(options):
         exit("Exiting. " + exc.code)
 
 
-def _read_expression_profiles(logger, pro_file):
-    logger.info("Reading expression profiles from '{f}'...".format(f=pro_file))
-    profiles = fs.read_expression_profiles(pro_file)
-    profiles.set_index(fs.PRO_FILE_TRANSCRIPT_ID_COL, inplace=True)
-    logger.info("...read profiles for {n} transcripts.".
-                format(n=len(profiles)))
-
-    # Filter those transcripts with zero expression in the profile file
-    profiles = profiles[profiles[fs.PRO_FILE_NUM_COL] > 0]
+def _get_expression_profile_summary(logger, pro_file):
+    logger.info("Reading expression profile summary for '{f}'...".format(
+        f=pro_file))
+    summary = fs.get_expression_profile_summary(pro_file)
+    logger.info("...profiles contain {n} transcripts.".
+                format(n=summary.num_transcripts))
+
+    # Only those transcripts with non-zero expression are considered
     logger.info("Retained {n} transcripts with non-zero expression.".
-                format(n=len(profiles)))
+                format(n=summary.num_expressed))
 
-    return profiles
+    return summary
 
 
-def _calculate_reads_for_depth(profiles, read_length, required_depth):
-    total_transcript_length = profiles[fs.PRO_FILE_LENGTH_COL].sum()
-    bases_to_sequence = total_transcript_length * required_depth
+def _calculate_reads_for_depth(summary, read_length, required_depth):
+    bases_to_sequence = summary.expressed_length * required_depth
     return bases_to_sequence // read_length
 
 
@@ -69,10 +67,10 @@ if __name__ == "__main__":
     # Set up logger
     logger = opt.get_logger_for_options(options)
 
-    # Read in Flux Simulator expression profiles
-    profiles = _read_expression_profiles(logger, options[PRO_FILE])
+    # Read summary data for the Flux Simulator expression profiles
+    summary = _get_expression_profile_summary(logger, options[PRO_FILE])
 
     # Calculate the number of reads required to approximately give the
     # specified overall average depth of coverage
     print(_calculate_reads_for_depth(
-        profiles, options[READ_LENGTH], options[READ_DEPTH]))
+        summary, options[READ_LENGTH], options[READ_DEPTH]))
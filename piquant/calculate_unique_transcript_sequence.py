@@ -1,22 +1,26 @@
 #!/usr/bin/env python
 
 """Usage:
-    calculate_unique_transcript_sequence [{log_option_spec}] <gtf-file>
+    calculate_unique_transcript_sequence [{log_option_spec} --cache-dir=<cache-dir>] <gtf-file>
 
 {help_option_spec}                 {help_option_description}
 {ver_option_spec}              {ver_option_description}
 {log_option_spec}   {log_option_description}
+--cache-dir=<cache-dir>   If specified, store lengths in this annotation cache directory (keyed by the content of the GTF file) rather than printing them; lengths already cached are not recalculated.
 <gtf-file>                GTF file containing genes and transcripts.
 """
 
+import annotation_cache as ac
 import docopt
 import gtf
 import options as opt
+import os.path
 import schema
 
 from collections import defaultdict, namedtuple
 
 GTF_FILE = "<gtf-file>"
+CACHE_DIR = "--cache-dir"
 
 
 Exon = namedtuple('Exon', ['sequence', 'start', 'end', 'strand'])
@@ -32,26 +36,19 @@ def _validate_command_line_options(options):
         exit(exc.code)
 
 
-def _read_exon_info(gtf_file):
-    gtf_info = gtf.read_gtf_file(gtf_file)
-    exon_info = gtf_info[gtf_info[gtf.FEATURE_COL] == gtf.EXON_FEATURE]
+def _get_exon_transcript_pairs(gtf_file):
+    exon_transcript_pairs = []
 
-    exon_info[gtf.TRANSCRIPT_ID_ATTRIBUTE] = exon_info[gtf.ATTRIBUTES_COL].map(
-        lambda x: gtf.get_attributes_dict(x)[gtf.TRANSCRIPT_ID_ATTRIBUTE])
+    for records in gtf.read_gtf_records(
+            gtf_file, features=[gtf.EXON_FEATURE],
+            attributes=[gtf.TRANSCRIPT_ID_ATTRIBUTE]):
+        exon_transcript_pairs.extend(
+            [ExonAndTranscript(
+                Exon(r.sequence, r.start, r.end, r.strand),
+                r.attributes[gtf.TRANSCRIPT_ID_ATTRIBUTE])
+             for r in records])
 
-    return exon_info
-
-
-def _get_exon_transcript_pairs(exon_info):
-    column_dict = exon_info.to_dict(outtype="list")
-    exon_info_list = zip(
-        column_dict[gtf.SEQUENCE_COL], column_dict[gtf.START_COL],
-        column_dict[gtf.END_COL], column_dict[gtf.STRAND_COL],
-        column_dict[gtf.TRANSCRIPT_ID_ATTRIBUTE])
-
-    return [ExonAndTranscript(
-        Exon(str(ei[0]), int(ei[1]), int(ei[2]), str(ei[3])), ei[-1])
-        for ei in exon_info_list]
+    return exon_transcript_pairs
 
 
 def _get_unique_exon_transcript_pairs(exon_transcript_pairs):
@@ -79,58 +76,47 @@ def _get_unique_exon_per_chromosome_map(unique_exon_transcript_pairs):
     return seq_to_unique_exon_transcript_map
 
 
-def _get_exon_bases_map(unique_exon_transcript_pairs):
-    return {e_and_t.exon:
-            set(range(e_and_t.exon.start, e_and_t.exon.end + 1))
-            for e_and_t in unique_exon_transcript_pairs}
-
-
-def _get_exon_bases(index, exon_and_transcript_list, exon_bases_map):
-    exon = exon_and_transcript_list[index].exon
-    exon_bases = exon_bases_map[exon]
-    return exon, exon_bases
-
+def _get_exon_boundaries(exons):
+    # Each exon opens an interval at its first base and closes it just after
+    # its last base; boundaries are returned in positional order.
+    boundaries = [(exon.start, 1, i) for i, exon in enumerate(exons)] + \
+        [(exon.end + 1, -1, i) for i, exon in enumerate(exons)]
+    boundaries.sort()
+    return boundaries
 
-def _calculate_exon_difference(exon1, exon1_bases, exon2, exon2_bases):
-    if exon2.end < exon1.start or exon2.start > exon1.end:
-        # No overlap between exons
-        return exon1_bases
 
-    if exon2.start <= exon1.start and exon2.end >= exon2.end:
-        # Exon 2 completely covers exon 1
-        return set()
+def _get_uncovered_exon_lengths(exons):
+    # Sweep across the exon boundaries, keeping track of how many exons cover
+    # the current position. Where exactly one exon covers a stretch of
+    # sequence, the sum of the indices of the covering exons is the index of
+    # that exon, and the stretch is added to its count of uncovered bases.
+    lengths = [0] * len(exons)
 
-    return exon1_bases - exon2_bases
+    depth = 0
+    index_sum = 0
+    last_position = None
 
+    for position, change, index in _get_exon_boundaries(exons):
+        if depth == 1 and position > last_position:
+            lengths[index_sum] += position - last_position
+        depth += change
+        index_sum += change * index
+        last_position = position
 
-def _get_unique_transcript_lengths(
-        unique_exon_transcript_pairs,
-        seq_to_unique_exon_transcript_map, logger):
+    return lengths
 
-    exon_bases_map = _get_exon_bases_map(unique_exon_transcript_pairs)
 
+def _get_unique_transcript_lengths(seq_to_unique_exon_transcript_map, logger):
     transcript_lengths = defaultdict(int)
 
     for seq, e_and_t_list in seq_to_unique_exon_transcript_map.items():
         logger.info("...processing chromosome '{seq}'".format(seq=seq))
-        indices = range(len(e_and_t_list))
 
-        for i in indices:
-            e1, e1_bases = _get_exon_bases(i, e_and_t_list, exon_bases_map)
+        exon_lengths = _get_uncovered_exon_lengths(
+            [e_and_t.exon for e_and_t in e_and_t_list])
 
-            for j in indices:
-                if i == j:
-                    continue
-
-                e2, e2_bases = _get_exon_bases(j, e_and_t_list, exon_bases_map)
-
-                e1_bases = _calculate_exon_difference(
-                    e1, e1_bases, e2, e2_bases)
-                if len(e1_bases) == 0:
-                    break
-
-            transcript = e_and_t_list[i].transcript
-            transcript_lengths[transcript] += len(e1_bases)
+        for e_and_t, length in zip(e_and_t_list, exon_lengths):
+            transcript_lengths[e_and_t.transcript] += length
 
     return transcript_lengths
 
@@ -141,14 +127,27 @@ def _output_unique_transcript_lengths(transcript_lengths):
         print("{t},{l}".format(t=transcript, l=length))
 
 
+def _cache_unique_transcript_lengths(cache_file, transcript_lengths):
+    transcripts = list(transcript_lengths.keys())
+    ac.write_table(cache_file, [
+        ("transcript", transcripts),
+        ("unique-length", [transcript_lengths[t] for t in transcripts])])
+
+
 def _calculate_unique_transcript_sequence(logger, options):
-    # Read exon lines information from GTF file and extract transcript ID from
-    # GTF attributes.
+    cache_file = None
+    if options[CACHE_DIR]:
+        cache_file = ac.get_cached_table_file(
+            options[CACHE_DIR], options[GTF_FILE], ac.UNIQUE_SEQUENCE_TABLE)
+        if os.path.exists(cache_file):
+            logger.info("Unique sequence lengths already cached in " +
+                        "{f}.".format(f=cache_file))
+            return
+
+    # Read exon lines from the GTF file, extracting pairs of exons and
+    # transcript IDs from them.
     logger.info("Reading GTF file {f}".format(f=options[GTF_FILE]))
-    exon_info = _read_exon_info(options[GTF_FILE])
-
-    # Extract pairs of exons and transcripts IDs from GTF exon lines
-    exon_transcript_pairs = _get_exon_transcript_pairs(exon_info)
+    exon_transcript_pairs = _get_exon_transcript_pairs(options[GTF_FILE])
     logger.info("Read {c} exon + transcripts pairs.".
                 format(c=len(exon_transcript_pairs)))
 
@@ -169,14 +168,16 @@ def _calculate_unique_transcript_sequence(logger, options):
     # bases unique to that transcript.
     logger.info("Removing overlaps between exons...")
     transcript_lengths = _get_unique_transcript_lengths(
-        unique_exon_transcript_pairs,
         seq_to_unique_exon_transcript_map, logger)
 
-    # Write the unique number of bases per-transcript to the specified output
-    # file.
+    # Write the unique number of bases per-transcript to standard out, or
+    # store them in the annotation cache.
     logger.info("Writing unique lengths for {n} transcripts.".
                 format(n=len(transcript_lengths)))
-    _output_unique_transcript_lengths(transcript_lengths)
+    if cache_file:
+        _cache_unique_transcript_lengths(cache_file, transcript_lengths)
+    else:
+        _output_unique_transcript_lengths(transcript_lengths)
 
 
 if __name__ == "__main__":
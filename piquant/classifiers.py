@@ -1,12 +1,14 @@
+import numpy as np
 import tpms as t
 
 
 class _Classifier():
     def __init__(self, column_name, value_extractor,
                  grouped_stats=True, distribution_plot_range=None,
-                 plot_title=None):
+                 plot_title=None, vectorized=True):
         self.column_name = column_name
         self.value_extractor = value_extractor
+        self.vectorized = vectorized
         self.grouped_stats = grouped_stats
         self.distribution_plot_range = distribution_plot_range
         self.plot_title = plot_title if plot_title else column_name
@@ -20,9 +22,20 @@ class _Classifier():
     def get_value(self, row):
         return self.value_extractor(row)
 
+    def get_values(self, tpms):
+        # If the value extractor can operate on whole columns, evaluate it
+        # once for the entire data frame; otherwise fall back to applying it
+        # row by row.
+        if self.vectorized:
+            return self.value_extractor(tpms)
+        return tpms.apply(self.get_value, axis=1)
+
     def get_classification_value(self, row):
         return self.get_value(row)
 
+    def get_classification_values(self, tpms):
+        return self.get_values(tpms)
+
     def produces_grouped_stats(self):
         return self.grouped_stats
 
@@ -44,10 +57,10 @@ class _Classifier():
 
 class _LevelsClassifier(_Classifier):
     def __init__(self, column_name, value_extractor, levels,
-                 closed=False, plot_title=None):
+                 closed=False, plot_title=None, vectorized=True):
 
         _Classifier.__init__(self, column_name, value_extractor,
-                             plot_title=plot_title)
+                             plot_title=plot_title, vectorized=vectorized)
 
         self.levels = levels
         self.closed = closed
@@ -63,6 +76,12 @@ class _LevelsClassifier(_Classifier):
                 return i
         return len(self.levels)
 
+    def get_classification_values(self, tpms):
+        # Levels are in ascending order, so the index of the first level
+        # greater than or equal to each value is found by a binary search.
+        values = _Classifier.get_classification_values(self, tpms)
+        return np.searchsorted(self.levels, values, side='left')
+
     def get_value_labels(self, num_labels):
         return self.level_names[:num_labels]
 
@@ -87,7 +106,7 @@ _CLASSIFIERS.append(_LevelsClassifier(
 
 _CLASSIFIERS.append(_LevelsClassifier(
     "unique sequence percentage",
-    lambda x: 100 * float(x[t.UNIQUE_SEQ_LENGTH]) / x[t.LENGTH],
+    lambda x: 100.0 * x[t.UNIQUE_SEQ_LENGTH] / x[t.LENGTH],
     [20, 40, 60, 80, 100],
     closed=True))
 
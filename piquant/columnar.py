@@ -0,0 +1,162 @@
+"""
+Functions for reading and writing tables of per-transcript data, either as
+CSV files or in a columnar binary format. In the columnar format, a table is
+a directory holding each column in a separate NumPy array file, so that
+columns can be memory-mapped and read individually; columns of strings (e.g.
+transcript IDs) are stored as integer codes into a JSON table of unique
+strings, with missing values coded as -1.
+Exports:
+
+get_data_file: Return the path of a table file in a particular format.
+write_data: Write a DataFrame to a table file.
+read_data: Read some or all columns of a table file into a DataFrame.
+
+CSV_FORMAT: Name of the CSV table format.
+COLUMNAR_FORMAT: Name of the columnar binary table format.
+DATA_FORMATS: Names of all table formats.
+"""
+
+import collections
+import json
+import numpy as np
+import os
+import os.path
+import shutil
+import tempfile
+
+CSV_FORMAT = "csv"
+COLUMNAR_FORMAT = "columnar"
+DATA_FORMATS = [CSV_FORMAT, COLUMNAR_FORMAT]
+
+CSV_SUFFIX = ".csv"
+COLUMNAR_SUFFIX = ".cols"
+
+_SUFFIXES = {
+    CSV_FORMAT: CSV_SUFFIX,
+    COLUMNAR_FORMAT: COLUMNAR_SUFFIX
+}
+
+_COLUMNS_FILE = "columns.json"
+_VALUES_FILE = "{index}.npy"
+_STRINGS_FILE = "{index}.strings.json"
+
+
+def _pandas():
+    import pandas
+    return pandas
+
+
+def get_data_file(basename, data_format):
+    """
+    Return the path of a table file in a particular format.
+
+    basename: Path of the table file, without a suffix.
+    data_format: One of DATA_FORMATS.
+    """
+    return basename + _SUFFIXES[data_format]
+
+
+def _is_columnar(data_file):
+    return data_file.endswith(COLUMNAR_SUFFIX)
+
+
+def _write_column(table_dir, index, values):
+    column_info = {"values": _VALUES_FILE.format(index=index)}
+
+    if values.dtype == object:
+        # Missing values are given the code -1 by factorize(). The unique
+        # strings are stored as JSON, which, unlike a NumPy string array,
+        # holds unicode strings of any length.
+        codes, strings = _pandas().factorize(values)
+        column_info["strings"] = _STRINGS_FILE.format(index=index)
+        with open(os.path.join(table_dir, column_info["strings"]), "w") as f:
+            json.dump(list(strings), f)
+        values = codes.astype(np.int32)
+
+    np.save(os.path.join(table_dir, column_info["values"]), values)
+    return column_info
+
+
+def _write_columnar_data(table_dir, data_frame):
+    # Write the table to a temporary directory which then replaces any
+    # existing table, so that readers never see a partially written table.
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(table_dir)))
+    try:
+        columns = [[name] for name in data_frame.columns]
+        for index, column in enumerate(columns):
+            column.append(_write_column(
+                tmp_dir, index, data_frame[column[0]].values))
+
+        with open(os.path.join(tmp_dir, _COLUMNS_FILE), "w") as f:
+            json.dump(columns, f)
+
+        if os.path.exists(table_dir):
+            shutil.rmtree(table_dir)
+        os.rename(tmp_dir, table_dir)
+    except:
+        shutil.rmtree(tmp_dir)
+        raise
+
+
+def write_data(data_file, data_frame, columns=None):
+    """
+    Write a DataFrame to a table file.
+
+    The format of the table file is determined by its suffix (see
+    get_data_file()). The DataFrame's index is not written.
+    data_file: Path of the table file to write.
+    data_frame: The DataFrame to write.
+    columns: If not None, the names of the columns to write, in order.
+    """
+    if columns is not None:
+        data_frame = data_frame[columns]
+
+    if _is_columnar(data_file):
+        _write_columnar_data(data_file, data_frame)
+    else:
+        data_frame.to_csv(data_file, index=False)
+
+
+def _read_column(table_dir, column_info):
+    values = np.load(os.path.join(table_dir, column_info["values"]),
+                     mmap_mode="r")
+    if "strings" in column_info:
+        with open(os.path.join(table_dir, column_info["strings"])) as f:
+            strings = np.array(json.load(f), dtype=object)
+        codes = values
+        values = np.empty(len(codes), dtype=object)
+        values[:] = np.nan
+        present = codes >= 0
+        values[present] = strings[codes[present]]
+    return values
+
+
+def _read_columnar_data(table_dir, columns):
+    with open(os.path.join(table_dir, _COLUMNS_FILE)) as f:
+        column_infos = collections.OrderedDict(
+            [(str(name), info) for name, info in json.load(f)])
+
+    if columns is None:
+        columns = column_infos.keys()
+
+    return _pandas().DataFrame(collections.OrderedDict(
+        [(name, _read_column(table_dir, column_infos[name]))
+         for name in columns]))
+
+
+def read_data(data_file, columns=None):
+    """
+    Read some or all columns of a table file into a DataFrame.
+
+    The format of the table file is determined by its suffix (see
+    get_data_file()). For columnar table files, only the column arrays
+    requested are read, and numeric columns are memory-mapped.
+    data_file: Path of the table file to read.
+    columns: If not None, the names of the columns to read; otherwise all
+    columns are read.
+    """
+    if _is_columnar(data_file):
+        return _read_columnar_data(data_file, columns)
+
+    data_frame = _pandas().read_csv(data_file, usecols=columns)
+    return data_frame if columns is None else data_frame[columns]
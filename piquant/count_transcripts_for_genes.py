@@ -1,21 +1,25 @@
 #!/usr/bin/env python
 
 """Usage:
-    count_transcripts_for_genes [{log_option_spec}] <gtf-file>
+    count_transcripts_for_genes [{log_option_spec} --cache-dir=<cache-dir>] <gtf-file>
 
 {help_option_spec}                 {help_option_description}
 {ver_option_spec}              {ver_option_description}
 {log_option_spec}   {log_option_description}
+--cache-dir=<cache-dir>   If specified, store counts in this annotation cache directory (keyed by the content of the GTF file) rather than printing them; counts already cached are not recalculated.
 <gtf-file>                GTF file containing genes and transcripts.
 """
 
+import annotation_cache as ac
 import collections
 import docopt
 import gtf
 import options as opt
+import os.path
 import schema
 
 GTF_FILE = "<gtf-file>"
+CACHE_DIR = "--cache-dir"
 
 
 def _validate_command_line_options(options):
@@ -26,15 +30,18 @@ def _validate_command_line_options(options):
         exit(exc.code)
 
 
-def _get_transcript_to_gene_mappings(gtf_info):
+def _get_transcript_to_gene_mappings(gtf_file):
     transcript_to_gene_mappings = {}
 
-    for index, row in gtf_info.iterrows():
-        attributes_dict = gtf.get_attributes_dict(row[gtf.ATTRIBUTES_COL])
-        transcript = attributes_dict[gtf.TRANSCRIPT_ID_ATTRIBUTE]
-        if transcript not in transcript_to_gene_mappings:
-            transcript_to_gene_mappings[transcript] = \
-                attributes_dict[gtf.GENE_ID_ATTRIBUTE]
+    for records in gtf.read_gtf_records(
+            gtf_file, attributes=[gtf.TRANSCRIPT_ID_ATTRIBUTE,
+                                  gtf.GENE_ID_ATTRIBUTE]):
+        for record in records:
+            transcript = record.attributes[gtf.TRANSCRIPT_ID_ATTRIBUTE]
+            if transcript is not None and \
+                    transcript not in transcript_to_gene_mappings:
+                transcript_to_gene_mappings[transcript] = \
+                    record.attributes[gtf.GENE_ID_ATTRIBUTE]
 
     return transcript_to_gene_mappings
 
@@ -56,20 +63,46 @@ def _output_transcript_counts_for_genes(
             t=transcript, g=gene, c=transcript_counts[gene]))
 
 
-def _count_transcripts_for_genes(logger, options):
-    logger.info("Reading GTF file {f}...".format(f=options[GTF_FILE]))
-    gtf_info = gtf.read_gtf_file(options[GTF_FILE])
+def _cache_transcript_counts_for_genes(
+        cache_file, transcript_to_gene_mappings, transcript_counts):
+
+    transcripts = list(transcript_to_gene_mappings.keys())
+    genes = [transcript_to_gene_mappings[t] for t in transcripts]
+
+    ac.write_table(cache_file, [
+        ("transcript", transcripts),
+        ("gene", genes),
+        ("transcript_count", [transcript_counts[g] for g in genes])])
 
-    logger.info("Extracting transcript to gene mappings...")
-    transcript_to_gene_mappings = _get_transcript_to_gene_mappings(gtf_info)
+
+def _count_transcripts_for_genes(logger, options):
+    cache_file = None
+    if options[CACHE_DIR]:
+        cache_file = ac.get_cached_table_file(
+            options[CACHE_DIR], options[GTF_FILE], ac.TRANSCRIPT_COUNTS_TABLE)
+        if os.path.exists(cache_file):
+            logger.info("Transcript counts for genes already cached in " +
+                        "{f}.".format(f=cache_file))
+            return
+
+    logger.info("Extracting transcript to gene mappings from GTF file " +
+                "{f}...".format(f=options[GTF_FILE]))
+    transcript_to_gene_mappings = _get_transcript_to_gene_mappings(
+        options[GTF_FILE])
 
     logger.info("Calculating transcript counts for genes...")
     transcript_counts = _get_transcript_counts_for_genes(
         transcript_to_gene_mappings)
 
-    logger.info("Printing transcript counts for genes...")
-    _output_transcript_counts_for_genes(
-        transcript_to_gene_mappings, transcript_counts)
+    if cache_file:
+        logger.info("Caching transcript counts for genes in " +
+                    "{f}...".format(f=cache_file))
+        _cache_transcript_counts_for_genes(
+            cache_file, transcript_to_gene_mappings, transcript_counts)
+    else:
+        logger.info("Printing transcript counts for genes...")
+        _output_transcript_counts_for_genes(
+            transcript_to_gene_mappings, transcript_counts)
 
 
 if __name__ == "__main__":
@@ -83,5 +116,6 @@ if __name__ == "__main__":
     # Set up logger
     logger = opt.get_logger_for_options(options)
 
-    # Calculate and print per-gene transcript counts to standard out
+    # Calculate per-gene transcript counts and print them to standard out or
+    # store them in the annotation cache
     _count_transcripts_for_genes(logger, options)
@@ -0,0 +1,149 @@
+"""
+Functions for reading and writing FASTA and FASTQ files of simulated reads a
+fragment at a time, where a fragment is either a single read or, for
+interleaved paired-end reads, a pair of consecutive reads. Files may
+optionally be gzip compressed. Exports:
+
+is_fastq: Return True if a reads file name indicates FASTQ format.
+get_lines_per_fragment: Return the number of lines making up each fragment.
+open_reads_file: Open a reads file, possibly gzipped, with a large buffer.
+read_fragments: Yield the fragments in a reads file, with their offsets.
+read_fragments_at: Yield the fragments starting at given offsets.
+count_fragments: Return the number of fragments in a reads file.
+write_fragment: Write a fragment to an open reads file.
+
+Fragment: A fragment read from a reads file.
+"""
+
+import collections
+import gzip
+import itertools
+
+BUFFER_SIZE = 1 << 20
+
+FASTQ_SUFFIXES = (".fastq", ".fq")
+GZIP_SUFFIX = ".gz"
+
+_FASTA_LINES_PER_READ = 2
+_FASTQ_LINES_PER_READ = 4
+
+Fragment = collections.namedtuple("Fragment", ["offset", "lines"])
+
+
+def _is_gzipped(reads_file):
+    return reads_file.endswith(GZIP_SUFFIX)
+
+
+def is_fastq(reads_file):
+    """
+    Return True if a reads file name indicates FASTQ, rather than FASTA,
+    format.
+
+    reads_file: Path of the reads file, optionally with a '.gz' suffix.
+    """
+    if _is_gzipped(reads_file):
+        reads_file = reads_file[:-len(GZIP_SUFFIX)]
+    return reads_file.endswith(FASTQ_SUFFIXES)
+
+
+def get_lines_per_fragment(reads_file, paired_end=False):
+    """
+    Return the number of lines making up each fragment in a reads file.
+
+    reads_file: Path of the reads file.
+    paired_end: If True, the file contains interleaved paired-end reads.
+    """
+    lines_per_read = _FASTQ_LINES_PER_READ if is_fastq(reads_file) \
+        else _FASTA_LINES_PER_READ
+    return lines_per_read * (2 if paired_end else 1)
+
+
+def open_reads_file(reads_file, mode="r"):
+    """
+    Open a reads file for reading or writing.
+
+    Files with a '.gz' suffix are read or written with gzip compression;
+    other files are opened with a large buffer.
+    reads_file: Path of the reads file.
+    mode: 'r' to open the file for reading, 'w' for writing.
+    """
+    if _is_gzipped(reads_file):
+        return gzip.open(reads_file, mode + "b")
+    return open(reads_file, mode + "b", BUFFER_SIZE)
+
+
+def _read_fragment_lines(f, lines_per_fragment, offset):
+    lines = tuple(itertools.islice(f, lines_per_fragment))
+    if 0 < len(lines) < lines_per_fragment:
+        raise ValueError(
+            "Incomplete fragment at offset {o} of reads file.".format(
+                o=offset))
+    return lines
+
+
+def read_fragments(reads_file, paired_end=False):
+    """
+    Yield the fragments in a reads file.
+
+    Yield a Fragment for each read (or pair of reads) in the file, in order,
+    holding the byte offset of the fragment within the (uncompressed) file
+    and a tuple of the fragment's lines, including line endings.
+    reads_file: Path of the reads file.
+    paired_end: If True, the file contains interleaved paired-end reads.
+    """
+    lines_per_fragment = get_lines_per_fragment(reads_file, paired_end)
+
+    with open_reads_file(reads_file) as f:
+        offset = 0
+        while True:
+            lines = _read_fragment_lines(f, lines_per_fragment, offset)
+            if not lines:
+                return
+            yield Fragment(offset, lines)
+            offset += sum([len(line) for line in lines])
+
+
+def read_fragments_at(reads_file, offsets, paired_end=False):
+    """
+    Yield the fragments starting at given offsets in a reads file.
+
+    Seek directly to each offset in turn, so that the lines of fragments not
+    requested are never parsed.
+    reads_file: Path of the reads file.
+    offsets: An ascending sequence of fragment offsets, as recorded by
+    read_fragments().
+    paired_end: If True, the file contains interleaved paired-end reads.
+    """
+    lines_per_fragment = get_lines_per_fragment(reads_file, paired_end)
+
+    with open_reads_file(reads_file) as f:
+        for offset in offsets:
+            f.seek(int(offset))
+            lines = tuple([f.readline() for i in range(lines_per_fragment)])
+            yield Fragment(offset, lines)
+
+
+def count_fragments(reads_file, paired_end=False):
+    """
+    Return the number of fragments in a reads file.
+
+    Lines are counted a buffer at a time, without being parsed into
+    fragments.
+    reads_file: Path of the reads file.
+    paired_end: If True, the file contains interleaved paired-end reads.
+    """
+    num_lines = 0
+    with open_reads_file(reads_file) as f:
+        for block in iter(lambda: f.read(BUFFER_SIZE), ""):
+            num_lines += block.count("\n")
+    return num_lines // get_lines_per_fragment(reads_file, paired_end)
+
+
+def write_fragment(f, fragment):
+    """
+    Write a fragment to an open reads file.
+
+    f: A file object, as returned by open_reads_file().
+    fragment: The Fragment to write.
+    """
+    f.writelines(fragment.lines)
@@ -0,0 +1,29 @@
+"""
+Functions for constructing the paths of files written by piquant, without
+importing the modules (and hence pandas) which write them. Exports:
+
+get_stats_file: Return the path of a statistics file.
+
+OVERALL_STATS_PREFIX: Prefix of statistics files for all quantification runs.
+"""
+
+import os.path
+
+OVERALL_STATS_PREFIX = "overall"
+
+
+def get_stats_file(directory, prefix, classifier=None, ascending=False):
+    """
+    Return the path of a statistics file.
+
+    directory: The directory containing the statistics file.
+    prefix: Prefix of the file name, e.g. the name of a quantification run,
+    or OVERALL_STATS_PREFIX.
+    classifier: If not None, the classifier by which the statistics are
+    stratified.
+    ascending: For a distribution classifier, whether transcripts are counted
+    in ascending order of the classifier's values.
+    """
+    return os.path.join(directory, prefix) + \
+        (classifier.get_stats_file_suffix(ascending=ascending)
+            if classifier else "_stats") + ".csv"
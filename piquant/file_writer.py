@@ -5,9 +5,13 @@ import stat
 import textwrap
 
 
+TIME_STAGE_SCRIPT = os.path.join(
+    os.path.abspath(os.path.dirname(__file__)), "time_stage.py")
+
+
 @contextlib.contextmanager
-def writing_to_file(writer_cls, directory, filename):
-    writer = writer_cls()
+def writing_to_file(writer_cls, directory, filename, **writer_args):
+    writer = writer_cls(**writer_args)
     try:
         yield writer
     finally:
@@ -38,17 +42,23 @@ class FluxSimulatorParamsWriter(_Writer):
 class BashScriptWriter(_Writer):
     INDENT = '    '
 
-    def __init__(self):
+    def __init__(self, metrics_file=None):
         _Writer.__init__(self)
 
         self.indent_level = 0
         self.block_ends = []
+        self.metrics_file = metrics_file
+        self.num_timed_sections = 0
 
         with self.section():
             self.add_line("#!/bin/bash")
         with self.section():
             self.add_line("set -o nounset")
             self.add_line("set -o errexit")
+            if metrics_file:
+                # Timed sections are executed in a child shell, which must
+                # see the variables and functions defined by the script
+                self.add_line("set -o allexport")
 
     def indent(self):
         self.indent_level += 1
@@ -100,6 +110,35 @@ class BashScriptWriter(_Writer):
         return self._adding_bash_block(
             "", ")", ";;", option, predeindent=False)
 
+    @contextlib.contextmanager
+    def function_block(self, name):
+        return self._adding_bash_block("function ", " {", "}", name)
+
+    @contextlib.contextmanager
+    def timed_section(self, stage):
+        # If the writer has a metrics file, the commands added within a timed
+        # section are wrapped in a function, which is executed by the
+        # time_stage.py script so that the elapsed time, CPU time and peak
+        # memory used by the commands are appended to the metrics file.
+        # Otherwise, a timed section is just a section.
+        if not self.metrics_file:
+            with self.section():
+                yield
+            return
+
+        self.num_timed_sections += 1
+        function_name = "_timed_section_{n}".format(
+            n=self.num_timed_sections)
+
+        with self.section():
+            with self.function_block(function_name):
+                yield
+            self.add_line(
+                ("{script} --stage={stage} --metrics-file={metrics_file} " +
+                 "bash -o nounset -o errexit -c {function}").format(
+                    script=TIME_STAGE_SCRIPT, stage=stage,
+                    metrics_file=self.metrics_file, function=function_name))
+
     def add_comment(self, comment):
         lines = textwrap.wrap(
             comment, initial_indent="# ", subsequent_indent="# ",
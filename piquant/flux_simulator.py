@@ -3,7 +3,13 @@ Functions for writing and reading FluxSimulator parameter and output files.
 Exports:
 
 read_expression_profiles: Return data from a FluxSimulator .pro file.
+get_expression_profile_summary: Return summary data for a FluxSimulator .pro
+file.
 write_flux_simulator_params_files: Write FluxSimulator parameters files.
+write_flux_simulator_expression_params_file: Write FluxSimulator expression
+parameters file.
+write_flux_simulator_simulation_params_file: Write FluxSimulator simulation
+parameters file.
 
 PRO_FILE_TRANSCRIPT_ID_COL: Transcript ID column in FluxSimulator .pro file.
 PRO_FILE_LENGTH_COL: Transcript length column in FluxSimulator .pro file.
@@ -14,10 +20,17 @@ EXPRESSION_PROFILE_FILE: FluxSimulator expression profile file name.
 SIMULATION_PARAMS_FILE: FluxSimulator simulation parameters file name.
 SIMULATED_READS_PREFIX: FluxSimulator reads FASTA file prefix.
 READ_NUMBER_PLACEHOLDER: Placeholder text for number of reads to simulate.
+
+ExpressionProfileSummary: Summary data for a FluxSimulator .pro file.
 """
 
+import collections
 import file_writer as fw
-import pandas as pd
+import json
+import numpy as np
+import os
+import os.path
+import tempfile
 
 PRO_FILE_TRANSCRIPT_ID_COL = 1
 PRO_FILE_LENGTH_COL = 3
@@ -42,6 +55,19 @@ _PRO_FILE_COLS = [
     6, 7, 8, 9, 10, 11, 12
 ]
 
+_PRO_FILE_COL_DTYPES = {
+    PRO_FILE_TRANSCRIPT_ID_COL: object,
+    PRO_FILE_LENGTH_COL: np.int64,
+    PRO_FILE_FRAC_COL: np.float64,
+    PRO_FILE_NUM_COL: np.int64
+}
+
+PRO_FILE_SUMMARY_SUFFIX = ".summary"
+
+ExpressionProfileSummary = collections.namedtuple(
+    "ExpressionProfileSummary",
+    ["expressed_length", "num_expressed", "num_transcripts"])
+
 LEFT_READS = 'l'
 RIGHT_READS = 'r'
 
@@ -62,9 +88,20 @@ def _get_common_flux_simulator_params(
     }
 
 
-def _write_flux_simulator_expression_params(
+def write_flux_simulator_expression_params_file(
         transcript_gtf_file, genome_fasta_dir, num_molecules, output_dir):
+    """
+    Write a FluxSimulator parameters file for creating expression profiles.
 
+    transcript_gtf_file: Path to a GTF-formatted file describing the
+    transcripts to be simulated.
+    genome_fasta_dir: Path to a directory containing per-chromosome genome
+    sequences as FASTA files.
+    num_molecules: The number of molecules in the initial transcript
+    population.
+    output_dir: Path to the directory into which the parameters file should be
+    written.
+    """
     fs_params = _get_common_flux_simulator_params(
         transcript_gtf_file, genome_fasta_dir, num_molecules)
 
@@ -73,10 +110,15 @@ def _write_flux_simulator_expression_params(
         writer.add_vars(fs_params)
 
 
-def _write_flux_simulator_simulation_params(
+def write_flux_simulator_simulation_params_file(
         transcript_gtf_file, genome_fasta_dir, num_molecules,
         read_length, paired_end, errors, output_dir):
+    """
+    Write a FluxSimulator parameters file for simulating reads.
 
+    Reads are simulated according to a previously created expression profile.
+    Arguments are as for write_flux_simulator_params_files().
+    """
     fs_params = _get_common_flux_simulator_params(
         transcript_gtf_file, genome_fasta_dir, num_molecules)
 
@@ -99,16 +141,86 @@ def _write_flux_simulator_simulation_params(
         writer.add_vars(fs_params)
 
 
-def read_expression_profiles(pro_file):
+def read_expression_profiles(pro_file, columns=None):
     """
     Return a DataFrame containing data from a FluxSimulator .pro file.
 
     Return a DataFrame encapsulating the data from a FluxSimulator
     transcriptome profile (.pro) file.
     pro_file: Path to a FluxSimulator transcriptome profile file.
+    columns: If specified, a list of the .pro file columns to read (e.g.
+    PRO_FILE_LENGTH_COL); only these columns are parsed, with the C parser
+    and fixed types, which is considerably faster than reading all columns.
     """
-    return pd.read_csv(pro_file, delim_whitespace=True,
-                       header=None, names=_PRO_FILE_COLS)
+    import pandas as pd
+    if columns is None:
+        return pd.read_csv(pro_file, delim_whitespace=True,
+                           header=None, names=_PRO_FILE_COLS)
+
+    return pd.read_csv(
+        pro_file, delim_whitespace=True, header=None, engine="c",
+        usecols=columns,
+        dtype={col: _PRO_FILE_COL_DTYPES[col] for col in columns})
+
+
+def _get_pro_file_stamp(pro_file):
+    stat = os.stat(pro_file)
+    return [stat.st_mtime, stat.st_size]
+
+
+def _read_expression_profile_summary(summary_file, stamp):
+    try:
+        with open(summary_file) as f:
+            summary = json.load(f)
+    except (IOError, ValueError):
+        return None
+
+    if summary.get("stamp") != stamp:
+        return None
+    return ExpressionProfileSummary(
+        *[summary[field] for field in ExpressionProfileSummary._fields])
+
+
+def _write_expression_profile_summary(summary_file, stamp, summary):
+    # Write atomically via a uniquely named temporary file, so that a
+    # partially written summary is never read, even when several processes
+    # summarise the same .pro file at once
+    summary_dict = dict(zip(ExpressionProfileSummary._fields, summary))
+    summary_dict["stamp"] = stamp
+
+    fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(summary_file))
+    with os.fdopen(fd, "w") as f:
+        json.dump(summary_dict, f)
+    os.rename(tmp_file, summary_file)
+
+
+def get_expression_profile_summary(pro_file):
+    """
+    Return summary data for a FluxSimulator .pro file.
+
+    Return an ExpressionProfileSummary holding the total length of transcripts
+    with non-zero expression, the number of such transcripts, and the total
+    number of transcripts in the profile. The summary is cached in a file
+    alongside the .pro file, and is recalculated only if the .pro file has
+    since been modified.
+    pro_file: Path to a FluxSimulator transcriptome profile file.
+    """
+    summary_file = pro_file + PRO_FILE_SUMMARY_SUFFIX
+    stamp = _get_pro_file_stamp(pro_file)
+
+    summary = _read_expression_profile_summary(summary_file, stamp)
+    if summary is not None:
+        return summary
+
+    profiles = read_expression_profiles(
+        pro_file, columns=[PRO_FILE_LENGTH_COL, PRO_FILE_NUM_COL])
+    expressed = profiles[PRO_FILE_NUM_COL].values > 0
+    summary = ExpressionProfileSummary(
+        int(profiles[PRO_FILE_LENGTH_COL].values[expressed].sum()),
+        int(expressed.sum()), len(profiles))
+
+    _write_expression_profile_summary(summary_file, stamp, summary)
+    return summary
 
 
 def write_flux_simulator_params_files(
@@ -132,9 +244,9 @@ def write_flux_simulator_params_files(
     written.
     """
 
-    _write_flux_simulator_expression_params(
+    write_flux_simulator_expression_params_file(
         transcript_gtf_file, genome_fasta_dir, num_molecules, output_dir)
-    _write_flux_simulator_simulation_params(
+    write_flux_simulator_simulation_params_file(
         transcript_gtf_file, genome_fasta_dir, num_molecules,
         read_length, paired_end, errors, output_dir)
 
@@ -1,4 +1,11 @@
-import pandas as pd
+"""
+Functions for reading GTF files. Exports:
+
+read_gtf_records: Yield chunks of records parsed from a GTF file.
+"""
+
+import collections
+import itertools
 
 SEQUENCE_COL = 0
 FEATURE_COL = 2
@@ -12,12 +19,72 @@ EXON_FEATURE = "exon"
 GENE_ID_ATTRIBUTE = "gene_id"
 TRANSCRIPT_ID_ATTRIBUTE = "transcript_id"
 
+DEFAULT_CHUNK_SIZE = 100000
+
+GtfRecord = collections.namedtuple(
+    "GtfRecord", ["sequence", "feature", "start", "end", "strand",
+                  "attributes"])
+
+_COMMENT_PREFIX = "#"
+
+
+def _parse_attributes(attributes_str):
+    # Where an attribute occurs more than once, its first value is kept
+    attributes = {}
+    for attr_val in attributes_str.split(";"):
+        attr_val = attr_val.split(None, 1)
+        if attr_val:
+            attr = attr_val[0]
+            val = attr_val[1].strip().strip('"') if len(attr_val) > 1 else ""
+            attributes.setdefault(attr, val)
+    return attributes
+
+
+def _parse_gtf_line(line, features, attributes):
+    fields = line.rstrip("\n").split("\t")
+    feature = fields[FEATURE_COL]
+    if features is not None and feature not in features:
+        return None
+
+    all_attributes = _parse_attributes(fields[ATTRIBUTES_COL]) \
+        if attributes else {}
+
+    return GtfRecord(
+        fields[SEQUENCE_COL], feature, int(fields[START_COL]),
+        int(fields[END_COL]), fields[STRAND_COL],
+        {attr: all_attributes.get(attr) for attr in attributes})
+
+
+def _read_records(gtf_file, features, attributes):
+    with open(gtf_file) as f:
+        for line in f:
+            if line.startswith(_COMMENT_PREFIX) or not line.strip():
+                continue
+            record = _parse_gtf_line(line, features, attributes)
+            if record is not None:
+                yield record
 
-def read_gtf_file(gtf_file):
-    return pd.read_csv(gtf_file, sep='\t', header=None)
 
+def read_gtf_records(gtf_file, features=None, attributes=[],
+                     chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield chunks of records parsed from a GTF file.
 
-def get_attributes_dict(attributes_str):
-    strip_quotes = lambda x: x.replace('"', '')
-    return {attr: strip_quotes(val) for attr, val in
-            [av.split() for av in attributes_str.split("; ")]}
+    Read a GTF file line by line, yielding lists of at most 'chunk_size'
+    GtfRecord instances, so that the whole file is never held in memory. Each
+    line's attribute string is split into attributes once, from which the
+    requested attributes are taken; an attribute missing from a line is given
+    the value None.
+    gtf_file: Path to a GTF file.
+    features: If not None, a collection of feature types (e.g. "exon"); lines
+    describing other features are skipped.
+    attributes: Names of the attributes to extract from each line.
+    chunk_size: The maximum number of records in each yielded list.
+    """
+    features = set(features) if features is not None else None
+    records = _read_records(gtf_file, features, attributes)
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
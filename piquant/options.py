@@ -131,19 +131,21 @@ def validate_dict_option(dict_option, values_dict, msg):
         validate(dict_option)
 
 
-def validate_int_option(int_option, msg, nonneg=False, nullable=False):
+def validate_int_option(int_option, msg, nonneg=False, positive=False,
+                        nullable=False):
     """
     Check if a command line option is an integer.
 
     Check if a command line option string represents a valid integer and, if
     so, return the integer value. If 'nonneg' is True, the integer must be
-    greater than or equal to zero. The option can be allowed to equal 'None' if
-    'nullable' is set to True. If the option is not a valid integer, a
-    SchemaError is raised.
+    greater than or equal to zero; if 'positive' is True, it must be greater
+    than zero. The option can be allowed to equal 'None' if 'nullable' is set
+    to True. If the option is not a valid integer, a SchemaError is raised.
 
     int_option: The command line option, a string.
     msg: Text for the SchemaError exception raised if the test fails.
     nonneg: If set to True, the integer must be positive or zero.
+    positive: If set to True, the integer must be positive.
     nullable: If set to True, the command line option is allowed to be 'None'
     (i.e. the option has not been specified).
     """
@@ -151,6 +153,8 @@ def validate_int_option(int_option, msg, nonneg=False, nullable=False):
     validator = Use(int)
     if nonneg:
         validator = And(validator, lambda x: x >= 0)
+    if positive:
+        validator = And(validator, lambda x: x > 0)
     if nullable:
         validator = _nullable_validator(validator)
 
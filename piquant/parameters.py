@@ -1,8 +1,10 @@
 import itertools
+import multiprocessing
 import options as opt
 import quantifiers
 import schema
 import six
+import sys
 
 _PARAMETERS = []
 _RUN_PARAMETERS = []
@@ -51,6 +53,12 @@ NUM_MOLECULES = _Parameter(
         x, "Number of molecules must be a positive integer", nonneg=True),
     run_parameter=False)
 
+SEED = _Parameter(
+    "seed", "Random seed", "--seed",
+    lambda x: opt.validate_int_option(
+        x, "Random seed must be a non-negative integer", nonneg=True),
+    run_parameter=False)
+
 QUANT_METHOD = _Parameter(
     "quant_method", "Quantifier", "--quant-method",
     lambda x: quantifiers.get_quantification_methods()[x],
@@ -137,7 +145,50 @@ def get_value_names(param_values):
     return value_names
 
 
-def execute_for_param_sets(callables, logger, options, **params_values):
+def serial_only(to_call):
+    # Mark a callable as one which must be executed for each parameter set in
+    # the main process, in order (e.g. because it updates module state).
+    to_call.serial_only = True
+    return to_call
+
+
+# State shared with worker processes when callables are executed in parallel.
+# Worker processes are forked, and so inherit these values; only parameter
+# sets and results need to be passed between processes.
+_worker_state = {}
+
+
+def _execute_in_worker(param_map):
+    to_call, logger, options = _worker_state["call"]
+    try:
+        return False, to_call(logger, options, **param_map)
+    except SystemExit as exc:
+        return True, exc.code
+
+
+def _execute_in_parallel(to_call, logger, options, param_maps, num_jobs):
+    _worker_state["call"] = (to_call, logger, options)
+    pool = multiprocessing.Pool(num_jobs)
+    try:
+        outcomes = pool.map(_execute_in_worker, param_maps, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+        del _worker_state["call"]
+
+    for exited, value in outcomes:
+        if exited:
+            sys.exit(value)
+
+    return [value for exited, value in outcomes]
+
+
+def _execute_serially(to_call, logger, options, param_maps):
+    return [to_call(logger, options, **param_map) for param_map in param_maps]
+
+
+def execute_for_param_sets(callables, logger, options, num_jobs=1,
+                           **params_values):
     all_run_param_names = [p.name for p in _RUN_PARAMETERS]
 
     run_param_values = {}
@@ -149,8 +200,22 @@ def execute_for_param_sets(callables, logger, options, **params_values):
             non_run_param_values[param] = values
 
     run_param_names = run_param_values.keys()
+    param_maps = []
+    for param_set in itertools.product(*run_param_values.values()):
+        param_map = dict(zip(run_param_names, param_set))
+        param_map.update(non_run_param_values)
+        param_maps.append(param_map)
+
+    # Each callable is executed for every parameter set before the next
+    # callable is started. Results are passed back, in parameter set order, to
+    # callables which accumulate them.
     for to_call in callables:
-        for param_set in itertools.product(*run_param_values.values()):
-            param_map = dict(zip(run_param_names, param_set))
-            param_map.update(non_run_param_values)
-            to_call(logger, options, **param_map)
+        if num_jobs > 1 and not getattr(to_call, "serial_only", False):
+            results = _execute_in_parallel(
+                to_call, logger, options, param_maps, num_jobs)
+        else:
+            results = _execute_serially(to_call, logger, options, param_maps)
+
+        if hasattr(to_call, "add_result"):
+            for result in results:
+                to_call.add_result(result)
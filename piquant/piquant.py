@@ -1,22 +1,29 @@
 #!/usr/bin/env python
 
 """Usage:
-    piquant prepare_read_dirs [{log_option_spec} --out-dir=<out_dir> --num-molecules=<num-molecules> --nocleanup --params-file=<params-file> --read-length=<read-lengths> --read-depth=<read-depths> --paired-end=<paired-ends> --error=<errors> --bias=<biases> --transcript-gtf=<transcript-gtf-file> --genome-fasta=<genome-fasta-dir>]
-    piquant create_reads [{log_option_spec} --out-dir=<out_dir> --params-file=<params-file> --read-length=<read-lengths> --read-depth=<read-depths> --paired-end=<paired-ends> --error=<errors> --bias=<biases>]
-    piquant check_reads [{log_option_spec} --out-dir=<out_dir> --params-file=<params-file> --read-length=<read-lengths> --read-depth=<read-depths> --paired-end=<paired-ends> --error=<errors> --bias=<biases>]
-    piquant prepare_quant_dirs [{log_option_spec} --out-dir=<out-dir> --nocleanup --params-file=<params-file> --quant-method=<quant-methods> --read-length=<read-lengths> --read-depth=<read-depths> --paired-end=<paired-ends> --error=<errors> --bias=<biases> --transcript-gtf=<transcript-gtf-file> --genome-fasta=<genome-fasta-dir> --plot-format=<plot-format> --grouped-threshold=<threshold>]
-    piquant prequantify [{log_option_spec} --out-dir=<out-dir> --params-file=<params-file> --quant-method=<quant-methods> --read-length=<read-lengths> --read-depth=<read-depths> --paired-end=<paired-ends> --error=<errors> --bias=<biases>]
-    piquant quantify [{log_option_spec} --out-dir=<out-dir> --params-file=<params-file> --quant-method=<quant-methods> --read-length=<read-lengths> --read-depth=<read-depths> --paired-end=<paired-ends> --error=<errors> --bias=<biases>]
-    piquant check_quant [{log_option_spec} --out-dir=<out-dir> --params-file=<params-file> --quant-method=<quant-methods> --read-length=<read-lengths> --read-depth=<read-depths> --paired-end=<paired-ends> --error=<errors> --bias=<biases>]
-    piquant analyse_runs [{log_option_spec} --out-dir=<out-dir> --stats-dir=<stats-dir> --params-file=<params-file> --quant-method=<quant-methods> --read-length=<read-lengths> --read-depth=<read-depths> --paired-end=<paired-ends> --error=<errors> --bias=<biases> --plot-format=<plot-format>]
+    piquant prepare_read_dirs [{log_option_spec} --out-dir=<out_dir> --jobs=<jobs> --num-molecules=<num-molecules> --seed=<seed> --subsample-depths --nocleanup --params-file=<params-file> --read-length=<read-lengths> --read-depth=<read-depths> --paired-end=<paired-ends> --error=<errors> --bias=<biases> --transcript-gtf=<transcript-gtf-file> --genome-fasta=<genome-fasta-dir>]
+    piquant create_reads [{log_option_spec} --out-dir=<out_dir> --jobs=<jobs> --force --job-cpu-time=<job-cpu-time> --job-memory=<job-memory> --params-file=<params-file> --read-length=<read-lengths> --read-depth=<read-depths> --paired-end=<paired-ends> --error=<errors> --bias=<biases>]
+    piquant check_reads [{log_option_spec} --out-dir=<out_dir> --jobs=<jobs> --params-file=<params-file> --read-length=<read-lengths> --read-depth=<read-depths> --paired-end=<paired-ends> --error=<errors> --bias=<biases>]
+    piquant prepare_quant_dirs [{log_option_spec} --out-dir=<out-dir> --jobs=<jobs> --nocleanup --params-file=<params-file> --quant-method=<quant-methods> --read-length=<read-lengths> --read-depth=<read-depths> --paired-end=<paired-ends> --error=<errors> --bias=<biases> --transcript-gtf=<transcript-gtf-file> --genome-fasta=<genome-fasta-dir> --plot-format=<plot-format> --grouped-threshold=<threshold> --distribution-points=<num-points> --data-format=<data-format>]
+    piquant prequantify [{log_option_spec} --out-dir=<out-dir> --jobs=<jobs> --force --params-file=<params-file> --quant-method=<quant-methods> --read-length=<read-lengths> --read-depth=<read-depths> --paired-end=<paired-ends> --error=<errors> --bias=<biases>]
+    piquant quantify [{log_option_spec} --out-dir=<out-dir> --jobs=<jobs> --force --job-cpu-time=<job-cpu-time> --job-memory=<job-memory> --params-file=<params-file> --quant-method=<quant-methods> --read-length=<read-lengths> --read-depth=<read-depths> --paired-end=<paired-ends> --error=<errors> --bias=<biases>]
+    piquant check_quant [{log_option_spec} --out-dir=<out-dir> --jobs=<jobs> --params-file=<params-file> --quant-method=<quant-methods> --read-length=<read-lengths> --read-depth=<read-depths> --paired-end=<paired-ends> --error=<errors> --bias=<biases>]
+    piquant analyse_runs [{log_option_spec} --out-dir=<out-dir> --jobs=<jobs> --stats-dir=<stats-dir> --params-file=<params-file> --quant-method=<quant-methods> --read-length=<read-lengths> --read-depth=<read-depths> --paired-end=<paired-ends> --error=<errors> --bias=<biases> --plot-format=<plot-format> --skip-unchanged-plots]
 
 Options:
 {help_option_spec}                                {help_option_description}
 {ver_option_spec}                             {ver_option_description}
 {log_option_spec}                  {log_option_description}
 --out-dir=<out-dir>                      Parent output directory to which quantification run directories will be written [default: output].
+--jobs=<jobs>                            Maximum number of parameter sets to process in parallel, of simulation or quantification scripts to run concurrently, and of processes drawing graphs [default: 1].
+--force                                  If specified, simulation or quantification scripts will be run even for runs recorded as having already completed successfully.
+--job-cpu-time=<job-cpu-time>            Maximum CPU time in seconds for each process started by a simulation or quantification script.
+--job-memory=<job-memory>                Maximum address space size in megabytes for each process started by a simulation or quantification script.
 --stats-dir=<stats-dir>                  Directory to output assembled stats and graphs to [default: output/analysis].
+--skip-unchanged-plots                   If specified, graphs whose data has not changed since they were last drawn will not be drawn again.
 --num-molecules=<num-molecules>          Flux Simulator parameters will be set for simulation to start with this number of transcript molecules in the initial population [default: 30000000].
+--seed=<seed>                            Seed for the random numbers used to shuffle simulated reads and to simulate sequence bias, so that reads are created reproducibly for each parameter set [default: 0].
+--subsample-depths                       If specified, reads will only be simulated for the maximum read depth; reads for lower read depths will be subsampled from these.
 --nocleanup                              If not specified, files non-essential for subsequent quantification (when creating reads) and assessing quantification accuracy (when quantifying) will be deleted.
 -f --params-file=<params-file>           File containing specification of quantification methods, read-lengths, read-depths and end, error and bias parameter values to create reads for.
 -q --quant-method=<quant-methods>        Comma-separated list of quantification methods to run.
@@ -29,25 +36,36 @@ Options:
 --genome-fasta=<genome-fasta-dir>        Directory containing per-chromosome sequences as FASTA files.
 --plot-format=<plot-format>              Output format for graphs (one of {plot_formats}) [default: pdf].
 --grouped-threshold=<threshold>          Minimum number of data points required for a group of transcripts to be shown on a plot [default: 300].
+--distribution-points=<num-points>       Number of threshold values at which cumulative transcript distributions are calculated [default: {distribution_points}].
+--data-format=<data-format>              Format in which assembled per-transcript data for each quantification run will be stored (one of {data_formats}) [default: csv].
 """
 
+import columnar
 import docopt
+import file_system as fsys
 import flux_simulator as fs
 import options as opt
 import os
 import os.path
-import pandas as pd
 import parameters
 import piquant_options as po
-import plot
 import prepare_quantification_run as prq
 import prepare_read_simulation as prs
 import process
+import resource_usage as ru
+import run_ledger
 import schema
-import statistics
 import sys
 import time
 
+# Modules which import pandas or matplotlib (stats_store, plot), and the
+# statistics module, are imported only by the functions of those commands
+# which need them, so that other commands start quickly. For the same
+# reason, the lightweight modules imported by every command (e.g.
+# quantifiers, via parameters, and columnar, flux_simulator and tpms) import
+# pandas only in the functions which read or write data with it, and the
+# paths of statistics files are built by file_system.
+
 
 def _get_parameters_dir(options, **params):
     """
@@ -106,21 +124,148 @@ def _prepare_read_simulation(logger, options, **params):
     """
     reads_dir = _get_parameters_dir(options, **params)
     cleanup = not options[po.NO_CLEANUP]
-    prs.create_simulation_files(reads_dir, cleanup, **params)
 
+    source_reads_dir = None
+    source_read_depth = options[po.SUBSAMPLE_DEPTHS]
+    if source_read_depth and \
+            params[parameters.READ_DEPTH.name] < source_read_depth:
+        source_params = dict(params)
+        source_params[parameters.READ_DEPTH.name] = source_read_depth
+        source_reads_dir = _get_parameters_dir(options, **source_params)
 
-def _create_reads(logger, options, **params):
-    run_dir = _get_parameters_dir(options, **params)
-    process.run_in_directory(run_dir, './run_simulation.sh')
+    prs.create_simulation_files(
+        reads_dir, cleanup, source_reads_dir=source_reads_dir, **params)
+
+
+def _get_run_ledger(options):
+    return run_ledger.RunLedger(
+        run_ledger.get_ledger_file(options[po.OUTPUT_DIRECTORY]))
+
+_run_records = {}
+
+
+def _get_run_records(options):
+    # Read the run ledger once per process, rather than once per run
+    output_dir = options[po.OUTPUT_DIRECTORY]
+    if output_dir not in _run_records:
+        with _get_run_ledger(options) as ledger:
+            _run_records[output_dir] = ledger.get_runs()
+    return _run_records[output_dir]
+
+
+def _get_output_checksums(output_files):
+    # Output files (e.g. simulated reads) may be many gigabytes in size, so
+    # rather than hashing their content, record their size and modification
+    # time
+    checksums = {}
+    for f in output_files:
+        if os.path.exists(f):
+            stat = os.stat(f)
+            checksums[os.path.basename(f)] = [stat.st_size, stat.st_mtime]
+    return checksums
+
+
+def _outputs_unchanged(record, run_dir):
+    # The output files recorded for a run are compared with those now in its
+    # directory, so that runs whose outputs have since been deleted or
+    # regenerated are not judged to be complete
+    recorded_files = [os.path.join(run_dir, f)
+                      for f in record.output_checksums]
+    return _get_output_checksums(recorded_files) == record.output_checksums
+
+
+def _record_completed(record, run_dir):
+    return record.state == run_ledger.COMPLETED and \
+        _outputs_unchanged(record, run_dir)
+
+
+def _run_completed(options, run_dir, output_file):
+    """
+    Return True if the run in a reads or quantification directory completed.
+
+    Runs recorded in the run ledger as finished are judged by their recorded
+    state, and by whether their output files are unchanged since. For runs
+    not in the ledger (e.g. because their script was executed directly
+    rather than via piquant), and for runs recorded as started (e.g. because
+    the piquant process executing them was killed), the existence of an
+    output file is checked.
+
+    options: A dictionary mapping from piquant command line option names to
+    option values.
+    run_dir: The reads or quantification directory.
+    output_file: Path of a file created by the run when it completes.
+    """
+    record = _get_run_records(options).get(os.path.basename(run_dir))
+    if record is None or record.state == run_ledger.STARTED:
+        return os.path.exists(output_file)
+    return _record_completed(record, run_dir)
+
+
+def _get_reads_files(options, **params):
+    reads_dir = _get_parameters_dir(options, **params)
+    ends = [fs.LEFT_READS, fs.RIGHT_READS] \
+        if params[parameters.PAIRED_END.name] else [None]
+    return [os.path.join(reads_dir, fs.get_reads_file(
+            params[parameters.ERRORS.name], end)) for end in ends]
+
+
+_expression_profiles_created = set()
+
+
+@parameters.serial_only
+def _create_expression_profile(logger, options, **params):
+    """
+    Create the shared expression profile used to simulate a run's reads.
+
+    Expression profiles are shared between all reads directories with the
+    same transcripts, genome and number of molecules, and so each is created
+    only once, before any run_simulation.sh scripts are executed.
+
+    logger: Logs messages to standard error.
+    options: A dictionary mapping from piquant command line option names to
+    option values.
+    params: A dictionary mapping from parameters._Parameter instances to
+    parameter values, describing properties of the read simulation.
+    """
+    reads_dir = _get_parameters_dir(options, **params)
+    profile_dir = prs.get_expression_profile_dir(reads_dir)
+    if profile_dir is None:
+        return
+
+    run_name = os.path.basename(profile_dir)
+    if run_name in _expression_profiles_created:
+        return
+
+    with _get_run_ledger(options) as ledger:
+        record = ledger.get_run(run_name)
+        if record is not None and _record_completed(record, profile_dir) \
+                and not options[po.FORCE]:
+            return
+
+        logger.info("Creating expression profile in " + profile_dir)
+        ledger.record_started(run_name, time.time())
+        job_status = process.run_jobs(
+            [process.Job(profile_dir, "./" + prs.EXPRESSION_PROFILE_SCRIPT,
+                         None)],
+            cpu_time=options[po.JOB_CPU_TIME],
+            memory=options[po.JOB_MEMORY])[0]
+        ledger.record_finished(
+            run_name, time.time(), job_status.exit_status,
+            _get_output_checksums(
+                [os.path.join(profile_dir, fs.EXPRESSION_PROFILE_FILE)]))
+
+    _expression_profiles_created.add(run_name)
+    if job_status.exit_status != 0:
+        logger.error("Creation of expression profile in " + profile_dir +
+                     " failed with exit status " +
+                     str(job_status.exit_status) + ".")
 
 
 def _check_reads_created(logger, options, **params):
     reads_dir = _get_parameters_dir(options, **params)
-    reads_file = fs.get_reads_file(
-        params[parameters.ERRORS.name],
-        fs.LEFT_READS if params[parameters.PAIRED_END.name] else None)
+    reads_file = _get_reads_files(options, **params)[0]
 
-    if not os.path.exists(os.path.join(reads_dir, reads_file)):
+    if not _run_completed(options, reads_dir, reads_file):
         run_name = os.path.basename(reads_dir)
         logger.error("Run " + run_name + " did not complete.")
 
@@ -135,10 +280,6 @@ def _run_directory_checker(should_exist):
     return check_run_directory
 
 
-def _execute_quantification_script(run_dir, cl_opts):
-    process.run_in_directory(run_dir, './run_quantification.sh', cl_opts)
-
-
 def _prepare_quantification(logger, options, **params):
     """
     Write bash script to perform transcriptome quantification.
@@ -162,82 +303,315 @@ def _prepare_quantification(logger, options, **params):
 
     prq.write_run_quantification_script(reads_dir, run_dir, options, **params)
 
-quantifiers_used = []
+_PREQUANTIFY_RUN_PREFIX = "prequantify_"
 
 
+@parameters.serial_only
 def _prequantify(logger, options, **params):
     run_dir = _get_parameters_dir(options, **params)
 
     quant_method = params[parameters.QUANT_METHOD.name]
-    if quant_method not in quantifiers_used:
-        quantifiers_used.append(quant_method)
+    run_name = _PREQUANTIFY_RUN_PREFIX + str(quant_method)
+
+    with _get_run_ledger(options) as ledger:
+        record = ledger.get_run(run_name)
+        if record is not None and _record_completed(record, run_dir) \
+                and not options[po.FORCE]:
+            return
+
         logger.info("Executing prequantification for " + str(quant_method))
-        _execute_quantification_script(run_dir, ["-p"])
-        time.sleep(1)
+        ledger.record_started(run_name, time.time())
+        job_status = process.run_jobs(
+            [process.Job(run_dir, './run_quantification.sh', ["-p"])])[0]
+        ledger.record_finished(
+            run_name, time.time(), job_status.exit_status)
+
+    if job_status.exit_status != 0:
+        logger.error("Prequantification for " + str(quant_method) +
+                     " failed with exit status " +
+                     str(job_status.exit_status) + ".")
+
 
+class _ScriptRunner:
+    """
+    Run a script in the reads or quantification directory for each set of
+    parameters, with a bounded number of scripts running concurrently. The
+    state of each run is recorded in the run ledger, and runs recorded as
+    having already completed, whose output files are unchanged, are skipped. Runs which depend on the output of
+    a source run (as determined by 'source_run_getter') are executed only
+    after all other runs have finished, and are skipped if their source run
+    did not complete.
+    """
+    def __init__(self, script, output_files_getter, cl_opts=None,
+                 source_run_getter=None):
+        self.script = script
+        self.output_files_getter = output_files_getter
+        self.cl_opts = cl_opts
+        self.source_run_getter = source_run_getter \
+            if source_run_getter else lambda run_dir: None
+        self.jobs = []
+        self.output_files = {}
 
-def _quantify(logger, options, **params):
+    def __call__(self, logger, options, **params):
+        run_dir = _get_parameters_dir(options, **params)
+        return process.Job(run_dir, self.script, self.cl_opts), \
+            self.output_files_getter(options, **params)
+
+    def add_result(self, job_and_output_files):
+        job, output_files = job_and_output_files
+        self.jobs.append(job)
+        self.output_files[job.run_dir] = output_files
+
+    def _completed(self, ledger, job):
+        record = ledger.get_run(os.path.basename(job.run_dir))
+        return record is not None and _record_completed(record, job.run_dir)
+
+    def _source_run_completed(self, ledger, job):
+        # Runs not in the ledger, or recorded only as started, are judged by
+        # the existence of output files corresponding to those of the
+        # dependent run
+        source_dir = self.source_run_getter(job.run_dir)
+        record = ledger.get_run(os.path.basename(source_dir))
+        if record is not None and record.state != run_ledger.STARTED:
+            return _record_completed(record, source_dir)
+        return all([os.path.exists(
+                    os.path.join(source_dir, os.path.basename(f)))
+                    for f in self.output_files[job.run_dir]])
+
+    def run_jobs(self, logger, options):
+        def record_job_started(job, start_time):
+            ledger.record_started(os.path.basename(job.run_dir), start_time)
+
+        def record_job_status(job_status):
+            run_name = os.path.basename(job_status.run_dir)
+            message = "Run {r} finished with exit status {s} in {t:.1f}s.".\
+                format(r=run_name, s=job_status.exit_status,
+                       t=job_status.wall_time)
+            if job_status.exit_status == 0:
+                logger.info(message)
+            else:
+                logger.error(message)
+
+            ledger.record_finished(
+                run_name, time.time(), job_status.exit_status,
+                _get_output_checksums(self.output_files[job_status.run_dir]))
+
+        def execute_jobs(jobs):
+            process.run_jobs(
+                jobs, max_jobs=options[po.JOBS],
+                cpu_time=options[po.JOB_CPU_TIME],
+                memory=options[po.JOB_MEMORY],
+                start_callback=record_job_started,
+                status_callback=record_job_status)
+
+        with _get_run_ledger(options) as ledger:
+            jobs = self.jobs if options[po.FORCE] else \
+                [j for j in self.jobs if not self._completed(ledger, j)]
+            if len(jobs) < len(self.jobs):
+                logger.info("Skipping {n} run(s) already completed.".format(
+                    n=len(self.jobs) - len(jobs)))
+
+            dependent_jobs = [j for j in jobs
+                              if self.source_run_getter(j.run_dir)]
+            jobs = [j for j in jobs if j not in dependent_jobs]
+
+            logger.info("Executing {n} {s} script(s), {j} at a time.".format(
+                n=len(jobs) + len(dependent_jobs), s=self.script,
+                j=options[po.JOBS]))
+
+            execute_jobs(jobs)
+
+            runnable_jobs = [j for j in dependent_jobs
+                             if self._source_run_completed(ledger, j)]
+            for job in [j for j in dependent_jobs if j not in runnable_jobs]:
+                logger.error("Skipping run " + os.path.basename(job.run_dir) +
+                             " as its source run did not complete.")
+            execute_jobs(runnable_jobs)
+
+
+def _get_main_stats_file(options, **params):
     run_dir = _get_parameters_dir(options, **params)
+    return fsys.get_stats_file(run_dir, os.path.basename(run_dir))
+
 
-    logger.info("Executing shell script to run quantification analysis.")
-    _execute_quantification_script(run_dir, ["-qa"])
+def _get_quantification_output_files(options, **params):
+    return [_get_main_stats_file(options, **params)]
 
 
 def _check_quantification_completed(logger, options, **params):
     run_dir = _get_parameters_dir(options, **params)
 
-    main_stats_file = statistics.get_stats_file(
-        run_dir, os.path.basename(run_dir))
-    if not os.path.exists(main_stats_file):
+    main_stats_file = _get_main_stats_file(options, **params)
+    if not _run_completed(options, run_dir, main_stats_file):
         run_name = parameters.get_file_name(**params)
         logger.error("Run " + run_name + " did not complete")
 
 
 class _StatsAccumulator:
-    ACCUMULATORS = []
-
+    """
+    Gather the statistics of a particular stratified type for each
+    quantification run into a single overall statistics file. Per-run
+    statistics are ingested into a consolidated stats store in the stats
+    directory, so that only those files which are new or have changed since
+    the last analysis need be read.
+    """
     def __init__(self, stratified_stats_type):
-        self.overall_stats_df = pd.DataFrame()
+        self.run_stats_files = []
         self.stratified_stats_type = stratified_stats_type
-        _StatsAccumulator.ACCUMULATORS.append(self)
 
     def __call__(self, logger, options, **params):
         run_name = parameters.get_file_name(**params)
         run_dir = _get_parameters_dir(options, **params)
 
-        stats_file = statistics.get_stats_file(
+        stats_file = fsys.get_stats_file(
             run_dir, run_name, **self.stratified_stats_type)
-        stats_df = pd.read_csv(stats_file)
-        self.overall_stats_df = self.overall_stats_df.append(stats_df)
+        if not _run_completed(options, run_dir, stats_file):
+            logger.warning("Run " + run_name + " did not complete; " +
+                           "its statistics will not be analysed.")
+            return None
+
+        return run_name, stats_file
+
+    def add_result(self, run_stats_file):
+        if run_stats_file is not None:
+            self.run_stats_files.append(run_stats_file)
 
-    def _write_stats(self):
-        overall_stats_file = statistics.get_stats_file(
-            options[po.STATS_DIRECTORY], statistics.OVERALL_STATS_PREFIX,
+    def write_stats(self, logger, options):
+        import statistics
+        import stats_store as ss
+
+        overall_stats_file = fsys.get_stats_file(
+            options[po.STATS_DIRECTORY], fsys.OVERALL_STATS_PREFIX,
             **self.stratified_stats_type)
+
+        store = ss.StatsStore(
+            os.path.join(options[po.STATS_DIRECTORY], ss.STORE_DIRECTORY),
+            os.path.splitext(os.path.basename(overall_stats_file))[0])
+        num_read = store.update(self.run_stats_files)
+        logger.debug("Read {n} new or changed stats files for {f}.".format(
+            n=num_read, f=os.path.basename(overall_stats_file)))
+        if num_read > 0:
+            store.write()
+
+        overall_stats_df = store.get_stats(
+            [run_name for run_name, stats_file in self.run_stats_files])
         statistics.write_stats_data(
-            overall_stats_file, self.overall_stats_df, index=False)
+            overall_stats_file, overall_stats_df, index=False)
+
+
+class _ResourceUsageAccumulator:
+    """
+    Gather the resources used by each timed stage of each quantification
+    run's script, as recorded in the metrics file in its run directory, into
+    a single overall resource usage file in the stats directory, and
+    summarise them per quantification method and stage.
+    """
+    def __init__(self):
+        self.run_usage = []
+
+    def __call__(self, logger, options, **params):
+        run_dir = _get_parameters_dir(options, **params)
+        stage_usage = ru.read_stage_usage(
+            os.path.join(run_dir, ru.METRICS_FILE))
+        if len(stage_usage) == 0:
+            return None
+
+        run_params = {p.name: params[p.name]
+                      for p in parameters.get_run_parameters()
+                      if p.name in params}
+        run_params[parameters.QUANT_METHOD.name] = \
+            str(run_params[parameters.QUANT_METHOD.name])
+        return run_params, stage_usage
+
+    def add_result(self, run_usage):
+        if run_usage is not None:
+            self.run_usage.append(run_usage)
+
+    def _get_usage_summary(self, usage_df):
+        import pandas as pd
+
+        # Times and memory are summarised over the successful executions of
+        # each stage only
+        succeeded = usage_df[usage_df[ru.EXIT_STATUS] == 0]
+        grouped = succeeded.groupby(
+            [parameters.QUANT_METHOD.name, ru.STAGE])
+
+        summary = pd.DataFrame({
+            ru.RUNS: grouped.size(),
+            ru.FAILURES: (usage_df[ru.EXIT_STATUS] != 0).groupby(
+                [usage_df[parameters.QUANT_METHOD.name],
+                 usage_df[ru.STAGE]]).sum(),
+            ru.MEAN_WALL_TIME: grouped[ru.WALL_TIME].mean(),
+            ru.MAX_WALL_TIME: grouped[ru.WALL_TIME].max(),
+            ru.MEAN_CPU_TIME: grouped[ru.CPU_TIME].mean(),
+            ru.TOTAL_CPU_TIME: grouped[ru.CPU_TIME].sum(),
+            ru.MAX_PEAK_MEMORY: grouped[ru.PEAK_MEMORY].max()},
+            columns=ru.SUMMARY_COLUMNS)
+        summary[ru.RUNS] = summary[ru.RUNS].fillna(0).astype(int)
+        summary[ru.FAILURES] = \
+            summary[ru.FAILURES].fillna(0).astype(int)
+        return summary
+
+    def write_usage(self, logger, options):
+        import pandas as pd
+
+        param_names = sorted(
+            [p.name for p in parameters.get_run_parameters()])
+        rows = [dict(run_params, **stage_usage._asdict())
+                for run_params, stage_usage_list in self.run_usage
+                for stage_usage in stage_usage_list]
+
+        usage_df = pd.DataFrame(
+            rows, columns=param_names + list(ru.StageUsage._fields))
+        usage_df[ru.CPU_TIME] = \
+            usage_df[ru.USER_TIME] + usage_df[ru.SYSTEM_TIME]
+
+        logger.debug("Read resource usage for {n} runs.".format(
+            n=len(self.run_usage)))
+
+        usage_df.to_csv(
+            os.path.join(options[po.STATS_DIRECTORY], ru.METRICS_FILE),
+            index=False)
+        self._get_usage_summary(usage_df).to_csv(
+            os.path.join(options[po.STATS_DIRECTORY],
+                         ru.SUMMARY_FILE))
+
+        return usage_df
+
+
+def _get_analyse_runs_executables():
+    import statistics
+
+    return [_run_directory_checker(True)] + \
+        [_StatsAccumulator(t) for t in statistics.get_stratified_stats_types()] + \
+        [_ResourceUsageAccumulator()]
 
 
 def _get_executables_for_commands():
+    # Map each command to a function returning its executables, so that only
+    # the executables of the command being run are created
     execs = {}
-    execs[po.PREPARE_READ_DIRS] = \
+    execs[po.PREPARE_READ_DIRS] = lambda: \
         [_reads_directory_checker(False), _prepare_read_simulation]
-    execs[po.CREATE_READS] = \
-        [_reads_directory_checker(True), _create_reads]
-    execs[po.CHECK_READS] = \
+    execs[po.CREATE_READS] = lambda: \
+        [_reads_directory_checker(True),
+         _create_expression_profile,
+         _ScriptRunner('./run_simulation.sh', _get_reads_files,
+                       source_run_getter=prs.get_subsampling_source)]
+    execs[po.CHECK_READS] = lambda: \
         [_reads_directory_checker(True), _check_reads_created]
-    execs[po.PREPARE_QUANT_DIRS] = \
+    execs[po.PREPARE_QUANT_DIRS] = lambda: \
         [_run_directory_checker(False), _prepare_quantification]
-    execs[po.PREQUANTIFY] = \
+    execs[po.PREQUANTIFY] = lambda: \
         [_prequantify]
-    execs[po.QUANTIFY] = \
+    execs[po.QUANTIFY] = lambda: \
         [_reads_directory_checker(True),
-         _run_directory_checker(True), _quantify]
-    execs[po.CHECK_QUANTIFICATION] = \
+         _run_directory_checker(True),
+         _ScriptRunner('./run_quantification.sh',
+                       _get_quantification_output_files, cl_opts=["-qa"])]
+    execs[po.CHECK_QUANTIFICATION] = lambda: \
         [_run_directory_checker(True), _check_quantification_completed]
-    execs[po.ANALYSE_RUNS] = \
-        [_run_directory_checker(True)] + \
-        [_StatsAccumulator(t) for t in statistics.get_stratified_stats_types()]
+    execs[po.ANALYSE_RUNS] = _get_analyse_runs_executables
     return execs
 
 
@@ -246,16 +620,25 @@ def _get_piquant_command(options):
             if (val and opt in _get_executables_for_commands())][0]
 
 
-def _write_accumulated_stats(options):
+def _write_accumulated_stats(logger, options, executables):
     if not os.path.exists(options[po.STATS_DIRECTORY]):
         os.mkdir(options[po.STATS_DIRECTORY])
-    for stats_acc in _StatsAccumulator.ACCUMULATORS:
-        stats_acc._write_stats()
+    for executable in executables:
+        if isinstance(executable, _StatsAccumulator):
+            executable.write_stats(logger, options)
+
+
+def _write_resource_usage(logger, options, executables):
+    for executable in executables:
+        if isinstance(executable, _ResourceUsageAccumulator):
+            return executable.write_usage(logger, options)
 
 
 def _get_overall_stats(options):
-    overall_stats_file = statistics.get_stats_file(
-        options[po.STATS_DIRECTORY], statistics.OVERALL_STATS_PREFIX)
+    import pandas as pd
+
+    overall_stats_file = fsys.get_stats_file(
+        options[po.STATS_DIRECTORY], fsys.OVERALL_STATS_PREFIX)
     return pd.read_csv(overall_stats_file)
 
 
@@ -264,31 +647,64 @@ def _get_stats_param_values(overall_stats):
             for p in parameters.get_run_parameters()}
 
 
+def _log_graphs_drawn(num_drawn):
+    logger.debug("Drew {n} graph(s).".format(n=num_drawn))
+
+
 def _draw_overall_stats_graphs(options, overall_stats, stats_param_values):
+    import plot
+
     logger.info("Drawing graphs derived from statistics calculated for the " +
                 "whole set of TPMs...")
-    plot.draw_overall_stats_graphs(
+    num_drawn = plot.draw_overall_stats_graphs(
         options[po.PLOT_FORMAT], options[po.STATS_DIRECTORY],
-        overall_stats, stats_param_values)
+        overall_stats, stats_param_values, num_jobs=options[po.JOBS],
+        skip_unchanged=options[po.SKIP_UNCHANGED_PLOTS])
+    _log_graphs_drawn(num_drawn)
 
 
 def _draw_grouped_stats_graphs(options, stats_param_values):
+    import plot
+
     logger.info("Drawing graphs derived from statistics calculated on " +
                 "subsets of TPMs...")
-    plot.draw_grouped_stats_graphs(
+    num_drawn = plot.draw_grouped_stats_graphs(
         options[po.PLOT_FORMAT], options[po.STATS_DIRECTORY],
-        stats_param_values, options[po.GROUPED_THRESHOLD])
+        stats_param_values, options[po.GROUPED_THRESHOLD],
+        num_jobs=options[po.JOBS],
+        skip_unchanged=options[po.SKIP_UNCHANGED_PLOTS])
+    _log_graphs_drawn(num_drawn)
 
 
 def _draw_distribution_graphs(options, stats_param_values):
+    import plot
+
     logger.info("Drawing distribution plots...")
-    plot.draw_distribution_graphs(
+    num_drawn = plot.draw_distribution_graphs(
         options[po.PLOT_FORMAT], options[po.STATS_DIRECTORY],
-        stats_param_values)
+        stats_param_values, num_jobs=options[po.JOBS],
+        skip_unchanged=options[po.SKIP_UNCHANGED_PLOTS])
+    _log_graphs_drawn(num_drawn)
+
 
+def _draw_resource_usage_graphs(options, usage_df):
+    import plot
 
-def _analyse_runs():
-    _write_accumulated_stats(options)
+    if len(usage_df) == 0:
+        logger.info("No resource usage was recorded for these runs.")
+        return
+
+    logger.info("Drawing resource usage graphs...")
+    num_drawn = plot.draw_resource_usage_graphs(
+        options[po.PLOT_FORMAT], options[po.STATS_DIRECTORY], usage_df,
+        num_jobs=options[po.JOBS],
+        skip_unchanged=options[po.SKIP_UNCHANGED_PLOTS])
+    _log_graphs_drawn(num_drawn)
+
+
+def _analyse_runs(executables):
+    _write_accumulated_stats(logger, options, executables)
+    usage_df = _write_resource_usage(logger, options, executables)
 
     overall_stats = _get_overall_stats(options)
     stats_param_values = _get_stats_param_values(overall_stats)
@@ -296,23 +712,31 @@ def _analyse_runs():
     _draw_overall_stats_graphs(options, overall_stats, stats_param_values)
     _draw_grouped_stats_graphs(options, stats_param_values)
     _draw_distribution_graphs(options, stats_param_values)
+    _draw_resource_usage_graphs(options, usage_df)
 
 
 def _run_piquant_command(logger, options):
     piquant_command = _get_piquant_command(options)
 
+    executables = _get_executables_for_commands()[piquant_command]()
     parameters.execute_for_param_sets(
-        _get_executables_for_commands()[piquant_command],
-        logger, options, **param_values)
+        executables, logger, options, num_jobs=options[po.JOBS],
+        **param_values)
+
+    for executable in executables:
+        if isinstance(executable, _ScriptRunner):
+            executable.run_jobs(logger, options)
 
     if piquant_command == po.ANALYSE_RUNS:
-        _analyse_runs()
+        _analyse_runs(executables)
 
 
 if __name__ == "__main__":
     # Read in command-line options
     __doc__ = opt.substitute_common_options_into_usage(
-        __doc__, plot_formats=plot.PLOT_FORMATS)
+        __doc__, plot_formats=po.PLOT_FORMATS,
+        data_formats=columnar.DATA_FORMATS,
+        distribution_points=po.DEFAULT_DISTRIBUTION_POINTS)
     options = docopt.docopt(__doc__, version="piquant v0.1")
 
     # Validate and process command-line options
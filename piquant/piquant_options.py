@@ -1,7 +1,8 @@
+import columnar
 import options as opt
 import os.path
 import parameters
-import plot
+import tpms
 
 OUTPUT_DIRECTORY = "--out-dir"
 STATS_DIRECTORY = "--stats-dir"
@@ -9,6 +10,18 @@ NO_CLEANUP = "--nocleanup"
 PARAMS_FILE = "--params-file"
 PLOT_FORMAT = "--plot-format"
 GROUPED_THRESHOLD = "--grouped-threshold"
+DISTRIBUTION_POINTS = "--distribution-points"
+DATA_FORMAT = "--data-format"
+JOBS = "--jobs"
+FORCE = "--force"
+JOB_CPU_TIME = "--job-cpu-time"
+JOB_MEMORY = "--job-memory"
+SUBSAMPLE_DEPTHS = "--subsample-depths"
+SKIP_UNCHANGED_PLOTS = "--skip-unchanged-plots"
+
+PLOT_FORMATS = ["pdf", "svg", "png"]
+
+DEFAULT_DISTRIBUTION_POINTS = tpms.CUMULATIVE_DISTRIBUTION_POINTS
 
 # commands
 PREPARE_READ_DIRS = "prepare_read_dirs"
@@ -43,15 +56,38 @@ def validate_command_line_options(options):
                           parameters.GENOME_FASTA_DIR]
 
     if not options[PREPARE_READ_DIRS]:
-        ignore_params.append(parameters.NUM_MOLECULES)
+        ignore_params += [parameters.NUM_MOLECULES, parameters.SEED]
 
     param_values = parameters.validate_command_line_parameter_sets(
         options[PARAMS_FILE], options, ignore_params=ignore_params)
 
+    # When subsampling reads for lower read depths, record the maximum read
+    # depth, for which reads will be simulated
+    if options[PREPARE_READ_DIRS] and options[SUBSAMPLE_DEPTHS]:
+        options[SUBSAMPLE_DEPTHS] = \
+            max(param_values[parameters.READ_DEPTH.name])
+
+    opt.validate_list_option(
+        options[PLOT_FORMAT], PLOT_FORMATS, "Invalid plot format")
     opt.validate_list_option(
-        options[PLOT_FORMAT], plot.PLOT_FORMATS, "Invalid plot format")
+        options[DATA_FORMAT], columnar.DATA_FORMATS, "Invalid data format")
     options[GROUPED_THRESHOLD] = opt.validate_int_option(
         options[GROUPED_THRESHOLD],
         "Invalid minimum value for number of data points for boxplots")
+    options[DISTRIBUTION_POINTS] = opt.validate_int_option(
+        options[DISTRIBUTION_POINTS],
+        "Number of distribution points must be a positive integer",
+        positive=True)
+    options[JOBS] = opt.validate_int_option(
+        options[JOBS], "Number of jobs must be a positive integer",
+        positive=True)
+    options[JOB_CPU_TIME] = opt.validate_int_option(
+        options[JOB_CPU_TIME],
+        "Job CPU time limit must be a positive integer",
+        nonneg=True, nullable=True)
+    options[JOB_MEMORY] = opt.validate_int_option(
+        options[JOB_MEMORY],
+        "Job memory limit must be a positive integer",
+        nonneg=True, nullable=True)
 
     return options, param_values
@@ -1,17 +1,45 @@
+import collections
 import contextlib
+import file_system as fsys
 import classifiers
+import hashlib
 import itertools
-import matplotlib.pyplot as plt
+import json
+import matplotlib
+import multiprocessing
 import numpy as np
+import os
 import os.path
 import pandas as pd
 import parameters
-import seaborn as sb
+import resource_usage as ru
+import six
 import statistics
 import sys
+import tempfile
 import tpms as t
 
-PLOT_FORMATS = ["pdf", "svg", "png"]
+# Plots are only ever written to files, so are drawn with the non-interactive
+# Agg backend; this needs no display, and is safe to use in forked worker
+# processes
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import seaborn as sb
+
+# File in the statistics directory recording a digest of the data from which
+# each plot drawn over multiple quantification runs was last rendered
+PLOT_INPUTS_FILE = "plot_inputs.json"
+
+# Lines with more data points than this are drawn without point markers
+MAX_MARKED_POINTS = 50
+
+# Measures of resource usage graphed for each stage of quantification runs
+RESOURCE_USAGE_MEASURES = [
+    (ru.WALL_TIME, "Elapsed time (s)"),
+    (ru.CPU_TIME, "CPU time (s)"),
+    (ru.PEAK_MEMORY, "Peak memory (MB)")
+]
 
 # Don't embed characters as paths when outputting SVG - assume fonts are
 # installed on machine where SVG will be viewed (see
@@ -26,14 +54,31 @@ plt.rcParams['svg.fonttype'] = 'none'
 #plt.rcParams['legend.fontsize'] = 'small'
 
 
+# A plot to be drawn over multiple quantification runs: 'draw' draws the plot
+# into the current figure from the data in 'stats', which holds only the
+# columns the plot depends on; the plot is then saved as 'file_name' (without
+# suffix) in format 'fformat'.
+_PlotJob = collections.namedtuple(
+    "_PlotJob", ["file_name", "fformat", "stats", "draw"])
+
+# Plot jobs shared with worker processes when plots are rendered in parallel.
+# Worker processes are forked, and so inherit the jobs; only the indices of
+# jobs need to be passed between processes.
+_worker_state = {}
+
+
+def _get_plot_file_name(*file_name_elements):
+    file_name = "_".join([str(el) for el in file_name_elements])
+    return file_name.replace(' ', '_')
+
+
 @contextlib.contextmanager
 def _saving_new_plot(fformat, *file_name_elements):
     plt.figure()
     try:
         yield
     finally:
-        file_name = "_".join([str(el) for el in file_name_elements])
-        file_name = file_name.replace(' ', '_')
+        file_name = _get_plot_file_name(*file_name_elements)
         plt.savefig(file_name + "." + fformat, format=fformat)
         plt.close()
 
@@ -51,6 +96,12 @@ def _get_distribution_plot_ylabel(ascending):
         ("less" if ascending else "greater") + " than threshold"
 
 
+def _get_line_style(num_points):
+    # Mark individual data points only when there are few enough of them to
+    # be distinguished
+    return '-o' if num_points <= MAX_MARKED_POINTS else '-'
+
+
 def _set_distribution_plot_bounds(xmin, xmax, ymin=None, ymax=None):
     xmargin = (xmax - xmin) / 40.0
     plt.xlim(xmin=xmin-xmargin, xmax=xmax+xmargin)
@@ -138,7 +189,7 @@ def _plot_statistic_grouped_by_parameter(
         group_stats.sort(columns=xcol, axis=0, inplace=True)
         xvals = group_stats[xcol]
         yvals = group_stats[ycol]
-        plt.plot(xvals, yvals, '-o',
+        plt.plot(xvals, yvals, _get_line_style(len(xvals)),
                  label=group_param.get_value_name(group_param_value))
 
         group_ymin = yvals.min()
@@ -167,7 +218,7 @@ def _plot_statistic_grouped_by_parameter(
     return (ymin, ymax)
 
 
-def _plot_statistic_vs_varying_param_grouped_by_param(
+def _get_statistic_vs_varying_param_plot_job(
         fformat, stats, base_name, statistic,
         group_param, varying_param, fixed_param_values):
 
@@ -176,8 +227,9 @@ def _plot_statistic_vs_varying_param_grouped_by_param(
     name_elements = _get_grouped_by_param_stats_plot_file_name_elements(
         base_name, statistic.name,
         group_param, fixed_param_info, versus=varying_param.name)
+    stats = stats[[group_param.name, varying_param.name, statistic.name]]
 
-    with _saving_new_plot(fformat, *name_elements):
+    def draw():
         title = _get_grouped_by_param_stats_plot_title(
             statistic.title, group_param, fixed_param_info,
             versus=varying_param.title)
@@ -186,8 +238,11 @@ def _plot_statistic_vs_varying_param_grouped_by_param(
             varying_param.title, statistic.title,
             _get_statistic_plot_bounds_setter(statistic), title)
 
+    return _PlotJob(
+        _get_plot_file_name(*name_elements), fformat, stats, draw)
+
 
-def _plot_statistic_vs_transcript_classifier_grouped_by_param(
+def _get_statistic_vs_transcript_classifier_plot_job(
         fformat, stats, base_name, statistic, group_param,
         classifier, fixed_param_values):
 
@@ -197,8 +252,9 @@ def _plot_statistic_vs_transcript_classifier_grouped_by_param(
     name_elements = _get_grouped_by_param_stats_plot_file_name_elements(
         base_name, statistic.name, group_param, fixed_param_info,
         versus=clsfr_col)
+    stats = stats[[group_param.name, clsfr_col, statistic.name]]
 
-    with _saving_new_plot(fformat, *name_elements):
+    def draw():
         xlabel = _capitalized(classifier.get_plot_title())
         title = _get_grouped_by_param_stats_plot_title(
             statistic.title, group_param, fixed_param_info, versus=xlabel)
@@ -213,8 +269,11 @@ def _plot_statistic_vs_transcript_classifier_grouped_by_param(
         _set_ticks_for_transcript_classifier_plot(
             np.arange(min_xval, max_xval + 1), classifier)
 
+    return _PlotJob(
+        _get_plot_file_name(*name_elements), fformat, stats, draw)
 
-def _plot_cumulative_transcript_distribution_grouped_by_param(
+
+def _get_cumulative_transcript_distribution_plot_job(
         fformat, stats, base_name, group_param,
         classifier, ascending, fixed_param_values):
 
@@ -224,8 +283,9 @@ def _plot_cumulative_transcript_distribution_grouped_by_param(
     name_elements = _get_grouped_by_param_stats_plot_file_name_elements(
         base_name, clsfr_col, group_param, fixed_param_info,
         ascending=ascending)
+    stats = stats[[group_param.name, clsfr_col, t.TRUE_POSITIVE_PERCENTAGE]]
 
-    with _saving_new_plot(fformat, *name_elements):
+    def draw():
         title = _get_grouped_by_param_stats_plot_title(
             _capitalized(clsfr_col) + " threshold", group_param,
             fixed_param_info)
@@ -235,6 +295,9 @@ def _plot_cumulative_transcript_distribution_grouped_by_param(
             _get_distribution_plot_ylabel(ascending),
             _set_distribution_plot_bounds, title)
 
+    return _PlotJob(
+        _get_plot_file_name(*name_elements), fformat, stats, draw)
+
 
 def log_tpm_scatter_plot(fformat, tpms, base_name, tpm_label):
     with _saving_new_plot(fformat, base_name, tpm_label, "log10 scatter"):
@@ -298,7 +361,8 @@ def plot_statistic_vs_transcript_classifier(
 
 
 def plot_cumulative_transcript_distribution(
-        fformat, tpms, base_name, tpm_label, classifier, ascending):
+        fformat, tpms, base_name, tpm_label, classifier, ascending,
+        num_points=t.CUMULATIVE_DISTRIBUTION_POINTS):
 
     clsfr_col = classifier.get_column_name()
 
@@ -306,8 +370,9 @@ def plot_cumulative_transcript_distribution(
             fformat, base_name, clsfr_col, tpm_label,
             ("asc" if ascending else "desc"), "distribution"):
 
-        xvals, yvals = t.get_distribution(tpms, classifier, ascending)
-        plt.plot(xvals, yvals, '-o')
+        xvals, yvals = t.get_distribution(
+            tpms, classifier, ascending, num_points)
+        plt.plot(xvals, yvals, _get_line_style(num_points))
 
         _set_distribution_plot_bounds(xvals[0], xvals[-1])
 
@@ -316,6 +381,43 @@ def plot_cumulative_transcript_distribution(
         plt.suptitle(_capitalized(clsfr_col) + " threshold: " + tpm_label)
 
 
+def _get_resource_usage_per_quantifier_plot_job(
+        fformat, usage_df, base_name, measure, label):
+
+    stats = usage_df[[parameters.QUANT_METHOD.name, ru.STAGE, measure]]
+
+    def draw():
+        # Draw, for each stage, a bar per quantification method showing the
+        # mean usage over the successful executions of that stage
+        stages = stats[ru.STAGE].unique()
+        quant_methods = sorted(
+            stats[parameters.QUANT_METHOD.name].unique())
+        mean_usage = stats.groupby(
+            [parameters.QUANT_METHOD.name, ru.STAGE])[measure].mean()
+
+        locations = np.arange(len(stages))
+        width = 0.8 / len(quant_methods)
+        colors = sb.color_palette(n_colors=len(quant_methods))
+
+        for i, quant_method in enumerate(quant_methods):
+            plt.bar(locations + i * width,
+                    [mean_usage.get((quant_method, stage), 0)
+                     for stage in stages],
+                    width, align="edge", color=colors[i],
+                    label=quant_method)
+
+        plt.xticks(locations + 0.4, stages, rotation=30, ha="right")
+        plt.xlim(-0.1, len(stages))
+        plt.ylabel(label)
+        plt.legend(title=parameters.QUANT_METHOD.title, loc=0)
+        plt.suptitle(label + " per quantifier and stage")
+        plt.tight_layout(rect=[0, 0, 1, 0.95])
+
+    return _PlotJob(
+        _get_plot_file_name(base_name, measure, "per", "quantifier"),
+        fformat, stats, draw)
+
+
 # Utility functions for manipulating sets of parameters
 
 
@@ -360,17 +462,103 @@ def _get_plot_subdirectory(parent_dir, sub_dir_name):
     return sub_dir
 
 
-def draw_overall_stats_graphs(fformat, stats_dir, overall_stats, param_values):
+def _get_plot_digest(job):
+    data = six.StringIO()
+    job.stats.to_csv(data, index=False)
+    return hashlib.sha1(data.getvalue()).hexdigest()
+
+
+def _read_plot_digests(stats_dir):
+    try:
+        with open(os.path.join(stats_dir, PLOT_INPUTS_FILE)) as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return {}
+
+
+def _write_plot_digests(stats_dir, digests):
+    # Write to a temporary file which then replaces any existing file, so
+    # that an interrupted write never leaves a partial file
+    fd, tmp_file = tempfile.mkstemp(dir=stats_dir)
+    with os.fdopen(fd, "w") as f:
+        json.dump(digests, f, indent=0, sort_keys=True)
+    os.rename(tmp_file, os.path.join(stats_dir, PLOT_INPUTS_FILE))
+
+
+def _render_plot_job(job):
+    with _saving_new_plot(job.fformat, job.file_name):
+        job.draw()
+
+
+def _render_plot_job_in_worker(index):
+    _render_plot_job(_worker_state["jobs"][index])
+
+
+def _render_plot_jobs(jobs, num_jobs):
+    if num_jobs <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            _render_plot_job(job)
+        return
+
+    _worker_state["jobs"] = jobs
+    pool = multiprocessing.Pool(min(num_jobs, len(jobs)))
+    try:
+        pool.map(_render_plot_job_in_worker, range(len(jobs)))
+    finally:
+        pool.close()
+        pool.join()
+        del _worker_state["jobs"]
+
+
+def _render_plots(stats_dir, jobs, num_jobs, skip_unchanged):
+    # Render plots with up to 'num_jobs' worker processes. A digest of the
+    # data from which each plot is rendered is recorded in the statistics
+    # directory; if 'skip_unchanged' is True, plots whose file exists, and
+    # whose data is the same as when it was last rendered, are not rendered
+    # again.
+    digests = _read_plot_digests(stats_dir)
+
+    to_render = []
+    for job in jobs:
+        plot_file = job.file_name + "." + job.fformat
+        key = os.path.relpath(plot_file, stats_dir)
+        digest = _get_plot_digest(job)
+        if skip_unchanged and digests.get(key) == digest and \
+                os.path.exists(plot_file):
+            continue
+        to_render.append((job, key, digest))
+
+    _render_plot_jobs([job for job, key, digest in to_render], num_jobs)
+
+    for job, key, digest in to_render:
+        digests[key] = digest
+    _write_plot_digests(stats_dir, digests)
+
+    return len(to_render)
+
+
+def draw_overall_stats_graphs(fformat, stats_dir, overall_stats, param_values,
+                              num_jobs=1, skip_unchanged=False):
     # Draw graphs derived from statistics calculated for the whole set of TPMs.
     # e.g. the Spearman correlation of calculated and real TPMs graphed as
     # read-depth varies, for each quantification method, in the case of
-    # paired-end reads with errors and bias.
+    # paired-end reads with errors and bias. Graphs are drawn by up to
+    # 'num_jobs' processes, and if 'skip_unchanged' is True, graphs whose data
+    # has not changed since they were last drawn are not drawn again; the
+    # number of graphs drawn is returned.
+    jobs = []
     overall_stats_dir = _get_plot_subdirectory(
         stats_dir, "overall_stats_graphs")
 
     numerical_params = \
         [p for p in parameters.get_run_parameters() if p.is_numeric]
 
+    # Resource statistics are only graphed if resource usage was recorded
+    # for the quantification runs
+    overall_graphable_stats = [
+        s for s in statistics.get_graphable_statistics(include_resource=True)
+        if s.name in overall_stats and overall_stats[s.name].notnull().any()]
+
     for param in _get_non_degenerate_params(
             parameters.get_run_parameters(), param_values):
 
@@ -394,24 +582,29 @@ def draw_overall_stats_graphs(fformat, stats_dir, overall_stats, param_values):
                 stats_df, fixed_param_values = _get_stats_for_fixed_params(
                     overall_stats, fixed_params, fp_values_set)
 
-                for stat in statistics.get_graphable_statistics():
+                for stat in overall_graphable_stats:
                     statistic_dir = _get_plot_subdirectory(
                         num_param_stats_dir, stat.name)
 
                     graph_file_basename = os.path.join(
-                        statistic_dir, statistics.OVERALL_STATS_PREFIX)
-                    _plot_statistic_vs_varying_param_grouped_by_param(
+                        statistic_dir, fsys.OVERALL_STATS_PREFIX)
+                    jobs.append(_get_statistic_vs_varying_param_plot_job(
                         fformat, stats_df, graph_file_basename,
-                        stat, param, num_p, fixed_param_values)
+                        stat, param, num_p, fixed_param_values))
 
+    return _render_plots(stats_dir, jobs, num_jobs, skip_unchanged)
 
-def draw_grouped_stats_graphs(fformat, stats_dir, param_values, threshold):
+
+def draw_grouped_stats_graphs(fformat, stats_dir, param_values, threshold,
+                              num_jobs=1, skip_unchanged=False):
     # Draw graphs derived from statistics calculated on groups of TPMs that
     # have been stratified into sets based on some classifier of transcripts.
     # e.g. the median percentage error of calculated vs real TPMs graphed as
     # the percentage of unique sequence per-transcript varies, for single and
     # paired-end reads, in the case of reads with errors and bias, and a
-    # particular quantification method.
+    # particular quantification method. Graphs are drawn as for
+    # draw_overall_stats_graphs().
+    jobs = []
     grouped_stats_dir = _get_plot_subdirectory(
         stats_dir, "grouped_stats_graphs")
 
@@ -421,8 +614,8 @@ def draw_grouped_stats_graphs(fformat, stats_dir, param_values, threshold):
     grp_clsfrs = [c for c in clsfrs if c.produces_grouped_stats()]
 
     for clsfr in grp_clsfrs:
-        stats_file = statistics.get_stats_file(
-            stats_dir, statistics.OVERALL_STATS_PREFIX, clsfr)
+        stats_file = fsys.get_stats_file(
+            stats_dir, fsys.OVERALL_STATS_PREFIX, clsfr)
         clsfr_stats = pd.read_csv(stats_file)
 
         clsfr_dir = _get_plot_subdirectory(
@@ -449,24 +642,30 @@ def draw_grouped_stats_graphs(fformat, stats_dir, param_values, threshold):
                         statistic_dir, "grouped")
 
                     filtered_stats_df = stats_df[num_tpms_filter(stats_df)]
-                    _plot_statistic_vs_transcript_classifier_grouped_by_param(
-                        fformat, filtered_stats_df, graph_file_basename,
-                        stat, param, clsfr, fixed_param_values)
+                    jobs.append(
+                        _get_statistic_vs_transcript_classifier_plot_job(
+                            fformat, filtered_stats_df, graph_file_basename,
+                            stat, param, clsfr, fixed_param_values))
+
+    return _render_plots(stats_dir, jobs, num_jobs, skip_unchanged)
 
 
-def draw_distribution_graphs(fformat, stats_dir, param_values):
+def draw_distribution_graphs(fformat, stats_dir, param_values,
+                             num_jobs=1, skip_unchanged=False):
     # Draw distributions illustrating the percentage of TPMs above or below
     # some threshold as that threshold changes. e.g. the percentage of TPMs
     # whose absolute percentage error in calculated TPM, as compared to real
-    # TPM, is below a particular threshold.
+    # TPM, is below a particular threshold. Graphs are drawn as for
+    # draw_overall_stats_graphs().
+    jobs = []
     distribution_stats_dir = _get_plot_subdirectory(
         stats_dir, "distribution_stats_graphs")
 
     clsfrs = classifiers.get_classifiers()
     dist_clsfrs = [c for c in clsfrs if c.produces_distribution_plots()]
     for clsfr, asc in itertools.product(dist_clsfrs, [True, False]):
-        stats_file = statistics.get_stats_file(
-            stats_dir, statistics.OVERALL_STATS_PREFIX, clsfr, asc)
+        stats_file = fsys.get_stats_file(
+            stats_dir, fsys.OVERALL_STATS_PREFIX, clsfr, asc)
         clsfr_stats = pd.read_csv(stats_file)
 
         clsfr_dir = _get_plot_subdirectory(
@@ -489,6 +688,27 @@ def draw_distribution_graphs(fformat, stats_dir, param_values):
                 stats_df, fixed_param_values = _get_stats_for_fixed_params(
                     clsfr_stats, fixed_params, fp_values_set)
 
-                _plot_cumulative_transcript_distribution_grouped_by_param(
+                jobs.append(_get_cumulative_transcript_distribution_plot_job(
                     fformat, stats_df, graph_file_basename, param,
-                    clsfr, asc, fixed_param_values)
+                    clsfr, asc, fixed_param_values))
+
+    return _render_plots(stats_dir, jobs, num_jobs, skip_unchanged)
+
+
+def draw_resource_usage_graphs(fformat, stats_dir, usage_df,
+                               num_jobs=1, skip_unchanged=False):
+    # Draw graphs of the computational resources used by each stage of the
+    # quantification runs, e.g. the mean elapsed time taken to quantify
+    # transcript abundances, for each quantification method. Graphs are drawn
+    # as for draw_overall_stats_graphs().
+    jobs = []
+    usage_dir = _get_plot_subdirectory(stats_dir, "resource_usage_graphs")
+
+    succeeded = usage_df[usage_df[ru.EXIT_STATUS] == 0]
+    if len(succeeded) > 0:
+        for measure, label in RESOURCE_USAGE_MEASURES:
+            jobs.append(_get_resource_usage_per_quantifier_plot_job(
+                fformat, succeeded, os.path.join(usage_dir, "resource_usage"),
+                measure, label))
+
+    return _render_plots(stats_dir, jobs, num_jobs, skip_unchanged)
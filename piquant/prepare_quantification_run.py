@@ -1,9 +1,13 @@
+import annotation_cache as ac
+import columnar
 import file_writer as fw
 import flux_simulator as fs
 import quantifiers as qs
 import os.path
 import parameters
 import piquant_options as po
+import prepare_read_simulation as prs
+import resource_usage as ru
 
 RUN_SCRIPT = "run_quantification.sh"
 
@@ -16,9 +20,16 @@ RUN_PREQUANTIFICATION_VARIABLE = "RUN_PREQUANTIFICATION"
 QUANTIFY_TRANSCRIPTS_VARIABLE = "QUANTIFY_TRANSCRIPTS"
 ANALYSE_RESULTS_VARIABLE = "ANALYSE_RESULTS"
 
-TPMS_FILE = "tpms.csv"
-TRANSCRIPT_COUNTS_FILE = "transcript_counts.csv"
-UNIQUE_SEQUENCE_FILE = "unique_sequence.csv"
+TPMS_FILE_BASENAME = "tpms"
+
+# Stages of the quantification script for which the resources used are
+# recorded in the run directory's metrics file
+PREQUANTIFICATION_STAGE = "prequantification"
+TRANSCRIPT_COUNTS_STAGE = "transcript_counts"
+UNIQUE_SEQUENCE_STAGE = "unique_sequence"
+QUANTIFICATION_STAGE = ru.QUANTIFICATION_STAGE
+ASSEMBLE_DATA_STAGE = "assemble_data"
+ANALYSE_DATA_STAGE = "analyse_data"
 
 
 def _get_script_path(script_name):
@@ -26,12 +37,13 @@ def _get_script_path(script_name):
         os.path.abspath(os.path.dirname(__file__)), script_name)
 
 
-def _get_transcript_counts_file(quantifier_dir):
-    return os.path.join(quantifier_dir, TRANSCRIPT_COUNTS_FILE)
+def _get_annotation_cache_dir(quantifier_dir):
+    return os.path.join(quantifier_dir, ac.CACHE_DIRECTORY)
 
 
-def _get_unique_sequence_file(quantifier_dir):
-    return os.path.join(quantifier_dir, UNIQUE_SEQUENCE_FILE)
+def _get_tpms_file(piquant_options):
+    return columnar.get_data_file(
+        TPMS_FILE_BASENAME, piquant_options[po.DATA_FORMAT])
 
 
 def _add_run_prequantification(
@@ -42,11 +54,12 @@ def _add_run_prequantification(
         # Perform preparatory tasks required by a particular quantification
         # method prior to calculating abundances; for example, this might
         # include mapping reads to the genome with TopHat
-        quant_method.write_preparatory_commands(writer, quant_params)
-        with writer.section():
+        with writer.timed_section(PREQUANTIFICATION_STAGE):
+            quant_method.write_preparatory_commands(writer, quant_params)
+        with writer.timed_section(TRANSCRIPT_COUNTS_STAGE):
             _add_calculate_transcripts_per_gene(
                 writer, quantifier_dir, transcript_gtf_file)
-        with writer.section():
+        with writer.timed_section(UNIQUE_SEQUENCE_STAGE):
             _add_calculate_unique_sequence_length(
                 writer, quantifier_dir, transcript_gtf_file)
 
@@ -54,7 +67,7 @@ def _add_run_prequantification(
 def _add_quantify_transcripts(writer, quant_method, quant_params, cleanup):
     # Use the specified quantification method to calculate per-transcript TPMs
     with writer.if_block("-n \"$QUANTIFY_TRANSCRIPTS\""):
-        with writer.section():
+        with writer.timed_section(QUANTIFICATION_STAGE):
             writer.add_comment(
                 "Use {method} to calculate per-transcript TPMs.".format(
                     method=quant_method))
@@ -69,36 +82,38 @@ def _add_quantify_transcripts(writer, quant_method, quant_params, cleanup):
 def _add_calculate_transcripts_per_gene(
         writer, quantifier_dir, transcript_gtf_file):
 
-    # Calculate the number of transcripts per gene and write to a file
-    writer.add_comment("Calculate the number of transcripts per gene.")
+    # Calculate the number of transcripts per gene and store in the
+    # annotation cache
+    writer.add_comment(
+        "Calculate the number of transcripts per gene (this is only " +
+        "done once for a particular transcript GTF file).")
 
-    counts_file = _get_transcript_counts_file(quantifier_dir)
-    with writer.if_block("! -f " + counts_file):
-        writer.add_line("{command} {transcript_gtf} > {counts_file}".format(
+    writer.add_line(
+        "{command} --cache-dir={cache_dir} {transcript_gtf}".format(
             command=_get_script_path(TRANSCRIPT_COUNTS_SCRIPT),
-            transcript_gtf=transcript_gtf_file,
-            counts_file=counts_file))
+            cache_dir=_get_annotation_cache_dir(quantifier_dir),
+            transcript_gtf=transcript_gtf_file))
 
 
 def _add_calculate_unique_sequence_length(
         writer, quantifier_dir, transcript_gtf_file):
 
-    # Calculate the length of unique sequence per transcript and write to a
-    # file.
+    # Calculate the length of unique sequence per transcript and store in the
+    # annotation cache.
     writer.add_comment(
-        "Calculate the length of unique sequence per transcript.")
+        "Calculate the length of unique sequence per transcript (this is " +
+        "only done once for a particular transcript GTF file).")
 
-    unique_seq_file = _get_unique_sequence_file(quantifier_dir)
-    with writer.if_block("! -f " + unique_seq_file):
-        writer.add_line(
-            "{command} {transcript_gtf} > {unique_seq_file}".format(
-                command=_get_script_path(UNIQUE_SEQUENCE_SCRIPT),
-                transcript_gtf=transcript_gtf_file,
-                unique_seq_file=unique_seq_file))
+    writer.add_line(
+        "{command} --cache-dir={cache_dir} {transcript_gtf}".format(
+            command=_get_script_path(UNIQUE_SEQUENCE_SCRIPT),
+            cache_dir=_get_annotation_cache_dir(quantifier_dir),
+            transcript_gtf=transcript_gtf_file))
 
 
 def _add_assemble_quantification_data(
-        writer, quantifier_dir, fs_pro_file, quant_method):
+        writer, quantifier_dir, fs_pro_file, transcript_gtf_file,
+        quant_method, tpms_file):
 
     # Now assemble data required for analysis of quantification performance
     # into one file
@@ -107,18 +122,18 @@ def _add_assemble_quantification_data(
         "into one file")
 
     writer.add_line(
-        ("{command} --method={method} --out={out_file} {fs_pro_file} " +
-         "{counts_file} {unique_seq_file}").format(
+        ("{command} --method={method} --out={out_file} " +
+         "--cache-dir={cache_dir} {fs_pro_file} {transcript_gtf}").format(
             command=_get_script_path(ASSEMBLE_DATA_SCRIPT),
             method=quant_method,
-            out_file=TPMS_FILE,
+            out_file=tpms_file,
+            cache_dir=_get_annotation_cache_dir(quantifier_dir),
             fs_pro_file=fs_pro_file,
-            counts_file=_get_transcript_counts_file(quantifier_dir),
-            unique_seq_file=_get_unique_sequence_file(quantifier_dir)))
+            transcript_gtf=transcript_gtf_file))
 
 
 def _add_analyse_quantification_results(
-        writer, run_dir, piquant_options, **params):
+        writer, run_dir, read_count_file, piquant_options, **params):
 
     # Finally perform analysis on the calculated TPMs
     writer.add_comment("Perform analysis on calculated TPMs.")
@@ -134,13 +149,19 @@ def _add_analyse_quantification_results(
 
     writer.add_line(
         ("{command} --plot-format={format} " +
-         "--grouped-threshold={gp_threshold} {params_spec} " +
-         "{tpms_file} {output_basename}").format(
+         "--grouped-threshold={gp_threshold} " +
+         "--distribution-points={dist_points} " +
+         "--metrics-file={metrics_file} " +
+         "--read-count-file={read_count_file} " +
+         "{params_spec} {tpms_file} {output_basename}").format(
             command=_get_script_path(ANALYSE_DATA_SCRIPT),
             format=piquant_options[po.PLOT_FORMAT],
             gp_threshold=piquant_options[po.GROUPED_THRESHOLD],
+            dist_points=piquant_options[po.DISTRIBUTION_POINTS],
+            metrics_file=ru.METRICS_FILE,
+            read_count_file=read_count_file,
             params_spec=params_spec,
-            tpms_file=TPMS_FILE,
+            tpms_file=_get_tpms_file(piquant_options),
             output_basename=os.path.basename(run_dir)))
 
 
@@ -167,20 +188,24 @@ def _add_process_command_line_options(writer):
 
 
 def _add_analyse_results(
-        writer, reads_dir, run_dir, quantifier_dir, piquant_options,
-        quant_method, read_length, read_depth, paired_end, errors, bias):
+        writer, reads_dir, run_dir, quantifier_dir, transcript_gtf_file,
+        piquant_options, quant_method, read_length, read_depth,
+        paired_end, errors, bias):
 
     fs_pro_file = os.path.join(reads_dir, fs.EXPRESSION_PROFILE_FILE)
 
     with writer.if_block("-n \"$ANALYSE_RESULTS\""):
-        with writer.section():
+        with writer.timed_section(ASSEMBLE_DATA_STAGE):
             _add_assemble_quantification_data(
-                writer, quantifier_dir, fs_pro_file, quant_method)
-        _add_analyse_quantification_results(
-            writer, run_dir, piquant_options,
-            quant_method=quant_method,
-            read_length=read_length, read_depth=read_depth,
-            paired_end=paired_end, errors=errors, bias=bias)
+                writer, quantifier_dir, fs_pro_file, transcript_gtf_file,
+                quant_method, _get_tpms_file(piquant_options))
+        with writer.timed_section(ANALYSE_DATA_STAGE):
+            read_count_file = os.path.join(reads_dir, prs.READ_COUNT_FILE)
+            _add_analyse_quantification_results(
+                writer, run_dir, read_count_file, piquant_options,
+                quant_method=quant_method,
+                read_length=read_length, read_depth=read_depth,
+                paired_end=paired_end, errors=errors, bias=bias)
 
 
 def _get_quant_params(reads_dir, quantifier_dir, transcript_gtf,
@@ -214,7 +239,8 @@ def write_run_quantification_script(
     os.mkdir(run_dir)
 
     with fw.writing_to_file(
-            fw.BashScriptWriter, run_dir, RUN_SCRIPT) as writer:
+            fw.BashScriptWriter, run_dir, RUN_SCRIPT,
+            metrics_file=ru.METRICS_FILE) as writer:
         with writer.section():
             _add_process_command_line_options(writer)
 
@@ -236,5 +262,6 @@ def write_run_quantification_script(
                 writer, quant_method, quant_params, cleanup)
 
         _add_analyse_results(
-            writer, reads_dir, run_dir, quantifier_dir, piquant_options,
-            quant_method, read_length, read_depth, paired_end, errors, bias)
+            writer, reads_dir, run_dir, quantifier_dir, transcript_gtf,
+            piquant_options, quant_method, read_length, read_depth,
+            paired_end, errors, bias)
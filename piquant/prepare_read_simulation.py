@@ -1,16 +1,33 @@
+import fastx
 import file_writer as fw
 import flux_simulator as fs
+import hashlib
+import os
 import os.path
+import resource_usage as ru
 
 RUN_SCRIPT = "run_simulation.sh"
+EXPRESSION_PROFILE_SCRIPT = "run_expression_profile.sh"
 
 CALC_READ_DEPTH_SCRIPT = "calculate_reads_for_depth.py"
 SIMULATE_BIAS_SCRIPT = "simulate_read_bias.py"
+SHUFFLE_READS_SCRIPT = "shuffle_reads.py"
+SUBSAMPLE_READS_SCRIPT = "subsample_reads.py"
 BIAS_PWM_FILE = "bias_motif.pwm"
 
-TMP_READS_FILE = "reads.tmp"
-TMP_LEFT_READS_FILE = "lr.tmp"
-TMP_RIGHT_READS_FILE = "rr.tmp"
+SUBSAMPLING_SOURCE_FILE = "subsampling_source.txt"
+READ_COUNT_FILE = "read_count.txt"
+
+EXPRESSION_PROFILE_LINK = "expression_profile"
+EXPRESSION_PROFILE_DIR_PREFIX = "expression_profile_"
+
+# Stages of the simulation scripts for which the resources used are recorded
+# in the reads (or expression profile) directory's metrics file
+EXPRESSION_PROFILE_STAGE = "expression_profile"
+SIMULATE_READS_STAGE = "simulate_reads"
+SIMULATE_BIAS_STAGE = "simulate_read_bias"
+SHUFFLE_READS_STAGE = "shuffle_reads"
+SUBSAMPLE_READS_STAGE = "subsample_reads"
 
 
 def _get_script_path(script_name):
@@ -50,7 +67,47 @@ def _add_fix_zero_length_transcripts(writer):
         " > tmp; mv tmp " + fs.EXPRESSION_PROFILE_FILE)
 
 
-def _add_calculate_required_read_depth(writer, read_length, read_depth, bias):
+def _add_remove_flux_simulator_temporary_directory(writer):
+    writer.add_comment("Remove FluxSimulator's temporary directory.")
+    writer.add_line("rm -rf " + fs.TEMPORARY_DIRECTORY)
+
+
+def _add_check_shared_expression_profile(writer):
+    # The shared profile is not created here, as several runs using it may be
+    # executed concurrently; 'piquant.py create_reads' creates it first.
+    profile_file = os.path.join(
+        EXPRESSION_PROFILE_LINK, fs.EXPRESSION_PROFILE_FILE)
+    profile_script = os.path.join(
+        EXPRESSION_PROFILE_LINK, EXPRESSION_PROFILE_SCRIPT)
+
+    writer.add_comment(
+        "Check that the transcript expression profile shared by all runs " +
+        "with the same transcripts, genome and number of molecules has " +
+        "been created.")
+    with writer.if_block("! -f " + profile_file):
+        writer.add_line(
+            "echo \"Expression profile " + profile_file + " does not " +
+            "exist; execute " + profile_script + " first.\" >&2")
+        writer.add_line("exit 1")
+
+
+def _add_copy_shared_expression_profile(writer):
+    # Flux Simulator adds library preparation and sequencing data to the
+    # expression profile as it simulates reads, so each run takes its own copy
+    # of the shared profile rather than writing through a link to it.
+    writer.add_comment(
+        "Copy the shared transcript expression profile (created by " +
+        "running " + os.path.join(EXPRESSION_PROFILE_LINK,
+                                  EXPRESSION_PROFILE_SCRIPT) + ").")
+    writer.add_line(
+        "cp " + os.path.join(EXPRESSION_PROFILE_LINK,
+                             fs.EXPRESSION_PROFILE_FILE) +
+        " " + fs.EXPRESSION_PROFILE_FILE)
+
+
+def _add_calculate_required_read_depth(
+        writer, read_length, read_depth, bias,
+        pro_file=fs.EXPRESSION_PROFILE_FILE):
 
     # Given the expression profile created, calculate the number of reads
     # required to give the (approximate) read depth specified. Then edit the
@@ -62,8 +119,7 @@ def _add_calculate_required_read_depth(writer, read_length, read_depth, bias):
         str(read_length))
     writer.set_variable(
         "READS", "$(" + _get_script_path(CALC_READ_DEPTH_SCRIPT) + " " +
-        fs.EXPRESSION_PROFILE_FILE + " " + str(read_length) + " " +
-        str(read_depth) + ")")
+        pro_file + " " + str(read_length) + " " + str(read_depth) + ")")
 
     if bias:
         writer.add_comment(
@@ -94,30 +150,7 @@ def _add_simulate_reads(writer):
     writer.add_line("rm -rf " + fs.TEMPORARY_DIRECTORY)
 
 
-def _add_shuffle_simulated_reads(writer, paired_end, errors):
-    # Some isoform quantifiers (e.g. eXpress) require reads to be presented in
-    # a random order, but the reads output by Flux Simulator do have an order -
-    # hence we shuffle them.
-    lines_per_fragment = 2
-    if errors:
-        lines_per_fragment *= 2
-    if paired_end:
-        lines_per_fragment *= 2
-
-    writer.add_comment(
-        "Some isoform quantifiers require reads to be presented in a " +
-        "random order, hence we shuffle the reads output by Flux Simulator.")
-
-    reads_file = fs.get_reads_file(errors)
-    writer.add_pipe(
-        "paste " + ("- " * lines_per_fragment) + "< " + reads_file,
-        "shuf",
-        "tr '\\t' '\\n' > " + TMP_READS_FILE
-    )
-    writer.add_line("mv " + TMP_READS_FILE + " " + reads_file)
-
-
-def _add_simulate_read_bias(writer, paired_end, errors):
+def _add_simulate_read_bias(writer, paired_end, errors, seed):
     # Use a position weight matrix to simulate sequence bias in the reads
     writer.add_comment(
         "Use a position weight matrix to simulate sequence bias in " +
@@ -128,63 +161,121 @@ def _add_simulate_read_bias(writer, paired_end, errors):
     writer.add_line(
         _get_script_path(SIMULATE_BIAS_SCRIPT) +
         " -n $FINAL_READS --out-prefix=" + out_prefix + " " +
-        ("--paired-end" if paired_end else "") + " " +
+        ("--paired-end" if paired_end else "") +
+        " --seed=" + str(seed) + " " +
         _get_script_path(BIAS_PWM_FILE) + " " + reads_file)
     writer.add_line("mv " + out_prefix + "." + reads_file + " " + reads_file)
 
 
-def _add_separate_paired_end_reads(writer, errors):
-    # If we've specified paired end reads, split the FASTA/Q file output by
-    # Flux Simulator into separate files for forward and reverse reads
+def _add_shuffle_simulated_reads(writer, paired_end, errors, seed):
+    # Some isoform quantifiers (e.g. eXpress) require reads to be presented in
+    # a random order, but the reads output by Flux Simulator do have an order -
+    # hence we shuffle them. If we've specified paired end reads, the shuffled
+    # reads are split into separate files for forward and reverse reads in the
+    # same pass.
     writer.add_comment(
-        "We've produced paired-end reads - split the Flux Simulator " +
-        "output into files containing left and right reads.")
+        "Some isoform quantifiers require reads to be presented in a " +
+        "random order, hence we shuffle the reads output by Flux Simulator.")
+    if paired_end:
+        writer.add_comment(
+            "We've produced paired-end reads - the shuffled reads are " +
+            "split into files containing left and right reads.")
 
     reads_file = fs.get_reads_file(errors)
-    writer.add_pipe(
-        "paste " + ("- - - -" if errors else "- -") + " < " + reads_file,
-        "awk -F '\\t' '$1~/\/1/ " +
-        "{print $0 > \"" + TMP_LEFT_READS_FILE + "\"} " +
-        "$1~/\/2/ {print $0 > \"" + TMP_RIGHT_READS_FILE + "\"}'"
-    )
-    writer.add_line("rm " + reads_file)
-
-    writer.add_line(
-        "tr '\\t' '\\n' < " + TMP_LEFT_READS_FILE + " > " +
-        fs.get_reads_file(errors, fs.LEFT_READS))
-    writer.add_line("rm " + TMP_LEFT_READS_FILE)
+    out_files = [fs.get_reads_file(errors, fs.LEFT_READS),
+                 fs.get_reads_file(errors, fs.RIGHT_READS)] \
+        if paired_end else [reads_file]
     writer.add_line(
-        "tr '\\t' '\\n' < " + TMP_RIGHT_READS_FILE + " > " +
-        fs.get_reads_file(errors, fs.RIGHT_READS))
-    writer.add_line("rm " + TMP_RIGHT_READS_FILE)
+        _get_script_path(SHUFFLE_READS_SCRIPT) + " --seed=" + str(seed) +
+        " " + reads_file + " " +
+        " ".join(out_files))
+
+    if paired_end:
+        writer.add_line("rm " + reads_file)
 
 
 def _add_create_reads(
-        writer, read_length, read_depth, paired_end, errors, bias):
+        writer, read_length, read_depth, paired_end, errors, bias, seed):
 
     with writer.section():
-        _add_create_flux_simulator_temporary_directory(writer)
+        _add_check_shared_expression_profile(writer)
     with writer.section():
-        _add_create_expression_profiles(writer)
+        _add_create_flux_simulator_temporary_directory(writer)
     with writer.section():
-        _add_fix_zero_length_transcripts(writer)
+        _add_copy_shared_expression_profile(writer)
     with writer.section():
+        # Summary data for the shared expression profile is cached alongside
+        # it, and so need only be calculated by the first run to use it
         _add_calculate_required_read_depth(
-            writer, read_length, read_depth, bias)
+            writer, read_length, read_depth, bias,
+            pro_file=os.path.join(EXPRESSION_PROFILE_LINK,
+                                  fs.EXPRESSION_PROFILE_FILE))
     with writer.section():
         _add_update_flux_simulator_parameters(writer)
-    with writer.section():
+    with writer.timed_section(SIMULATE_READS_STAGE):
         _add_simulate_reads(writer)
-    with writer.section():
-        _add_shuffle_simulated_reads(writer, paired_end, errors)
 
     if bias:
-        with writer.section():
-            _add_simulate_read_bias(writer, paired_end, errors)
+        with writer.timed_section(SIMULATE_BIAS_STAGE):
+            _add_simulate_read_bias(writer, paired_end, errors, seed)
 
-    if paired_end:
-        with writer.section():
-            _add_separate_paired_end_reads(writer, errors)
+    with writer.timed_section(SHUFFLE_READS_STAGE):
+        _add_shuffle_simulated_reads(writer, paired_end, errors, seed)
+
+
+def _get_reads_files(paired_end, errors):
+    ends = [fs.LEFT_READS, fs.RIGHT_READS] if paired_end else [None]
+    return [fs.get_reads_file(errors, end) for end in ends]
+
+
+def _add_copy_expression_profile(writer, source_reads_dir):
+    writer.add_comment(
+        "Reads for this run are subsampled from those simulated for a " +
+        "higher read depth; first copy the expression profile from which " +
+        "those reads were simulated.")
+    writer.add_line(
+        "cp " + os.path.join(source_reads_dir, fs.EXPRESSION_PROFILE_FILE) +
+        " " + fs.EXPRESSION_PROFILE_FILE)
+
+
+def _add_subsample_reads(writer, source_reads_dir, paired_end, errors, seed):
+    writer.add_comment(
+        "Select a uniform random sample of the required number of reads " +
+        "from those simulated for the higher read depth.")
+    writer.add_line(
+        _get_script_path(SUBSAMPLE_READS_SCRIPT) + " -n $READS --seed=" +
+        str(seed) + " --out-dir=. " +
+        " ".join([os.path.join(source_reads_dir, f)
+                  for f in _get_reads_files(paired_end, errors)]))
+
+
+def _add_subsample_reads_from_source(
+        writer, source_reads_dir, read_length, read_depth,
+        paired_end, errors, seed):
+
+    with writer.section():
+        _add_copy_expression_profile(writer, source_reads_dir)
+    with writer.section():
+        _add_calculate_required_read_depth(
+            writer, read_length, read_depth, False)
+    with writer.timed_section(SUBSAMPLE_READS_STAGE):
+        _add_subsample_reads(
+            writer, source_reads_dir, paired_end, errors, seed)
+
+
+def _add_record_read_count(writer, paired_end, errors):
+    # The number of reads is recorded once, when they are created, so that
+    # the reads need not be counted again each time quantification results
+    # are analysed
+    reads_files = _get_reads_files(paired_end, errors)
+    with writer.section():
+        writer.add_comment(
+            "Record the number of reads created (for paired-end reads, " +
+            "both reads of a pair are counted).")
+        writer.add_line(
+            "echo $(( $(cat " + " ".join(reads_files) + " | wc -l) / " +
+            str(fastx.get_lines_per_fragment(reads_files[0])) + " )) > " +
+            READ_COUNT_FILE)
 
 
 def _add_cleanup_intermediate_files(writer):
@@ -195,40 +286,147 @@ def _add_cleanup_intermediate_files(writer):
         writer.add_line("rm " + fs.SIMULATED_READS_PREFIX + ".bed")
 
 
-def _create_simulator_parameter_files(
-        reads_dir, transcript_gtf_file, genome_fasta_dir,
-        num_molecules, read_length, paired_end, errors):
+def _get_expression_profile_dir(
+        output_dir, transcript_gtf_file, genome_fasta_dir, num_molecules):
+
+    # Expression profiles depend only on the transcripts, genome and number of
+    # molecules, so runs with identical values of these share a profile
+    inputs = [os.path.abspath(transcript_gtf_file),
+              os.path.abspath(genome_fasta_dir), str(num_molecules)]
+    inputs_hash = hashlib.md5("\n".join(inputs)).hexdigest()
+    return os.path.join(
+        output_dir, EXPRESSION_PROFILE_DIR_PREFIX + inputs_hash[:12])
 
-    fs.write_flux_simulator_params_files(
-        transcript_gtf_file, genome_fasta_dir, num_molecules,
-        read_length, paired_end, errors, reads_dir)
+
+def _write_expression_profile_script(profile_dir):
+    with fw.writing_to_file(
+            fw.BashScriptWriter, profile_dir,
+            EXPRESSION_PROFILE_SCRIPT,
+            metrics_file=ru.METRICS_FILE) as writer:
+
+        with writer.section():
+            _add_create_flux_simulator_temporary_directory(writer)
+        with writer.timed_section(EXPRESSION_PROFILE_STAGE):
+            _add_create_expression_profiles(writer)
+        with writer.section():
+            _add_fix_zero_length_transcripts(writer)
+        with writer.section():
+            _add_remove_flux_simulator_temporary_directory(writer)
+
+
+def _create_expression_profile_files(
+        reads_dir, transcript_gtf_file, genome_fasta_dir, num_molecules):
+
+    profile_dir = _get_expression_profile_dir(
+        os.path.dirname(os.path.abspath(reads_dir)),
+        transcript_gtf_file, genome_fasta_dir, num_molecules)
+
+    # The files for a shared expression profile are written by whichever run
+    # first creates its directory
+    try:
+        os.mkdir(profile_dir)
+    except OSError:
+        if not os.path.isdir(profile_dir):
+            raise
+    else:
+        fs.write_flux_simulator_expression_params_file(
+            transcript_gtf_file, genome_fasta_dir, num_molecules,
+            profile_dir)
+        _write_expression_profile_script(profile_dir)
+
+    os.symlink(os.path.join(os.pardir, os.path.basename(profile_dir)),
+               os.path.join(reads_dir, EXPRESSION_PROFILE_LINK))
+
+
+def get_expression_profile_dir(reads_dir):
+    """
+    Return the directory containing a run's shared expression profile.
+
+    Return the path of the directory, linked from 'reads_dir', in which the
+    expression profile from which reads are simulated is created, or None if
+    the run's reads are not simulated from a shared expression profile.
+    reads_dir: Path of a reads directory.
+    """
+    profile_link = os.path.join(reads_dir, EXPRESSION_PROFILE_LINK)
+    if not os.path.islink(profile_link):
+        return None
+    return os.path.realpath(profile_link)
 
 
 def _write_read_simulation_script(
-        reads_dir, read_length, read_depth, paired_end, errors, bias, cleanup):
+        reads_dir, read_length, read_depth, paired_end, errors, bias, seed,
+        cleanup):
 
     with fw.writing_to_file(
-            fw.BashScriptWriter, reads_dir, RUN_SCRIPT) as writer:
+            fw.BashScriptWriter, reads_dir, RUN_SCRIPT,
+            metrics_file=ru.METRICS_FILE) as writer:
 
         _add_create_reads(writer, read_length, read_depth,
-                          paired_end, errors, bias)
+                          paired_end, errors, bias, seed)
+        _add_record_read_count(writer, paired_end, errors)
 
         if cleanup:
             _add_cleanup_intermediate_files(writer)
 
 
+def _write_read_subsampling_script(
+        reads_dir, source_reads_dir, read_length, read_depth,
+        paired_end, errors, seed):
+
+    with fw.writing_to_file(
+            fw.BashScriptWriter, reads_dir, RUN_SCRIPT,
+            metrics_file=ru.METRICS_FILE) as writer:
+
+        _add_subsample_reads_from_source(
+            writer, source_reads_dir, read_length, read_depth,
+            paired_end, errors, seed)
+        _add_record_read_count(writer, paired_end, errors)
+
+    with open(os.path.join(reads_dir, SUBSAMPLING_SOURCE_FILE), "w") as f:
+        f.write(source_reads_dir + "\n")
+
+
+def get_subsampling_source(reads_dir):
+    """
+    Return the reads directory from which a run's reads are subsampled.
+
+    Return the path of the reads directory whose reads the run_simulation.sh
+    script in 'reads_dir' subsamples, or None if that script simulates reads
+    itself.
+    reads_dir: Path of a reads directory.
+    """
+    source_file = os.path.join(reads_dir, SUBSAMPLING_SOURCE_FILE)
+    if not os.path.exists(source_file):
+        return None
+    with open(source_file) as f:
+        return f.read().strip()
+
+
 def create_simulation_files(
         reads_dir, cleanup, read_length=30, read_depth=10, paired_end=False,
         errors=False, bias=False, transcript_gtf=None, genome_fasta=None,
-        num_molecules=30000000):
+        num_molecules=30000000, seed=0, source_reads_dir=None):
 
     os.mkdir(reads_dir)
 
-    # Write Flux Simulator parameters files
-    _create_simulator_parameter_files(
-        reads_dir, transcript_gtf, genome_fasta,
-        num_molecules, read_length, paired_end, errors)
+    # If a source reads directory is specified, rather than simulating reads,
+    # write a shell script to subsample the reads simulated for a higher read
+    # depth in that directory
+    if source_reads_dir:
+        _write_read_subsampling_script(
+            reads_dir, source_reads_dir, read_length, read_depth,
+            paired_end, errors, seed)
+        return
+
+    # Write, or link to, the files needed to create the shared expression
+    # profile, and write the Flux Simulator simulation parameters file
+    _create_expression_profile_files(
+        reads_dir, transcript_gtf, genome_fasta, num_molecules)
+    fs.write_flux_simulator_simulation_params_file(
+        transcript_gtf, genome_fasta, num_molecules,
+        read_length, paired_end, errors, reads_dir)
 
     # Write shell script to run read simulation
     _write_read_simulation_script(
-        reads_dir, read_length, read_depth, paired_end, errors, bias, cleanup)
+        reads_dir, read_length, read_depth, paired_end, errors, bias, seed,
+        cleanup)
@@ -1,30 +1,130 @@
 """
 Utility functions for running scripts. Exports:
 
-run_in_directory: Run a command in a directory.
+run_jobs: Run commands in directories with bounded concurrency.
+read_job_status: Read the recorded outcome of a job run in a directory.
+
+Job: A command to be run in a directory.
+JobStatus: The outcome of running a job.
 """
 
+import collections
 import os
+import os.path
+import resource
 import subprocess
+import time
+
+JOB_STATUS_FILE = "job_status.csv"
+JOB_OUTPUT_FILE = "job_output.txt"
+
+Job = collections.namedtuple("Job", ["run_dir", "command", "cl_args"])
+JobStatus = collections.namedtuple(
+    "JobStatus", ["run_dir", "exit_status", "wall_time"])
+
+_POLL_INTERVAL = 0.1
+_BYTES_PER_MEGABYTE = 1024 * 1024
+
+
+def _get_resource_limiter(cpu_time, memory):
+    if cpu_time is None and memory is None:
+        return None
+
+    def limit_resources():
+        if cpu_time is not None:
+            resource.setrlimit(resource.RLIMIT_CPU, (cpu_time, cpu_time))
+        if memory is not None:
+            memory_bytes = memory * _BYTES_PER_MEGABYTE
+            resource.setrlimit(resource.RLIMIT_AS,
+                               (memory_bytes, memory_bytes))
+
+    return limit_resources
+
+
+def _start_job(job, limit_resources):
+    args = [job.command]
+    if job.cl_args is not None:
+        args = args + job.cl_args
+    with open(os.path.join(job.run_dir, JOB_OUTPUT_FILE), "w") as output:
+        return subprocess.Popen(
+            args, cwd=job.run_dir, stdout=output, stderr=subprocess.STDOUT,
+            preexec_fn=limit_resources)
+
+
+def _write_job_status(job_status):
+    status_file = os.path.join(job_status.run_dir, JOB_STATUS_FILE)
+    with open(status_file, "w") as f:
+        f.write("exit_status,wall_time\n")
+        f.write("{s},{t:.3f}\n".format(
+            s=job_status.exit_status, t=job_status.wall_time))
 
 
-def run_in_directory(run_dir, command, cl_args=None, nohup=True):
+def run_jobs(jobs, max_jobs=1, cpu_time=None, memory=None,
+             start_callback=None, status_callback=None):
     """
-    Run a command in the specified directory.
-
-    Run a command in the specified directory. Unlike subprocess.Popen(), the
-    command's path can be specified relative to the run directory.
-    run_dir: the directory in which to run the command.
-    command: the command or script to run.
-    cl_args: a list of command line cl_args for the command.
-    nohup: If true, invoke the command immune to hangups.
+    Run commands in directories, with a bounded number running concurrently.
+
+    Run each job's command in its run directory, starting jobs in order as
+    earlier ones finish so that at most 'max_jobs' are running at any time,
+    and wait until all have completed. The standard output and error of each
+    job are written to the file JOB_OUTPUT_FILE, and its exit status and wall
+    time to the file JOB_STATUS_FILE, in its run directory. Return
+    a list of JobStatus instances, in the same order as the jobs.
+    jobs: A list of Job instances. Each command's path can be specified
+    relative to its run directory.
+    max_jobs: The maximum number of jobs to run concurrently.
+    cpu_time: If not None, the maximum CPU time in seconds which may be used
+    by each process started by a job.
+    memory: If not None, the maximum size in megabytes of the address space
+    of each process started by a job.
+    start_callback: If not None, a function called with each Job, and the
+    time at which it was started, as soon as that job starts.
+    status_callback: If not None, a function called with each job's JobStatus
+    as soon as that job completes.
     """
-    cwd = os.getcwd()
-    os.chdir(run_dir)
-    args = [command]
-    if cl_args is not None:
-        args = args + cl_args
-    if nohup:
-        args = ['nohup'] + args
-    subprocess.Popen(args)
-    os.chdir(cwd)
+    limit_resources = _get_resource_limiter(cpu_time, memory)
+    statuses = [None] * len(jobs)
+    pending = collections.deque(enumerate(jobs))
+    running = {}
+
+    while pending or running:
+        while pending and len(running) < max_jobs:
+            index, job = pending.popleft()
+            start_time = time.time()
+            running[index] = (_start_job(job, limit_resources), start_time)
+            if start_callback is not None:
+                start_callback(job, start_time)
+
+        time.sleep(_POLL_INTERVAL)
+
+        for index, (job_process, start_time) in list(running.items()):
+            exit_status = job_process.poll()
+            if exit_status is None:
+                continue
+            del running[index]
+            job_status = JobStatus(
+                jobs[index].run_dir, exit_status, time.time() - start_time)
+            _write_job_status(job_status)
+            statuses[index] = job_status
+            if status_callback is not None:
+                status_callback(job_status)
+
+    return statuses
+
+
+def read_job_status(run_dir):
+    """
+    Read the recorded outcome of a job run in a directory.
+
+    Return a JobStatus instance describing the job most recently run in the
+    directory by run_jobs(), or None if no job has been run there.
+    run_dir: The directory in which the job was run.
+    """
+    status_file = os.path.join(run_dir, JOB_STATUS_FILE)
+    if not os.path.exists(status_file):
+        return None
+
+    with open(status_file) as f:
+        f.readline()
+        exit_status, wall_time = f.readline().strip().split(",")
+    return JobStatus(run_dir, int(exit_status), float(wall_time))
@@ -1,7 +1,25 @@
-import operator
+"""
+Classes for scoring read sequences against a position weight matrix.
+Exports:
+
+PWM: A position weight matrix, capable of scoring sequences.
+"""
+
+import numpy as np
 
 NEUTRAL_SCORE = 0.25
 
+BASES = "acgtn"
+
+# Map each possible byte of a sequence to the column of its base in the
+# weight matrix; bases other than 'a', 'c', 'g' and 't' (in either case) are
+# given the neutral score of 'n'
+_BASE_CODES = np.empty(256, dtype=np.uint8)
+_BASE_CODES.fill(BASES.index('n'))
+for _code, _base in enumerate(BASES):
+    _BASE_CODES[ord(_base)] = _code
+    _BASE_CODES[ord(_base.upper())] = _code
+
 
 class PWM:
     def __init__(self, filename):
@@ -9,18 +27,46 @@ class PWM:
         with open(filename, 'r') as f:
             base_weights = [line.strip().split(",") for line in f]
 
-        get_base_scores = lambda x: zip(['a', 'c', 'g', 't', 'n'],
-                                        list(x) + [NEUTRAL_SCORE])
-        self.pos = [{base: float(freq) for base, freq in get_base_scores(l)}
-                    for l in zip(*base_weights)]
-        self.length = len(self.pos)
+        # Hold weights as a (position x base) array, with a final column for
+        # the neutral base 'n'
+        self.weights = np.array(
+            [[float(w) for w in position_weights] + [NEUTRAL_SCORE]
+             for position_weights in zip(*base_weights)])
+        self.length = len(self.weights)
 
-    def score(self, sequence):
-        sequence = sequence[0: self.length].lower()
-        scores = [self.pos[i][base] for i, base in enumerate(sequence)]
+        with np.errstate(divide='ignore'):
+            self.log_weights = np.log(self.weights)
 
-        score_length = len(scores)
-        if score_length < self.length:
-            scores += [NEUTRAL_SCORE] * (self.length - score_length)
+    def encode(self, sequences):
+        """
+        Encode sequences as an array of integer base codes.
 
-        return reduce(operator.mul, scores)
+        Return a (sequence x position) array holding, for the first 'length'
+        bases of each sequence, the column index of that base in the weight
+        matrix. Sequences shorter than the PWM are padded with the neutral
+        base 'n'.
+        sequences: A list of sequence strings.
+        """
+        padded = "".join(
+            [s[0: self.length].ljust(self.length, 'n') for s in sequences])
+        sequence_bytes = np.frombuffer(padded, dtype=np.uint8)
+        return _BASE_CODES[sequence_bytes].reshape(
+            len(sequences), self.length)
+
+    def log_scores(self, sequences):
+        """
+        Return the natural logarithm of the PWM score of each sequence.
+
+        Sequences are scored in a single vectorized operation; scores are
+        summed in log space so that products of many small weights do not
+        underflow.
+        sequences: A list of sequence strings.
+        """
+        if len(sequences) == 0:
+            return np.empty(0)
+
+        codes = self.encode(sequences)
+        return self.log_weights[np.arange(self.length), codes].sum(axis=1)
+
+    def score(self, sequence):
+        return np.exp(self.log_scores([sequence])[0])
@@ -1,4 +1,3 @@
-import pandas as pd
 import os.path
 
 TRANSCRIPT_GTF_FILE = "TRANSCRIPT_GTF_FILE"
@@ -16,6 +15,12 @@ def get_quantification_methods():
     return _QUANT_METHODS
 
 
+def _read_abundances(results_file, index_col, abundance_col):
+    import pandas as pd
+    return pd.read_csv(results_file, delim_whitespace=True,
+                       index_col=index_col)[abundance_col]
+
+
 def _Quantifier(cls):
     _QUANT_METHODS[cls.get_name()] = cls()
     return cls
@@ -28,6 +33,11 @@ class _QuantifierBase(object):
     def __str__(self):
         return self.__class__.get_name()
 
+    def get_transcript_abundance(self, transcript_id):
+        abundances = self.get_abundances()
+        return abundances[transcript_id] \
+            if transcript_id in abundances.index else 0
+
 
 @_Quantifier
 class _Cufflinks(_QuantifierBase):
@@ -120,18 +130,16 @@ class _Cufflinks(_QuantifierBase):
         writer.add_line(cls.REMOVE_TOPHAT_OUTPUT_DIRECTORY)
         writer.add_line(cls.REMOVE_CUFFLINKS_OUTPUT_EXCEPT_ISOFORM_ABUNDANCES)
 
-    def get_transcript_abundance(self, transcript_id):
+    def get_abundances(self):
         if self.abundances is None:
-            self.abundances = pd.read_csv(
+            fpkms = _read_abundances(
                 "transcriptome/isoforms.fpkm_tracking",
-                delim_whitespace=True, index_col="tracking_id")
+                "tracking_id", _Cufflinks.FPKM_COLUMN)
 
-            self.norm_constant = \
-                1000000 / (self.abundances[_Cufflinks.FPKM_COLUMN].sum())
+            norm_constant = 1000000 / fpkms.sum()
+            self.abundances = norm_constant * fpkms
 
-        fpkm = self.abundances.ix[transcript_id][_Cufflinks.FPKM_COLUMN] \
-            if transcript_id in self.abundances.index else 0
-        return self.norm_constant * fpkm
+        return self.abundances
 
 
 class _TranscriptomeBasedQuantifierBase(_QuantifierBase):
@@ -222,14 +230,12 @@ class _RSEM(_TranscriptomeBasedQuantifierBase):
     def write_post_quantification_cleanup(cls, writer):
         writer.add_line(cls.REMOVE_RSEM_OUTPUT_EXCEPT_ISOFORM_ABUNDANCES)
 
-    def get_transcript_abundance(self, transcript_id):
+    def get_abundances(self):
         if self.abundances is None:
-            self.abundances = pd.read_csv(
-                "rsem_sample.isoforms.results", delim_whitespace=True,
-                index_col="transcript_id")
+            self.abundances = _read_abundances(
+                "rsem_sample.isoforms.results", "transcript_id", "TPM")
 
-        return self.abundances.ix[transcript_id]["TPM"] \
-            if transcript_id in self.abundances.index else 0
+        return self.abundances
 
 
 @_Quantifier
@@ -285,13 +291,12 @@ class _Express(_TranscriptomeBasedQuantifierBase):
         writer.add_line(cls.REMOVE_MAPPED_READS)
         writer.add_line(cls.REMOVE_EXPRESS_OUTPUT_EXCEPT_ISOFORM_ABUNDANCES)
 
-    def get_transcript_abundance(self, transcript_id):
+    def get_abundances(self):
         if self.abundances is None:
-            self.abundances = pd.read_csv(
-                "results.xprs", delim_whitespace=True, index_col="target_id")
+            self.abundances = _read_abundances(
+                "results.xprs", "target_id", "tpm")
 
-        return self.abundances.ix[transcript_id]["tpm"] \
-            if transcript_id in self.abundances.index else 0
+        return self.abundances
 
 
 @_Quantifier
@@ -363,14 +368,12 @@ class _Sailfish(_TranscriptomeBasedQuantifierBase):
     def write_post_quantification_cleanup(cls, writer):
         writer.add_line(cls.REMOVE_SAILFISH_OUTPUT_EXCEPT_ISOFORM_ABUNDANCES)
 
-    def get_transcript_abundance(self, transcript_id):
+    def get_abundances(self):
         if self.abundances is None:
-            self.abundances = pd.read_csv(
-                "quant_filtered.csv", delim_whitespace=True,
-                index_col="Transcript")
+            self.abundances = _read_abundances(
+                "quant_filtered.csv", "Transcript", "TPM")
 
-        return self.abundances.ix[transcript_id]["TPM"] \
-            if transcript_id in self.abundances.index else 0
+        return self.abundances
 
 
 @_Quantifier
@@ -439,11 +442,9 @@ class _Salmon(_TranscriptomeBasedQuantifierBase):
     def write_post_quantification_cleanup(cls, writer):
         writer.add_line(cls.REMOVE_SALMON_OUTPUT_EXCEPT_ISOFORM_ABUNDANCES)
 
-    def get_transcript_abundance(self, transcript_id):
+    def get_abundances(self):
         if self.abundances is None:
-            self.abundances = pd.read_csv(
-                "quant_filtered.csv", delim_whitespace=True,
-                index_col="Name")
+            self.abundances = _read_abundances(
+                "quant_filtered.csv", "Name", "TPM")
 
-        return self.abundances.ix[transcript_id]["TPM"] \
-            if transcript_id in self.abundances.index else 0
+        return self.abundances
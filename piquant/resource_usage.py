@@ -0,0 +1,109 @@
+"""
+Functions for recording and reading the computational resources used by the
+stages of simulation and quantification scripts. Exports:
+
+get_peak_memory_megabytes: Get the peak memory recorded in resource usage.
+record_stage_usage: Append the resources used by a stage to a metrics file.
+read_stage_usage: Read the resources most recently used by each stage.
+
+METRICS_FILE: Name of the file to which each run's stage usage is written.
+SUMMARY_FILE: Name of the file summarising stage usage per quantifier.
+QUANTIFICATION_STAGE: The stage in which transcripts are quantified.
+StageUsage: The resources used by one execution of a script stage.
+"""
+
+import collections
+import csv
+import os.path
+import sys
+
+METRICS_FILE = "resource_usage.csv"
+
+# The stage of a quantification run's script in which the quantification
+# tool estimates transcript abundances
+QUANTIFICATION_STAGE = "quantification"
+
+STAGE = "stage"
+WALL_TIME = "wall_time"
+USER_TIME = "user_time"
+SYSTEM_TIME = "system_time"
+PEAK_MEMORY = "peak_memory_mb"
+EXIT_STATUS = "exit_status"
+
+# The sum of user and system CPU time
+CPU_TIME = "cpu_time"
+
+SUMMARY_FILE = "resource_usage_summary.csv"
+
+RUNS = "runs"
+FAILURES = "failures"
+MEAN_WALL_TIME = "mean_wall_time"
+MAX_WALL_TIME = "max_wall_time"
+MEAN_CPU_TIME = "mean_cpu_time"
+TOTAL_CPU_TIME = "total_cpu_time"
+MAX_PEAK_MEMORY = "max_peak_memory_mb"
+
+SUMMARY_COLUMNS = [RUNS, FAILURES, MEAN_WALL_TIME, MAX_WALL_TIME,
+                   MEAN_CPU_TIME, TOTAL_CPU_TIME, MAX_PEAK_MEMORY]
+
+StageUsage = collections.namedtuple(
+    "StageUsage", [STAGE, WALL_TIME, USER_TIME, SYSTEM_TIME,
+                   PEAK_MEMORY, EXIT_STATUS])
+
+_FIELD_TYPES = [str, float, float, float, float, int]
+
+
+def get_peak_memory_megabytes(usage):
+    """
+    Return the peak resident set size, in megabytes, recorded in an instance
+    of resource.struct_rusage.
+    """
+    # ru_maxrss is measured in kilobytes on Linux, but in bytes on Mac OS X
+    divisor = 1024.0 * 1024 if sys.platform == "darwin" else 1024.0
+    return usage.ru_maxrss / divisor
+
+
+def record_stage_usage(metrics_file, stage_usage):
+    """
+    Append the resources used by a script stage to a metrics file.
+
+    The metrics file is a CSV file with a header line naming the fields of
+    StageUsage; it is created if it does not already exist.
+    metrics_file: Path of the metrics file.
+    stage_usage: A StageUsage instance.
+    """
+    write_header = not os.path.exists(metrics_file)
+    with open(metrics_file, "a") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        if write_header:
+            writer.writerow(StageUsage._fields)
+        writer.writerow([stage_usage.stage] +
+                        ["{v:.3f}".format(v=v) for v in stage_usage[1:-1]] +
+                        [stage_usage.exit_status])
+
+
+def read_stage_usage(metrics_file):
+    """
+    Read the resources most recently used by each stage of a script.
+
+    Return a list of StageUsage instances, one for each stage recorded in the
+    metrics file, in the order in which stages were first recorded. Where a
+    stage has been executed more than once (for example, because the script
+    was re-run), only its latest execution is returned. Return an empty list
+    if the metrics file does not exist.
+    metrics_file: Path of a metrics file written by record_stage_usage().
+    """
+    if not os.path.exists(metrics_file):
+        return []
+
+    stages = collections.OrderedDict()
+    with open(metrics_file) as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            if len(row) != len(_FIELD_TYPES):
+                continue
+            stages[row[0]] = StageUsage(
+                *[field_type(v) for field_type, v in zip(_FIELD_TYPES, row)])
+
+    return stages.values()
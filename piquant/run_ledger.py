@@ -0,0 +1,151 @@
+"""
+Classes for recording the state of read simulation and quantification runs
+in a persistent database. Exports:
+
+RunLedger: A persistent record of the state of runs, backed by SQLite.
+get_ledger_file: Return the path of the run ledger database in a directory.
+
+RunRecord: The recorded state of a single run.
+LEDGER_FILE: Name of the run ledger database file.
+STARTED: State of a run which has started but not yet finished.
+COMPLETED: State of a run which finished successfully.
+FAILED: State of a run which finished unsuccessfully.
+"""
+
+import collections
+import json
+import os.path
+import sqlite3
+
+LEDGER_FILE = "run_ledger.db"
+
+STARTED = "started"
+COMPLETED = "completed"
+FAILED = "failed"
+
+RunRecord = collections.namedtuple(
+    "RunRecord", ["run_name", "state", "start_time", "end_time",
+                  "exit_status", "output_checksums"])
+
+_CREATE_RUNS_TABLE = """
+    CREATE TABLE IF NOT EXISTS runs (
+        run_name TEXT PRIMARY KEY,
+        state TEXT NOT NULL,
+        start_time REAL,
+        end_time REAL,
+        exit_status INTEGER,
+        output_checksums TEXT)
+"""
+
+_SELECT_RUNS = "SELECT run_name, state, start_time, end_time, " + \
+    "exit_status, output_checksums FROM runs"
+
+
+def get_ledger_file(directory):
+    """
+    Return the path of the run ledger database in a directory.
+
+    directory: The parent output directory containing run directories.
+    """
+    return os.path.join(directory, LEDGER_FILE)
+
+
+def _to_run_record(row):
+    run_name, state, start_time, end_time, exit_status, checksums = row
+    checksums = json.loads(checksums) if checksums else {}
+    return RunRecord(str(run_name), str(state), start_time, end_time,
+                     exit_status, checksums)
+
+
+class RunLedger:
+    """
+    A persistent record of the state of runs, backed by SQLite.
+
+    Each run is identified by a name (e.g. the name of its run directory), and
+    for each, the ledger records its state, start and end times, exit status
+    and checksums (e.g. sizes and modification times) of its output files. A
+    RunLedger can be used as a context manager, closing the database
+    connection on exit.
+    """
+    def __init__(self, ledger_file):
+        self.connection = sqlite3.connect(ledger_file, timeout=60)
+        with self.connection:
+            self.connection.execute(_CREATE_RUNS_TABLE)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def record_started(self, run_name, start_time):
+        """
+        Record that a run has started, discarding any previous record of it.
+
+        run_name: The name of the run.
+        start_time: The time at which the run started, in seconds since the
+        epoch.
+        """
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO runs (run_name, state, start_time) " +
+                "VALUES (?, ?, ?)", (run_name, STARTED, start_time))
+
+    def record_finished(self, run_name, end_time, exit_status,
+                        output_checksums={}):
+        """
+        Record that a run has finished.
+
+        The run is recorded as COMPLETED if its exit status is zero, and as
+        FAILED otherwise.
+        run_name: The name of the run.
+        end_time: The time at which the run finished, in seconds since the
+        epoch.
+        exit_status: The exit status of the run.
+        output_checksums: A dictionary mapping from the names of the run's
+        output files to checksums identifying their content (for example,
+        their size and modification time).
+        """
+        state = COMPLETED if exit_status == 0 else FAILED
+        with self.connection:
+            updated = self.connection.execute(
+                "UPDATE runs SET state = ?, end_time = ?, exit_status = ?, " +
+                "output_checksums = ? WHERE run_name = ?",
+                (state, end_time, exit_status,
+                 json.dumps(output_checksums), run_name))
+            if updated.rowcount == 0:
+                self.connection.execute(
+                    "INSERT INTO runs (run_name, state, end_time, " +
+                    "exit_status, output_checksums) VALUES (?, ?, ?, ?, ?)",
+                    (run_name, state, end_time, exit_status,
+                     json.dumps(output_checksums)))
+
+    def get_run(self, run_name):
+        """
+        Return the RunRecord for a run, or None if the run is not recorded.
+
+        run_name: The name of the run.
+        """
+        row = self.connection.execute(
+            _SELECT_RUNS + " WHERE run_name = ?", (run_name,)).fetchone()
+        return _to_run_record(row) if row else None
+
+    def get_runs(self):
+        """
+        Return a dictionary mapping from run names to RunRecords for all runs.
+        """
+        return {record.run_name: record for record in
+                [_to_run_record(row) for row in
+                 self.connection.execute(_SELECT_RUNS)]}
+
+    def is_completed(self, run_name):
+        """
+        Return True if a run is recorded as having completed successfully.
+
+        run_name: The name of the run.
+        """
+        record = self.get_run(run_name)
+        return record is not None and record.state == COMPLETED
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+
+"""Usage:
+    shuffle_reads [{log_option_spec} --seed=<seed> --max-memory=<max-memory>] <reads-file> <out-file> [<right-out-file>]
+
+{help_option_spec}                       {help_option_description}
+{ver_option_spec}                    {ver_option_description}
+{log_option_spec}         {log_option_description}
+--seed=<seed>                   Seed for the random number generator used to shuffle reads; if not specified, reads are shuffled differently on each run.
+--max-memory=<max-memory>       Approximate maximum memory in megabytes to use when shuffling; larger reads files are shuffled in randomly assigned buckets via temporary files [default: 1024].
+<reads-file>                    FASTA/Q file (optionally gzipped) containing single or interleaved paired-end reads.
+<out-file>                      Output file for shuffled reads or, if <right-out-file> is specified, for the left reads of each shuffled pair.
+<right-out-file>                If specified, the reads file contains interleaved paired-end reads, and the right reads of each shuffled pair are written to this file.
+"""
+
+import docopt
+import fastx
+import itertools
+import math
+import numpy as np
+import options as opt
+import os
+import os.path
+import schema
+import shutil
+import tempfile
+
+SEED = "--seed"
+MAX_MEMORY = "--max-memory"
+READS_FILE = "<reads-file>"
+OUT_FILE = "<out-file>"
+RIGHT_OUT_FILE = "<right-out-file>"
+
+BUCKETING_CHUNK_SIZE = 100000
+
+# Approximate ratio of the memory used to hold reads in Python to the size of
+# the reads on disk
+_MEMORY_OVERHEAD = 3
+_BYTES_PER_MEGABYTE = 1024 * 1024
+
+_LEFT_READ_ID = "/1"
+
+
+def _validate_command_line_options(options):
+    try:
+        opt.validate_log_level(options)
+
+        opt.validate_file_option(
+            options[READS_FILE], "Reads file should exist")
+        options[SEED] = opt.validate_int_option(
+            options[SEED], "Random seed must be a non-negative integer",
+            nonneg=True, nullable=True)
+        options[MAX_MEMORY] = opt.validate_int_option(
+            options[MAX_MEMORY], "Maximum memory must be a positive integer",
+            nonneg=True)
+    except schema.SchemaError as exc:
+        exit("Exiting. " + exc.code)
+
+
+class _FragmentWriter:
+    """
+    Write fragments to one output file or, for paired-end reads, split each
+    fragment into its left and right reads and write these to separate
+    files. Output is written to temporary files which replace the output
+    files when the writer is closed, so that an output file may also be the
+    input reads file.
+    """
+    def __init__(self, out_files):
+        self.out_files = out_files
+        self.tmp_files = [out_file + ".tmp" for out_file in out_files]
+        self.handles = [fastx.open_reads_file(tmp_file, "w")
+                        for tmp_file in self.tmp_files]
+
+    def write(self, fragment):
+        if len(self.handles) == 1:
+            fastx.write_fragment(self.handles[0], fragment)
+            return
+
+        lines_per_read = len(fragment.lines) / 2
+        left = fragment.lines[:lines_per_read]
+        right = fragment.lines[lines_per_read:]
+        if _LEFT_READ_ID not in left[0] and _LEFT_READ_ID in right[0]:
+            left, right = right, left
+
+        self.handles[0].writelines(left)
+        self.handles[1].writelines(right)
+
+    def close(self):
+        for handle in self.handles:
+            handle.close()
+        for tmp_file, out_file in zip(self.tmp_files, self.out_files):
+            os.rename(tmp_file, out_file)
+
+
+def _get_num_buckets(reads_file, max_memory):
+    reads_size = os.path.getsize(reads_file) * _MEMORY_OVERHEAD
+    return max(1, int(math.ceil(
+        reads_size / float(max_memory * _BYTES_PER_MEGABYTE))))
+
+
+def _write_shuffled(fragments, random_state, writer):
+    for index in random_state.permutation(len(fragments)):
+        writer.write(fragments[index])
+
+
+def _yield_fragment_chunks(reads_file, paired_end):
+    fragments = fastx.read_fragments(reads_file, paired_end)
+    while True:
+        chunk = list(itertools.islice(fragments, BUCKETING_CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _write_buckets(reads_file, paired_end, bucket_files, random_state):
+    # Assign each fragment to a bucket file uniformly at random
+    handles = [fastx.open_reads_file(f, "w") for f in bucket_files]
+    try:
+        for chunk in _yield_fragment_chunks(reads_file, paired_end):
+            buckets = random_state.randint(len(handles), size=len(chunk))
+            for fragment, bucket in itertools.izip(chunk, buckets):
+                fastx.write_fragment(handles[bucket], fragment)
+    finally:
+        for handle in handles:
+            handle.close()
+
+
+def shuffle_reads(reads_file, out_files, seed=None, max_memory=1024,
+                  logger=None):
+    """
+    Shuffle the fragments in a reads file, optionally splitting paired-end
+    reads into separate files.
+
+    If the reads file is small enough to shuffle within the specified memory
+    limit, its fragments are read, shuffled and written in a single pass.
+    Otherwise fragments are first distributed uniformly at random between a
+    number of temporary bucket files, each small enough to shuffle in memory,
+    and the shuffled contents of each bucket are then written in turn.
+    reads_file: Path of a FASTA/Q file of single or interleaved paired-end
+    reads.
+    out_files: A list of one output file path for single-end reads, or two
+    for paired-end reads (left and right reads respectively).
+    seed: If not None, a seed for the random number generator.
+    max_memory: Approximate maximum memory to use, in megabytes.
+    logger: If not None, logs messages to standard error.
+    """
+    paired_end = len(out_files) == 2
+    random_state = np.random.RandomState(seed)
+    num_buckets = _get_num_buckets(reads_file, max_memory)
+
+    if num_buckets == 1:
+        if logger:
+            logger.info("Shuffling reads in memory...")
+        fragments = list(fastx.read_fragments(reads_file, paired_end))
+        writer = _FragmentWriter(out_files)
+        _write_shuffled(fragments, random_state, writer)
+        writer.close()
+        return
+
+    if logger:
+        logger.info("Shuffling reads via {n} temporary buckets...".format(
+            n=num_buckets))
+    bucket_dir = tempfile.mkdtemp(
+        dir=os.path.dirname(os.path.abspath(out_files[0])))
+    try:
+        suffix = os.path.basename(reads_file)
+        bucket_files = [os.path.join(bucket_dir, str(i) + "." + suffix)
+                        for i in range(num_buckets)]
+        _write_buckets(reads_file, paired_end, bucket_files, random_state)
+
+        writer = _FragmentWriter(out_files)
+        for bucket_file in bucket_files:
+            fragments = list(fastx.read_fragments(bucket_file, paired_end))
+            _write_shuffled(fragments, random_state, writer)
+        writer.close()
+    finally:
+        shutil.rmtree(bucket_dir)
+
+
+def _shuffle_reads(logger, options):
+    out_files = [options[OUT_FILE]]
+    if options[RIGHT_OUT_FILE]:
+        out_files.append(options[RIGHT_OUT_FILE])
+
+    logger.info("Shuffling reads from {f}".format(f=options[READS_FILE]))
+    shuffle_reads(options[READS_FILE], out_files, seed=options[SEED],
+                  max_memory=options[MAX_MEMORY], logger=logger)
+
+
+if __name__ == "__main__":
+    # Read in command-line options
+    __doc__ = opt.substitute_common_options_into_usage(__doc__)
+    options = docopt.docopt(__doc__, version="shuffle_reads v0.1")
+
+    # Validate command-line options
+    _validate_command_line_options(options)
+
+    # Set up logger
+    logger = opt.get_logger_for_options(options)
+
+    # Shuffle reads, splitting paired-end reads into separate files
+    _shuffle_reads(logger, options)
@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 
 """Usage:
-    simulate_read_bias [{log_option_spec}] --out-prefix=<out-prefix> --paired-end] --num-reads=<num-reads> <pwm-file> <reads_file>
+    simulate_read_bias [{log_option_spec} --out-prefix=<out-prefix> --paired-end --seed=<seed>] --num-reads=<num-reads> <pwm-file> <reads_file>
 
 {help_option_spec}                   {help_option_description}
 {ver_option_spec}                {ver_option_description}
@@ -9,54 +9,29 @@
 -n --num-reads=<num-reads>  Number of reads to output.
 --out-prefix=<out-prefix>   String to be prepended to input file names for output [default: bias]
 --paired-end                Indicates the reads file contains paired-end reads.
+--seed=<seed>               Seed for the random number generator used to select reads; if not specified, a different selection is made on each run.
 <pwm-file>                  PWM file with positional base weights used to bias reads.
-<reads_file>                FASTA/Q file containing single or paired end reads.
+<reads_file>                FASTA/Q file (optionally gzipped) containing single or paired end reads.
 """
 
-import collections
 import docopt
+import fastx
+import itertools
+import numpy as np
 import options as opt
 import os.path
 import pwm
-import random
 import schema
 import sys
 
 NUM_READS = "--num-reads"
 OUT_PREFIX = "--out-prefix"
 PAIRED_END = "--paired-end"
+SEED = "--seed"
 PWM_FILE = "<pwm-file>"
 READS_FILE = "<reads_file>"
 
-
-ReadScore = collections.namedtuple("ReadScore", ["read_number", "score"])
-
-
-class SequenceLinePicker:
-    def __init__(self, lines_per_fragment):
-        self.lines_per_fragment = lines_per_fragment
-
-    def __call__(self, line_no, line):
-        return (line_no - 1) % self.lines_per_fragment == 0
-
-
-class OutputPicker:
-    def __init__(self, scores, lines_per_fragment):
-        self.scores = scores
-        self.lines_per_fragment = lines_per_fragment
-        self.index = 0
-
-    def __call__(self, line_no, line):
-        if self.index >= len(self.scores):
-            return False
-
-        read_number = line_no / self.lines_per_fragment
-        if self.scores[self.index].read_number < read_number:
-            self.index += 1
-            if self.index >= len(self.scores):
-                return False
-
-        return self.scores[self.index].read_number == read_number
+SCORING_CHUNK_SIZE = 100000
 
 
 def _validate_command_line_options(options):
@@ -66,6 +41,9 @@ def _validate_command_line_options(options):
         options[NUM_READS] = opt.validate_int_option(
             options[NUM_READS],
             "Number of reads must be non-negative", nonneg=True)
+        options[SEED] = opt.validate_int_option(
+            options[SEED], "Random seed must be a non-negative integer",
+            nonneg=True, nullable=True)
         opt.validate_file_option(
             options[PWM_FILE], "PWM file should exist")
         opt.validate_file_option(
@@ -74,59 +52,81 @@ def _validate_command_line_options(options):
         exit(exc.code)
 
 
-def _get_fragment_counts(reads_file, num_reads, paired_end):
-    with_errors = reads_file.endswith("fastq")
+def _get_num_fragments(num_reads, paired_end):
+    return num_reads / 2 if paired_end else num_reads
 
-    num_fragments = num_reads
-    lines_per_fragment = 2
-    if with_errors:
-        lines_per_fragment *= 2
-    if paired_end:
-        num_fragments /= 2
-        lines_per_fragment *= 2
 
-    return num_fragments, lines_per_fragment
+def _yield_fragment_chunks(reads_file, paired_end):
+    # Yield lists of consecutive fragments
+    fragments = fastx.read_fragments(reads_file, paired_end)
+    while True:
+        chunk = list(itertools.islice(fragments, SCORING_CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk
 
 
-def _yield_elements(enumerable, element_picker):
-    return (elem for elem_no, elem in enumerate(enumerable)
-            if element_picker(elem_no, elem))
+def _score_sequences(bias_pwm, sequences, random_state):
+    # Score each fragment by the product of its PWM score and a uniform random
+    # number; scores are held as logarithms
+    return np.log(random_state.random_sample(len(sequences))) + \
+        bias_pwm.log_scores(sequences)
 
 
-def _score_fragments(reads_file, bias_pwm, num_fragments, lines_per_fragment):
-    scores = []
-    with open(reads_file, 'r') as f:
-        for i, line in enumerate(
-                _yield_elements(f, SequenceLinePicker(lines_per_fragment))):
-            score = ReadScore(
-                i, random.random() * bias_pwm.score(line.strip()))
-            scores.append(score)
+def _select_top_scores(scores, offsets, num_fragments):
+    if len(scores) <= num_fragments:
+        return scores, offsets
+
+    top = np.argpartition(-scores, num_fragments - 1)[:num_fragments] \
+        if num_fragments > 0 else np.empty(0, dtype=np.int64)
+    return scores[top], offsets[top]
 
-    if num_fragments > len(scores):
-        sys.exit("Input file(s) did not contain enough fragments " +
-                 "({ni} found, {no} required)".
-                 format(ni=len(scores), no=num_fragments))
 
-    return scores
+def _select_fragments(reads_file, bias_pwm, num_fragments, paired_end,
+                      random_state):
+    """
+    Select the highest scoring fragments from a reads file.
 
+    Stream through the reads file once, scoring fragments a chunk at a time
+    and retaining only the 'num_fragments' highest scores seen so far, so that
+    memory use is proportional to the number of fragments selected rather
+    than to the size of the input. Return a sorted array of the file offsets
+    of the selected fragments, and the total number of fragments scored.
+    Random numbers are drawn from 'random_state', a numpy RandomState, so that
+    a seeded selection is reproducible.
+    """
+    top_scores = np.empty(0)
+    top_offsets = np.empty(0, dtype=np.int64)
+    num_scored = 0
 
-def _select_scores(scores, num_fragments):
-    selected_scores = scores[:]
-    selected_scores.sort(key=lambda x: x.score, reverse=True)
-    selected_scores = selected_scores[1: num_fragments]
-    selected_scores.sort(key=lambda x: x.read_number)
-    return selected_scores
+    for fragments in _yield_fragment_chunks(reads_file, paired_end):
+        sequences = [f.lines[1].rstrip() for f in fragments]
+        scores = _score_sequences(bias_pwm, sequences, random_state)
+        offsets = np.array([f.offset for f in fragments], dtype=np.int64)
+        num_scored += len(fragments)
 
+        top_scores, top_offsets = _select_top_scores(
+            np.concatenate([top_scores, scores]),
+            np.concatenate([top_offsets, offsets]),
+            num_fragments)
 
-def _write_output_file(input_file, scores, lines_per_fragment):
+    if num_fragments > num_scored:
+        sys.exit("Input file(s) did not contain enough fragments " +
+                 "({ni} found, {no} required)".
+                 format(ni=num_scored, no=num_fragments))
+
+    return np.sort(top_offsets), num_scored
+
+
+def _write_output_file(input_file, offsets, paired_end):
     dirname = os.path.dirname(os.path.abspath(input_file))
     basename = os.path.basename(input_file)
     output_file = os.path.join(dirname, options[OUT_PREFIX] + "." + basename)
 
-    with open(input_file, 'r') as in_f, open(output_file, 'w') as out_f:
-        for i, line in enumerate(_yield_elements(
-                in_f, OutputPicker(scores, lines_per_fragment))):
-            out_f.write(line)
+    with fastx.open_reads_file(output_file, "w") as out_f:
+        for fragment in fastx.read_fragments_at(
+                input_file, offsets, paired_end):
+            fastx.write_fragment(out_f, fragment)
 
 
 def _simulate_bias(logger, options):
@@ -134,24 +134,21 @@ def _simulate_bias(logger, options):
     logger.info("Reading PWM file " + options[PWM_FILE])
     bias_pwm = pwm.PWM(options[PWM_FILE])
 
-    # Iterate through fragments, storing positions and scores
-    logger.info("Scoring fragments according to PWM")
-    num_fragments, lines_per_fragment = _get_fragment_counts(
-        options[READS_FILE], options[NUM_READS], options[PAIRED_END])
-    scores = _score_fragments(
-        options[READS_FILE], bias_pwm, num_fragments, lines_per_fragment)
-    logger.info("...scored {n} fragments.".format(n=len(scores)))
-
-    # Sort fragments by score and select the required number of highest-scoring
-    # fragments
-    logger.info("Sorting and selecting {n} highest scoring fragments ".
-                format(n=num_fragments))
-    selected_scores = _select_scores(scores, num_fragments)
+    # Iterate through fragments, scoring them according to the PWM and
+    # retaining the required number of highest-scoring fragments
+    num_fragments = _get_num_fragments(
+        options[NUM_READS], options[PAIRED_END])
+    logger.info("Scoring fragments according to PWM and selecting " +
+                "{n} highest scoring fragments".format(n=num_fragments))
+    selected_offsets, num_scored = _select_fragments(
+        options[READS_FILE], bias_pwm, num_fragments, options[PAIRED_END],
+        np.random.RandomState(options[SEED]))
+    logger.info("...scored {n} fragments.".format(n=num_scored))
 
     # Write selected fragments to output file(s)
     logger.info("Writing selected fragments to output files")
-    _write_output_file(options[READS_FILE], selected_scores,
-                       lines_per_fragment)
+    _write_output_file(options[READS_FILE], selected_offsets,
+                       options[PAIRED_END])
 
 
 if __name__ == "__main__":
@@ -4,22 +4,24 @@ transcript quantification run. Exports:
 
 get_statistics: Return all statistic instances.
 get_graphable_statistics: Return statistic instances suitable for graphing.
+get_resource_statistics: Return all resource statistic instances.
 """
 
 import classifiers
 import itertools
 import math
-import os.path
+import numpy as np
 import tpms as t
 
 TP_NUM_TPMS = "tp-num-tpms"
-OVERALL_STATS_PREFIX = "overall"
 
-_SUMMARY_COUNT = "count"
-_SUMMARY_MEDIAN = "50%"
 _ZERO_TO_ONE_STAT_RANGE = (-0.025, 1.025)
 
+_COUNT = t.Aggregation(t.COUNT, None, False)
+_TP_COUNT = t.Aggregation(t.COUNT, None, True)
+
 _STATISTICS = []
+_RESOURCE_STATISTICS = []
 
 
 def get_statistics():
@@ -32,15 +34,30 @@ def get_statistics():
     return set(_STATISTICS)
 
 
-def get_graphable_statistics():
+def get_graphable_statistics(include_resource=False):
     """Return a set of statistic instances suitable for graphing.
 
     Return a set of objects each of which can calculate a certain statistic
     from the results of a transcript quantification run, and is interesting to
     plot across as a certain parameter (e.g. read length) is varied across
     quantification runs.
+    include_resource: If True, graphable resource statistics are also
+    returned.
     """
-    return set([s for s in get_statistics() if s.graphable])
+    stats = get_statistics()
+    if include_resource:
+        stats |= get_resource_statistics()
+    return set([s for s in stats if s.graphable])
+
+
+def get_resource_statistics():
+    """Return a set of all resource statistics instances.
+
+    Return a set of objects each of which can calculate a certain statistic
+    from the computational resources used by the quantification tool in a
+    transcript quantification run.
+    """
+    return set(_RESOURCE_STATISTICS)
 
 
 def get_stratified_stats_types():
@@ -54,17 +71,19 @@ def get_stratified_stats_types():
             for c, asc in itertools.product(dist_clsfrs, [True, False])]
 
 
-def get_stats_file(directory, prefix, classifier=None, ascending=False):
-    return os.path.join(directory, prefix) + \
-        (classifier.get_stats_file_suffix(ascending=ascending)
-            if classifier else "_stats") + ".csv"
-
-
 def write_stats_data(filename, data_frame, **kwargs):
     with open(filename, "w") as out_file:
         data_frame.to_csv(out_file, float_format="%.5f", **kwargs)
 
 
+def _fraction_or_one(numerators, others):
+    # Calculate, element-wise, numerator / (numerator + other), or 1 where
+    # both are zero
+    totals = numerators + others
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(totals == 0, 1, numerators / totals)
+
+
 def _Statistic(cls):
     # Mark a class as capable of calculate a statistic for the results of a
     # quantification run.
@@ -72,12 +91,20 @@ def _Statistic(cls):
     return cls
 
 
+def _ResourceStatistic(cls):
+    # Mark a class as capable of calculating a statistic for the resources
+    # used by the quantification tool in a quantification run.
+    _RESOURCE_STATISTICS.append(cls())
+    return cls
+
+
 class _BaseStatistic():
     # Base for classes capable of calculating a statistic
-    def __init__(self, name, title, graphable=True):
+    def __init__(self, name, title, graphable=True, aggregations=[]):
         self.name = name
         self.title = title
         self.graphable = graphable
+        self.aggregations = aggregations
 
     def calculate(self, tpms, tp_tpms):
         """Calculate the statistic for a set of TPMs.
@@ -92,23 +119,16 @@ class _BaseStatistic():
         """
         raise NotImplementedError
 
-    def calculate_grouped(
-            self, grouped, grp_summary, tp_grouped, tp_grp_summary):
+    def calculate_grouped(self, aggregates):
         """Calculate the statistic for a set of TPMs grouped by a classifier.
 
         Calculate a set of statistic values for the results of a quantification
         run which have been grouped according to a certain method of
-        classifying transcripts. Should return a pandas Series instance.
-        grouped: A pandas GroupBy instance describing the results of a
-        quantification run grouped by a certain classifier of transcripts.
-        grp_summary: A pandas DataFrame containing basic summary statistics
-        calculated for 'grouped'.
-        tp_grouped: A pandas GroupBy instance describing those results of a
-        quantification run for which both real and calculated TPMs were above
-        a threshold value indicating "presence" of the transcript, grouped
-        by a certain classifier of transcripts.
-        tp_grp_summary: A pandas DataFrame containing basic sumnmary statistics
-        calculated for 'tp_grouped'.
+        classifying transcripts. Should return a numpy array, or pandas
+        Series, with one value per group.
+        aggregates: A dictionary mapping each of the tpms.Aggregation
+        instances in this statistic's 'aggregations' attribute to a numpy
+        array of the values of that aggregation for each group of transcripts.
         """
         raise NotImplementedError
 
@@ -120,15 +140,14 @@ class _BaseStatistic():
 class _NumberOfTPMs(_BaseStatistic):
     # Calculates the total number of transcript TPMs in the results.
     def __init__(self):
-        _BaseStatistic.__init__(self, "num-tpms", "No. TPMs", graphable=False)
+        _BaseStatistic.__init__(self, "num-tpms", "No. TPMs", graphable=False,
+                                aggregations=[_COUNT])
 
     def calculate(self, tpms, tp_tpms):
         return len(tpms)
 
-    def calculate_grouped(
-            self, grouped, grp_summary, tp_grouped, tp_grp_summary):
-        stats = grp_summary[t.REAL_TPM].unstack()
-        return stats[_SUMMARY_COUNT]
+    def calculate_grouped(self, aggregates):
+        return aggregates[_COUNT]
 
     def stat_range(self, vals_range):
         return (0, None)
@@ -140,15 +159,14 @@ class _NumberOfTruePositiveTPMs(_BaseStatistic):
     # both real and calculated TPMs are above a threshold value indicating
     # 'presence' of the transcript.
     def __init__(self):
-        _BaseStatistic.__init__(self, TP_NUM_TPMS, "No. true positive TPMs")
+        _BaseStatistic.__init__(self, TP_NUM_TPMS, "No. true positive TPMs",
+                                aggregations=[_TP_COUNT])
 
     def calculate(self, tpms, tp_tpms):
         return len(tp_tpms)
 
-    def calculate_grouped(
-            self, grouped, grp_summary, tp_grouped, tp_grp_summary):
-        stats = tp_grp_summary[t.REAL_TPM].unstack()
-        return stats[_SUMMARY_COUNT]
+    def calculate_grouped(self, aggregates):
+        return aggregates[_TP_COUNT]
 
     def stat_range(self, vals_range):
         return (0, None)
@@ -160,9 +178,14 @@ class _SpearmanCorrelation(_BaseStatistic):
     # and real TPMs for 'true positive' transcript TPMs (those for which both
     # real and calculated TPM were above a threshold value indicating
     # 'presence' of the transcript).
+
+    RHO = t.Aggregation(
+        t.RANK_CORRELATION, (t.LOG10_CALCULATED_TPM, t.LOG10_REAL_TPM), True)
+
     def __init__(self):
         _BaseStatistic.__init__(
-            self, "tp-log-tpm-rho", "Spearman's rho")
+            self, "tp-log-tpm-rho", "Spearman's rho",
+            aggregations=[self.RHO])
 
     @staticmethod
     def _calculate(tpms):
@@ -172,9 +195,8 @@ class _SpearmanCorrelation(_BaseStatistic):
     def calculate(self, tpms, tp_tpms):
         return _SpearmanCorrelation._calculate(tp_tpms)
 
-    def calculate_grouped(
-            self, grouped, grp_summary, tp_grouped, tp_grp_summary):
-        return tp_grouped.apply(_SpearmanCorrelation._calculate)
+    def calculate_grouped(self, aggregates):
+        return aggregates[_SpearmanCorrelation.RHO]
 
     def stat_range(self, vals_range):
         min_val = math.floor(vals_range[0] * 5) / 5.0
@@ -190,9 +212,16 @@ class _TruePositiveErrorFraction(_BaseStatistic):
 
     ERROR_PERCENTAGE_THRESHOLD = 10
 
+    NUM_ERRORS = t.Aggregation(
+        t.SUM,
+        lambda tpms: abs(tpms[t.PERCENT_ERROR]) >
+        _TruePositiveErrorFraction.ERROR_PERCENTAGE_THRESHOLD,
+        True)
+
     def __init__(self):
         _BaseStatistic.__init__(
-            self, "tp-error-frac", "True positive error fraction")
+            self, "tp-error-frac", "True positive error fraction",
+            aggregations=[_TP_COUNT, self.NUM_ERRORS])
 
     @staticmethod
     def _calculate(tpms, error_percent):
@@ -203,11 +232,10 @@ class _TruePositiveErrorFraction(_BaseStatistic):
         return _TruePositiveErrorFraction._calculate(
             tp_tpms, _TruePositiveErrorFraction.ERROR_PERCENTAGE_THRESHOLD)
 
-    def calculate_grouped(
-            self, grouped, grp_summary, tp_grouped, tp_grp_summary):
-        return tp_grouped.apply(
-            _TruePositiveErrorFraction._calculate,
-            _TruePositiveErrorFraction.ERROR_PERCENTAGE_THRESHOLD)
+    def calculate_grouped(self, aggregates):
+        with np.errstate(invalid="ignore"):
+            return aggregates[_TruePositiveErrorFraction.NUM_ERRORS] / \
+                aggregates[_TP_COUNT]
 
     def stat_range(self, vals_range):
         return _ZERO_TO_ONE_STAT_RANGE
@@ -219,17 +247,19 @@ class _MedianPercentError(_BaseStatistic):
     # real TPMs for 'true positive' transcript TPMs (those for which both
     # real and calculated TPMs were above a threshold value indicating
     # 'presence' of the transcript).
+
+    MEDIAN = t.Aggregation(t.MEDIAN, t.PERCENT_ERROR, True)
+
     def __init__(self):
         _BaseStatistic.__init__(
-            self, "tp-median-percent-error", "True positive median % error")
+            self, "tp-median-percent-error", "True positive median % error",
+            aggregations=[self.MEDIAN])
 
     def calculate(self, tpms, tp_tpms):
         return tp_tpms[t.PERCENT_ERROR].median()
 
-    def calculate_grouped(
-            self, grouped, grp_summary, tp_grouped, tp_grp_summary):
-        stats = tp_grp_summary[t.PERCENT_ERROR].unstack()
-        return stats[_SUMMARY_MEDIAN]
+    def calculate_grouped(self, aggregates):
+        return aggregates[_MedianPercentError.MEDIAN]
 
     def stat_range(self, vals_range):
         division = 5.0
@@ -250,8 +280,14 @@ class _Sensitivity(_BaseStatistic):
     # (their real TPM above a threshold value - that is, both true positives
     # and false negatives), which were correctly identified as being present
     # (just the true positives).
+
+    NUM_TP = t.Aggregation(t.SUM, t.TRUE_POSITIVE, False)
+    NUM_FN = t.Aggregation(t.SUM, t.FALSE_NEGATIVE, False)
+
     def __init__(self):
-        _BaseStatistic.__init__(self, "sensitivity", "Sensitivity")
+        _BaseStatistic.__init__(
+            self, "sensitivity", "Sensitivity",
+            aggregations=[self.NUM_TP, self.NUM_FN])
 
     @staticmethod
     def _calculate(tpms):
@@ -264,9 +300,9 @@ class _Sensitivity(_BaseStatistic):
     def calculate(self, tpms, tp_tpms):
         return _Sensitivity._calculate(tpms)
 
-    def calculate_grouped(
-            self, grouped, grp_summary, tp_grouped, tp_grp_summary):
-        return grouped.apply(_Sensitivity._calculate)
+    def calculate_grouped(self, aggregates):
+        return _fraction_or_one(aggregates[_Sensitivity.NUM_TP],
+                                aggregates[_Sensitivity.NUM_FN])
 
     def stat_range(self, vals_range):
         min_val = math.floor(vals_range[0] * 5) / 5.0
@@ -280,8 +316,14 @@ class _Specificity(_BaseStatistic):
     # (their real TPM below a threshold value - that is, both true negatives
     # and false positives), which were correctly identified as being present
     # (just the true negatives).
+
+    NUM_FP = t.Aggregation(t.SUM, t.FALSE_POSITIVE, False)
+    NUM_TN = t.Aggregation(t.SUM, t.TRUE_NEGATIVE, False)
+
     def __init__(self):
-        _BaseStatistic.__init__(self, "specificity", "Specificity")
+        _BaseStatistic.__init__(
+            self, "specificity", "Specificity",
+            aggregations=[self.NUM_FP, self.NUM_TN])
 
     @staticmethod
     def _calculate(tpms):
@@ -294,10 +336,88 @@ class _Specificity(_BaseStatistic):
     def calculate(self, tpms, tp_tpms):
         return _Specificity._calculate(tpms)
 
-    def calculate_grouped(
-            self, grouped, grp_summary, tp_grouped, tp_grp_summary):
-        return grouped.apply(_Specificity._calculate)
+    def calculate_grouped(self, aggregates):
+        return _fraction_or_one(aggregates[_Specificity.NUM_TN],
+                                aggregates[_Specificity.NUM_FP])
 
     def stat_range(self, vals_range):
         min_val = math.floor(vals_range[0] * 5) / 5.0
         return (min_val - 0.01, 1.01)
+
+
+class _BaseResourceStatistic(_BaseStatistic):
+    # Base for classes capable of calculating a statistic from the resources
+    # used by the quantification stage of a run, rather than from its TPMs
+    def __init__(self, name, title):
+        _BaseStatistic.__init__(self, name, title)
+
+    def calculate_for_usage(self, usage, num_reads):
+        """Calculate the statistic for the resources used to quantify reads.
+
+        Calculate a single statistic value from the resources used by the
+        quantification tool in a quantification run. NaN is returned if the
+        resources used were not recorded, or quantification failed.
+        usage: A resource_usage.StageUsage instance describing the
+        resources used by the quantification stage of the run, or None.
+        num_reads: The number of reads quantified, or None if not known.
+        """
+        if usage is None or usage.exit_status != 0:
+            return np.nan
+        return self._calculate_for_usage(usage, num_reads)
+
+    def _calculate_for_usage(self, usage, num_reads):
+        raise NotImplementedError
+
+    def stat_range(self, vals_range):
+        return (0, None)
+
+
+@_ResourceStatistic
+class _QuantificationTime(_BaseResourceStatistic):
+    # Calculates the elapsed time, in seconds, taken by the quantification
+    # tool to estimate transcript abundances.
+    def __init__(self):
+        _BaseResourceStatistic.__init__(
+            self, "quant-time", "Quantification time (s)")
+
+    def _calculate_for_usage(self, usage, num_reads):
+        return usage.wall_time
+
+
+@_ResourceStatistic
+class _QuantificationCPUTime(_BaseResourceStatistic):
+    # Calculates the CPU time (user and system), in seconds, used by the
+    # quantification tool to estimate transcript abundances, summed over all
+    # of its processes and threads.
+    def __init__(self):
+        _BaseResourceStatistic.__init__(
+            self, "quant-cpu-time", "Quantification CPU time (s)")
+
+    def _calculate_for_usage(self, usage, num_reads):
+        return usage.user_time + usage.system_time
+
+
+@_ResourceStatistic
+class _QuantificationPeakMemory(_BaseResourceStatistic):
+    # Calculates the peak memory (maximum resident set size), in megabytes,
+    # of the largest process started by the quantification tool.
+    def __init__(self):
+        _BaseResourceStatistic.__init__(
+            self, "quant-peak-memory", "Quantification peak memory (MB)")
+
+    def _calculate_for_usage(self, usage, num_reads):
+        return usage.peak_memory_mb
+
+
+@_ResourceStatistic
+class _QuantificationThroughput(_BaseResourceStatistic):
+    # Calculates the number of reads quantified per second of elapsed time
+    # taken by the quantification tool.
+    def __init__(self):
+        _BaseResourceStatistic.__init__(
+            self, "quant-throughput", "Quantification throughput (reads/s)")
+
+    def _calculate_for_usage(self, usage, num_reads):
+        if num_reads is None or usage.wall_time <= 0:
+            return np.nan
+        return num_reads / usage.wall_time
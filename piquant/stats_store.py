@@ -0,0 +1,133 @@
+"""
+Classes for maintaining a consolidated store of the statistics calculated for
+many quantification runs, so that per-run statistics files need only be read
+when they are new or have changed. Exports:
+
+StatsStore: A consolidated store of statistics for quantification runs.
+
+STORE_DIRECTORY: Default name for a directory of consolidated stats stores.
+RUN_NAME_COLUMN: Name of the column identifying the run for each stats row.
+"""
+
+import csv
+import os
+import os.path
+import pandas as pd
+import tempfile
+
+STORE_DIRECTORY = "stats_store"
+RUN_NAME_COLUMN = "run_name"
+
+_DATA_SUFFIX = ".csv"
+_INDEX_SUFFIX = "_index.csv"
+_INDEX_HEADER = [RUN_NAME_COLUMN, "mtime", "size"]
+
+
+def _get_file_key(stats_file):
+    file_stat = os.stat(stats_file)
+    return (file_stat.st_mtime, file_stat.st_size)
+
+
+def _write_atomically(out_file, writer):
+    tmp_fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(out_file))
+    try:
+        with os.fdopen(tmp_fd, "w") as f:
+            writer(f)
+        os.rename(tmp_file, out_file)
+    except:
+        os.remove(tmp_file)
+        raise
+
+
+class StatsStore:
+    """
+    A consolidated store of the statistics for many quantification runs.
+
+    The store consists of a CSV file containing the statistics rows for all
+    runs ingested so far, each labelled with its run name, and an index file
+    recording the modification time and size of the per-run statistics file
+    from which each run's rows were read.
+    """
+    def __init__(self, store_dir, name):
+        self.data_file = os.path.join(store_dir, name + _DATA_SUFFIX)
+        self.index_file = os.path.join(store_dir, name + _INDEX_SUFFIX)
+        self.run_stats = {}
+        self.file_keys = {}
+        self._load()
+
+    def _load(self):
+        if not (os.path.exists(self.data_file) and
+                os.path.exists(self.index_file)):
+            return
+
+        with open(self.index_file) as f:
+            rows = list(csv.reader(f))[1:]
+        file_keys = {run_name: (float(mtime), int(size))
+                     for run_name, mtime, size in rows}
+
+        data = pd.read_csv(self.data_file)
+        run_stats = {run_name: stats.drop(RUN_NAME_COLUMN, axis=1)
+                     for run_name, stats in data.groupby(RUN_NAME_COLUMN)}
+
+        # Only trust runs present in both files, in case a previous write of
+        # the store was interrupted between the two
+        self.file_keys = {run_name: key for run_name, key in file_keys.items()
+                          if run_name in run_stats}
+        self.run_stats = {run_name: run_stats[run_name]
+                          for run_name in self.file_keys}
+
+    def update(self, run_stats_files):
+        """
+        Ingest new or changed per-run statistics files into the store.
+
+        Read each per-run statistics file whose modification time or size
+        differs from when it was last ingested, or which has not been
+        ingested before. Return the number of files read.
+        run_stats_files: A list of (run name, statistics file path) pairs.
+        """
+        num_read = 0
+        for run_name, stats_file in run_stats_files:
+            file_key = _get_file_key(stats_file)
+            if self.file_keys.get(run_name) != file_key:
+                self.run_stats[run_name] = pd.read_csv(stats_file)
+                self.file_keys[run_name] = file_key
+                num_read += 1
+        return num_read
+
+    def get_stats(self, run_names):
+        """
+        Return a DataFrame of the statistics for the specified runs.
+
+        The statistics rows for each run appear in the order in which run
+        names are given.
+        run_names: A list of the names of runs ingested into the store.
+        """
+        if not run_names:
+            return pd.DataFrame()
+        return pd.concat([self.run_stats[run_name] for run_name in run_names],
+                         ignore_index=True)
+
+    def write(self):
+        """
+        Write the contents of the store to its data and index files.
+        """
+        run_names = sorted(self.run_stats.keys())
+        if not run_names:
+            return
+
+        if not os.path.exists(os.path.dirname(self.data_file)):
+            os.mkdir(os.path.dirname(self.data_file))
+
+        data = pd.concat(
+            [self.run_stats[run_name] for run_name in run_names],
+            keys=run_names, names=[RUN_NAME_COLUMN]).reset_index(level=0)
+        _write_atomically(
+            self.data_file, lambda f: data.to_csv(f, index=False))
+
+        def write_index(f):
+            writer = csv.writer(f)
+            writer.writerow(_INDEX_HEADER)
+            for run_name in run_names:
+                mtime, size = self.file_keys[run_name]
+                writer.writerow([run_name, repr(mtime), size])
+        _write_atomically(self.index_file, write_index)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+
+"""Usage:
+    subsample_reads [{log_option_spec} --seed=<seed>] --num-reads=<num-reads> --out-dir=<out-dir> <reads-file>...
+
+{help_option_spec}                   {help_option_description}
+{ver_option_spec}                {ver_option_description}
+{log_option_spec}     {log_option_description}
+-n --num-reads=<num-reads>  Number of reads to output.
+--out-dir=<out-dir>         Directory to which subsampled reads files, with the same names as the input reads files, will be written.
+--seed=<seed>               Seed for the random number generator used to select reads; if not specified, a different selection is made on each run.
+<reads-file>                FASTA/Q file (optionally gzipped) containing single-end reads, or two such files containing the left and right reads of paired-end reads.
+"""
+
+import docopt
+import fastx
+import itertools
+import numpy as np
+import options as opt
+import os.path
+import schema
+import sys
+
+NUM_READS = "--num-reads"
+OUT_DIRECTORY = "--out-dir"
+SEED = "--seed"
+READS_FILES = "<reads-file>"
+
+SAMPLING_CHUNK_SIZE = 100000
+
+
+def _validate_command_line_options(options):
+    try:
+        opt.validate_log_level(options)
+
+        options[NUM_READS] = opt.validate_int_option(
+            options[NUM_READS],
+            "Number of reads must be non-negative", nonneg=True)
+        opt.validate_dir_option(
+            options[OUT_DIRECTORY], "Output directory should exist")
+        options[SEED] = opt.validate_int_option(
+            options[SEED], "Random seed must be a non-negative integer",
+            nonneg=True, nullable=True)
+
+        if len(options[READS_FILES]) > 2:
+            raise schema.SchemaError(
+                None, "At most two reads files should be specified")
+        for reads_file in options[READS_FILES]:
+            opt.validate_file_option(reads_file, "Reads file should exist")
+            if os.path.dirname(os.path.abspath(reads_file)) == \
+                    os.path.abspath(options[OUT_DIRECTORY]):
+                raise schema.SchemaError(
+                    None, "Output directory should not contain reads file")
+    except schema.SchemaError as exc:
+        exit("Exiting. " + exc.code)
+
+
+def _yield_fragment_chunks(reads_files):
+    # Yield lists of consecutive fragments; for paired-end reads, each
+    # fragment is a tuple of the corresponding reads in each file
+    fragments = itertools.izip(
+        *[fastx.read_fragments(f) for f in reads_files])
+    while True:
+        chunk = list(itertools.islice(fragments, SAMPLING_CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+
+def subsample_reads(reads_files, out_files, num_fragments, random_state):
+    """
+    Write a uniform random sample of the fragments in a set of reads files.
+
+    Stream once through the reads files, drawing the number of fragments to
+    sample from each chunk from a hypergeometric distribution, and then the
+    fragments themselves uniformly at random from within the chunk; hence
+    exactly 'num_fragments' fragments are output, each subset of that size
+    being equally likely. Sampled fragments are written in the order in which
+    they occur in the input. Return the total number of fragments in the input
+    files.
+    reads_files: A list of one reads file path for single-end reads, or two
+    for paired-end reads (left and right reads respectively).
+    out_files: A list of output file paths corresponding to 'reads_files'.
+    num_fragments: The number of fragments to sample.
+    random_state: A numpy RandomState from which random numbers are drawn.
+    """
+    num_remaining = fastx.count_fragments(reads_files[0])
+    if num_fragments > num_remaining:
+        sys.exit("Input file(s) did not contain enough fragments " +
+                 "({ni} found, {no} required)".
+                 format(ni=num_remaining, no=num_fragments))
+    num_input = num_remaining
+
+    out_handles = [fastx.open_reads_file(f, "w") for f in out_files]
+    try:
+        for chunk in _yield_fragment_chunks(reads_files):
+            if num_fragments == 0:
+                break
+
+            num_sampled = num_fragments if len(chunk) == num_remaining \
+                else random_state.hypergeometric(
+                    len(chunk), num_remaining - len(chunk), num_fragments)
+            for index in np.sort(random_state.choice(
+                    len(chunk), num_sampled, replace=False)):
+                for handle, fragment in zip(out_handles, chunk[index]):
+                    fastx.write_fragment(handle, fragment)
+
+            num_remaining -= len(chunk)
+            num_fragments -= num_sampled
+    finally:
+        for handle in out_handles:
+            handle.close()
+
+    return num_input
+
+
+def _subsample_reads(logger, options):
+    reads_files = options[READS_FILES]
+    out_files = [os.path.join(options[OUT_DIRECTORY], os.path.basename(f))
+                 for f in reads_files]
+    num_fragments = options[NUM_READS] / len(reads_files)
+
+    logger.info("Sampling {n} fragments from {f}".format(
+        n=num_fragments, f=", ".join(reads_files)))
+    num_input = subsample_reads(
+        reads_files, out_files, num_fragments,
+        np.random.RandomState(options[SEED]))
+    logger.info("...sampled from {n} fragments.".format(n=num_input))
+
+
+if __name__ == "__main__":
+    # Read in command-line options
+    __doc__ = opt.substitute_common_options_into_usage(__doc__)
+    options = docopt.docopt(__doc__, version="subsample_reads v0.1")
+
+    # Validate command-line options
+    _validate_command_line_options(options)
+
+    # Set up logger
+    logger = opt.get_logger_for_options(options)
+
+    # Write a uniform random sample of the input reads
+    _subsample_reads(logger, options)
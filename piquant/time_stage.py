@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+
+"""Usage:
+    time_stage [{log_option_spec}] --stage=<stage> --metrics-file=<metrics-file> <command> [<args>...]
+
+{help_option_spec}                       {help_option_description}
+{ver_option_spec}                    {ver_option_description}
+{log_option_spec}         {log_option_description}
+--stage=<stage>                 Name of the script stage executed by the command.
+--metrics-file=<metrics-file>   CSV file to which the elapsed time, CPU time, peak memory and exit status of the command are appended.
+<command>                       Command to execute.
+<args>                          Arguments for the command.
+"""
+
+import docopt
+import options as opt
+import os
+import resource_usage as ru
+import schema
+import signal
+import subprocess
+import sys
+import time
+
+STAGE = "--stage"
+METRICS_FILE = "--metrics-file"
+COMMAND = "<command>"
+ARGS = "<args>"
+
+# Exit status of the shell when a command cannot be executed
+COMMAND_NOT_FOUND_STATUS = 127
+
+
+def _validate_command_line_options(options):
+    try:
+        opt.validate_log_level(options)
+    except schema.SchemaError as exc:
+        exit("Exiting. " + exc.code)
+
+
+def _get_exit_status(status):
+    # As in the shell, a command killed by a signal has exit status 128 plus
+    # the number of the signal
+    if os.WIFSIGNALED(status):
+        return 128 + os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def _time_stage(logger, options):
+    command = [options[COMMAND]] + options[ARGS]
+
+    start = time.time()
+    try:
+        process = subprocess.Popen(command)
+    except OSError as exc:
+        logger.error("Could not execute {c}: {e}".format(
+            c=options[COMMAND], e=exc.strerror))
+        return COMMAND_NOT_FOUND_STATUS
+
+    # An interrupt from the terminal is also received by the command; wait for
+    # it to exit so that the resources it used are still recorded.
+    handler = signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        _, status, usage = os.wait4(process.pid, 0)
+    finally:
+        signal.signal(signal.SIGINT, handler)
+    wall_time = time.time() - start
+    exit_status = _get_exit_status(status)
+
+    stage_usage = ru.StageUsage(
+        options[STAGE], wall_time, usage.ru_utime, usage.ru_stime,
+        ru.get_peak_memory_megabytes(usage), exit_status)
+    ru.record_stage_usage(options[METRICS_FILE], stage_usage)
+
+    logger.debug(("Stage {s} finished with exit status {x}: {w:.1f}s " +
+                  "elapsed, {c:.1f}s CPU, {m:.1f}MB peak memory.").format(
+                 s=stage_usage.stage, x=exit_status, w=wall_time,
+                 c=usage.ru_utime + usage.ru_stime,
+                 m=stage_usage.peak_memory_mb))
+    return exit_status
+
+
+if __name__ == "__main__":
+    # Read in command-line options; options following the command are passed
+    # to it
+    __doc__ = opt.substitute_common_options_into_usage(__doc__)
+    options = docopt.docopt(
+        __doc__, version="time_stage.py", options_first=True)
+
+    # Validate command-line options
+    _validate_command_line_options(options)
+
+    # Set up logger
+    logger = opt.get_logger_for_options(options)
+
+    # Execute the command, recording the resources it used, and exit with
+    # its exit status
+    sys.exit(_time_stage(logger, options))
@@ -1,4 +1,4 @@
-import pandas as pd
+import collections
 import numpy as np
 
 TRANSCRIPT_COUNT = "num-transcripts"
@@ -21,6 +21,26 @@ TRUE_NEGATIVE = "true-neg"
 NOT_PRESENT_CUTOFF = 0.1
 CUMULATIVE_DISTRIBUTION_POINTS = 20
 
+# Functions by which values may be aggregated over each group of transcripts
+# when calculating grouped statistics
+COUNT = "count"
+SUM = "sum"
+MEDIAN = "median"
+RANK_CORRELATION = "rank-correlation"
+
+# An aggregation over each group of transcripts required by a statistic.
+# 'values' is a column name, or a function of a data frame of TPMs returning a
+# series of values, to be aggregated (or, for RANK_CORRELATION, a pair of
+# these); it is ignored for COUNT. If 'true_positives' is True, the
+# aggregation is over true positive TPMs only.
+Aggregation = collections.namedtuple(
+    "Aggregation", ["function", "values", "true_positives"])
+
+
+def _pandas():
+    import pandas
+    return pandas
+
 
 def mark_positives_and_negatives(tpms):
     tpms[FALSE_NEGATIVE] = \
@@ -56,52 +76,182 @@ def calculate_log_ratios(tpms):
 def apply_classifiers(tpms, classifiers):
     for classifier in classifiers:
         column_name = classifier.get_column_name()
-        tpms[column_name] = tpms.apply(
-            classifier.get_classification_value, axis=1)
+        if hasattr(classifier, "get_classification_values"):
+            tpms[column_name] = classifier.get_classification_values(tpms)
+        else:
+            tpms[column_name] = tpms.apply(
+                classifier.get_classification_value, axis=1)
 
 
 def get_stats(tpms, tp_tpms, statistics):
     stats_dict = {stat.name: stat.calculate(tpms, tp_tpms)
                   for stat in statistics}
-    return pd.DataFrame([stats_dict])
+    return _pandas().DataFrame([stats_dict])
+
+
+def _get_aggregation_values(tpms, values):
+    if callable(values):
+        values = values(tpms)
+    else:
+        values = tpms[values]
+    return np.asarray(values, dtype=float)
+
+
+def _grouped_count(codes, num_groups):
+    return np.bincount(codes, minlength=num_groups)
+
+
+def _grouped_sum(codes, values, num_groups):
+    return np.bincount(codes, weights=values, minlength=num_groups)
+
+
+def _grouped_sort(codes, values):
+    # Sort values by group and then by value, returning the sort order and
+    # the sorted group codes and values
+    order = np.lexsort((values, codes))
+    return order, codes[order], values[order]
+
+
+def _grouped_median(codes, values, num_groups):
+    present = ~np.isnan(values)
+    codes, values = codes[present], values[present]
+
+    order, codes, values = _grouped_sort(codes, values)
+    counts = _grouped_count(codes, num_groups)
+    starts = np.cumsum(counts) - counts
+
+    medians = np.empty(num_groups)
+    medians.fill(np.nan)
+    has_values = counts > 0
+    starts, counts = starts[has_values], counts[has_values]
+    medians[has_values] = (values[starts + (counts - 1) // 2] +
+                           values[starts + counts // 2]) / 2.0
+    return medians
+
+
+def _grouped_rank(codes, values):
+    # Rank values within each group in a single sort, assigning tied values
+    # the average of the ranks they span
+    order, codes, values = _grouped_sort(codes, values)
+    positions = np.arange(len(values))
+
+    new_group = np.ones(len(values), dtype=bool)
+    new_group[1:] = codes[1:] != codes[:-1]
+    new_run = new_group.copy()
+    new_run[1:] |= values[1:] != values[:-1]
+
+    group_starts = np.maximum.accumulate(np.where(new_group, positions, 0))
+    run_starts = positions[new_run]
+    run_ends = np.append(run_starts[1:], len(values)) - 1
+    runs = np.cumsum(new_run) - 1
+
+    ranks = np.empty(len(values))
+    ranks[order] = (run_starts[runs] + run_ends[runs]) / 2.0 - \
+        group_starts + 1
+    return ranks
+
+
+def _grouped_rank_correlation(codes, xvals, yvals, num_groups):
+    # Calculate Spearman's rank correlation coefficient within each group, as
+    # the Pearson correlation of group-wise ranks
+    present = ~(np.isnan(xvals) | np.isnan(yvals))
+    codes, xvals, yvals = codes[present], xvals[present], yvals[present]
+
+    xranks = _grouped_rank(codes, xvals)
+    yranks = _grouped_rank(codes, yvals)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        counts = _grouped_count(codes, num_groups)
+        xdevs = xranks - (_grouped_sum(codes, xranks, num_groups) /
+                          counts)[codes]
+        ydevs = yranks - (_grouped_sum(codes, yranks, num_groups) /
+                          counts)[codes]
+        return _grouped_sum(codes, xdevs * ydevs, num_groups) / np.sqrt(
+            _grouped_sum(codes, xdevs * xdevs, num_groups) *
+            _grouped_sum(codes, ydevs * ydevs, num_groups))
+
+
+def _calculate_aggregation(aggregation, tpms, codes, num_groups):
+    if aggregation.function == COUNT:
+        return _grouped_count(codes, num_groups)
+
+    if aggregation.function == RANK_CORRELATION:
+        xvals, yvals = [_get_aggregation_values(tpms, v)
+                        for v in aggregation.values]
+        return _grouped_rank_correlation(codes, xvals, yvals, num_groups)
+
+    values = _get_aggregation_values(tpms, aggregation.values)
+    if aggregation.function == SUM:
+        return _grouped_sum(codes, values, num_groups)
+    if aggregation.function == MEDIAN:
+        return _grouped_median(codes, values, num_groups)
+
+    raise ValueError("Unknown aggregation function: " + aggregation.function)
 
 
 def get_grouped_stats(tpms, tp_tpms, column_name, statistics):
-    grouped = tpms.groupby(column_name)
-    tp_grouped = tp_tpms.groupby(column_name)
-    summary = grouped.describe()
-    tp_summary = tp_grouped.describe()
+    # Each statistic declares the aggregations over groups of transcripts
+    # from which it is calculated; each distinct aggregation is computed once,
+    # for all groups at once, from integer group codes.
+    pandas = _pandas()
+    codes, groups = pandas.factorize(tpms[column_name].values, sort=True)
+    groups = pandas.Index(groups, name=column_name)
+    tp_codes = groups.get_indexer(tp_tpms[column_name].values)
+
+    grouped_tpms = {}
+    for is_tp, df, df_codes in [(False, tpms, codes),
+                                (True, tp_tpms, tp_codes)]:
+        in_group = df_codes >= 0
+        grouped_tpms[is_tp] = (df[in_group], df_codes[in_group])
 
-    stats_dict = {stat.name: stat.calculate_grouped(
-        grouped, summary, tp_grouped, tp_summary)
-        for stat in statistics}
-    return pd.DataFrame.from_dict(stats_dict)
+    aggregates = {}
+    for stat in statistics:
+        for aggregation in stat.aggregations:
+            if aggregation not in aggregates:
+                df, df_codes = grouped_tpms[aggregation.true_positives]
+                aggregates[aggregation] = _calculate_aggregation(
+                    aggregation, df, df_codes, len(groups))
+
+    stats_dict = {stat.name: stat.calculate_grouped(aggregates)
+                  for stat in statistics}
+    return pandas.DataFrame(stats_dict, index=groups)
 
 
-def get_distribution(tpms, classifier, ascending):
-    values = tpms.apply(classifier.get_value, axis=1)
-    values.sort(ascending=ascending)
+def get_distribution(tpms, classifier, ascending,
+                     num_points=CUMULATIVE_DISTRIBUTION_POINTS):
+    # Return 'num_points' evenly spaced threshold values across the
+    # classifier's plot range, and the percentage of values less than (or, if
+    # not ascending, greater than) each threshold. Values are sorted once, and
+    # the number of values beyond every threshold found by binary search.
+    values = np.asarray(classifier.get_values(tpms), dtype=float)
+    size = float(len(values))
+    values = np.sort(values[~np.isnan(values)])
 
     xbounds = classifier.get_distribution_plot_range()
     if xbounds is None:
         xbounds = (values.min(), values.max())
 
-    xvals = np.linspace(xbounds[0], xbounds[1], CUMULATIVE_DISTRIBUTION_POINTS)
+    xvals = np.linspace(xbounds[0], xbounds[1], num_points)
 
-    size = float(len(values))
-    yvals = [100 * len(values[values < x if ascending else values > x]) / size
-             for x in xvals]
+    if ascending:
+        counts = np.searchsorted(values, xvals, side='left')
+    else:
+        counts = len(values) - np.searchsorted(values, xvals, side='right')
+    yvals = 100 * counts / size
 
     return xvals, yvals
 
 
-def get_distribution_stats(non_zero_tpms, tp_tpms, classifier, ascending):
-    xvals, nz_yvals = get_distribution(non_zero_tpms, classifier, ascending)
-    xvals, tp_yvals = get_distribution(tp_tpms, classifier, ascending)
+def get_distribution_stats(non_zero_tpms, tp_tpms, classifier, ascending,
+                           num_points=CUMULATIVE_DISTRIBUTION_POINTS):
+    xvals, nz_yvals = get_distribution(
+        non_zero_tpms, classifier, ascending, num_points)
+    xvals, tp_yvals = get_distribution(
+        tp_tpms, classifier, ascending, num_points)
 
     stats_dict = {}
     stats_dict[classifier.get_column_name()] = xvals
     stats_dict[NON_ZERO_PERCENTAGE] = nz_yvals
     stats_dict[TRUE_POSITIVE_PERCENTAGE] = tp_yvals
 
-    return pd.DataFrame.from_dict(stats_dict)
+    return _pandas().DataFrame.from_dict(stats_dict)
@@ -0,0 +1,57 @@
+import os.path
+import piquant.annotation_cache as ac
+
+from utils import temp_dir_created
+
+TABLE_NAME = "table"
+
+
+def _write_file(dirname, file_name, contents):
+    path = os.path.join(dirname, file_name)
+    with open(path, "w") as f:
+        f.write(contents)
+    return path
+
+
+def test_get_file_hash_is_the_same_for_files_with_the_same_contents():
+    with temp_dir_created() as dirname:
+        file1 = _write_file(dirname, "file1", "contents")
+        file2 = _write_file(dirname, "file2", "contents")
+        assert ac.get_file_hash(file1) == ac.get_file_hash(file2)
+
+
+def test_get_file_hash_differs_for_files_with_different_contents():
+    with temp_dir_created() as dirname:
+        file1 = _write_file(dirname, "file1", "contents")
+        file2 = _write_file(dirname, "file2", "other contents")
+        assert ac.get_file_hash(file1) != ac.get_file_hash(file2)
+
+
+def test_get_cached_table_file_is_keyed_by_file_contents():
+    with temp_dir_created() as dirname:
+        gtf_file = _write_file(dirname, "gtf", "contents")
+        table_file = ac.get_cached_table_file(dirname, gtf_file, TABLE_NAME)
+        assert table_file == os.path.join(
+            dirname, ac.get_file_hash(gtf_file), TABLE_NAME + ac.TABLE_SUFFIX)
+
+
+def test_write_table_creates_table_file():
+    with temp_dir_created() as dirname:
+        table_file = os.path.join(dirname, "sub", TABLE_NAME + ac.TABLE_SUFFIX)
+        ac.write_table(table_file, [("a", [1, 2])])
+        assert os.path.exists(table_file)
+
+
+def test_read_table_returns_columns_written_in_order():
+    columns = [("transcript", ["t1", "t2", "t3"]),
+               ("count", [3, 1, 2]),
+               ("length", [0.5, 1.5, 2.5])]
+
+    with temp_dir_created() as dirname:
+        table_file = os.path.join(dirname, TABLE_NAME + ac.TABLE_SUFFIX)
+        ac.write_table(table_file, columns)
+        table = ac.read_table(table_file)
+
+    assert list(table.keys()) == [name for name, values in columns]
+    for name, values in columns:
+        assert list(table[name]) == values
@@ -0,0 +1,19 @@
+import pandas as pd
+import piquant.assemble_quantification_data as aqd
+import piquant.flux_simulator as fs
+
+
+def _get_profiles(transcript_ids):
+    return pd.DataFrame({fs.PRO_FILE_TRANSCRIPT_ID_COL: transcript_ids})
+
+
+def test_get_values_for_profiles_gives_zero_for_missing_transcripts():
+    values = pd.Series([1.5, 2.5], index=["T1", "T3"])
+    assert aqd._get_values_for_profiles(
+        values, _get_profiles(["T1", "T2", "T3"])).tolist() == [1.5, 0, 2.5]
+
+
+def test_get_values_for_profiles_uses_first_value_of_repeated_transcripts():
+    values = pd.Series([1.5, 2.5, 3.5], index=["T1", "T2", "T1"])
+    assert aqd._get_values_for_profiles(
+        values, _get_profiles(["T1", "T2"])).tolist() == [1.5, 2.5]
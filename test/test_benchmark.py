@@ -0,0 +1,146 @@
+import benchmark.compare_benchmarks as compare_benchmarks
+import benchmark.generators as generators
+import benchmark.results as results
+import benchmark.time_startup as time_startup
+import numpy as np
+import os.path
+import pandas as pd
+import piquant.flux_simulator as fs
+import piquant.gtf as gtf
+import piquant.piquant_options as po
+import pytest
+import utils
+
+
+def _write_gtf(dirname, num_transcripts=200):
+    gtf_file = os.path.join(dirname, "transcripts.gtf")
+    transcripts = generators.write_gtf(
+        gtf_file, num_transcripts, np.random.RandomState(1))
+    return gtf_file, transcripts
+
+
+def test_write_gtf_writes_required_number_of_transcripts():
+    with utils.temp_dir_created() as dirname:
+        gtf_file, transcripts = _write_gtf(dirname)
+
+        records = [r for chunk in gtf.read_gtf_records(
+            gtf_file, attributes=[gtf.TRANSCRIPT_ID_ATTRIBUTE])
+            for r in chunk]
+        transcript_ids = set(
+            [r.attributes[gtf.TRANSCRIPT_ID_ATTRIBUTE] for r in records])
+
+        assert len(transcripts) == 200
+        assert transcript_ids == set([t.transcript_id for t in transcripts])
+        for t in transcripts:
+            exon_lengths = [r.end - r.start + 1 for r in records if
+                            r.attributes[gtf.TRANSCRIPT_ID_ATTRIBUTE] ==
+                            t.transcript_id]
+            assert sum(exon_lengths) == t.length
+
+
+def test_write_expression_profile_writes_readable_profile():
+    with utils.temp_dir_created() as dirname:
+        gtf_file, transcripts = _write_gtf(dirname)
+        pro_file = os.path.join(dirname, "expression.pro")
+        fractions = generators.write_expression_profile(
+            pro_file, transcripts, np.random.RandomState(1))
+
+        profiles = fs.read_expression_profiles(
+            pro_file, columns=[fs.PRO_FILE_TRANSCRIPT_ID_COL,
+                               fs.PRO_FILE_LENGTH_COL, fs.PRO_FILE_FRAC_COL])
+
+        assert list(profiles[fs.PRO_FILE_TRANSCRIPT_ID_COL]) == \
+            [t.transcript_id for t in transcripts]
+        assert list(profiles[fs.PRO_FILE_LENGTH_COL]) == \
+            [t.length for t in transcripts]
+        np.testing.assert_allclose(
+            profiles[fs.PRO_FILE_FRAC_COL], fractions, rtol=1e-5)
+        assert abs(fractions.sum() - 1) < 1e-9
+
+
+@pytest.mark.parametrize("quant_method", generators.QUANTIFIER_OUTPUTS.keys())
+def test_write_quantifier_output_writes_tpms(quant_method):
+    with utils.temp_dir_created() as dirname:
+        gtf_file, transcripts = _write_gtf(dirname)
+        fractions = np.random.RandomState(1).dirichlet(
+            np.ones(len(transcripts)))
+        generators.write_quantifier_output(
+            quant_method, dirname, transcripts, fractions,
+            np.random.RandomState(1))
+
+        out_file, id_col, value_col = \
+            generators.QUANTIFIER_OUTPUTS[quant_method]
+        abundances = pd.read_csv(
+            os.path.join(dirname, out_file), delim_whitespace=True,
+            index_col=id_col)[value_col]
+
+        assert list(abundances.index) == \
+            [t.transcript_id for t in transcripts]
+        assert abs(abundances.sum() - 1000000) < 1
+
+
+def _get_results(wall_time, peak_memory, succeeded=True):
+    return {
+        results.VERSION: results.FORMAT_VERSION,
+        results.RESULTS: {100: {"stage": {
+            results.WALL_TIME: wall_time,
+            results.CPU_TIME: wall_time,
+            results.PEAK_MEMORY: peak_memory,
+            results.SUCCEEDED: succeeded
+        }}}
+    }
+
+
+def test_results_can_be_written_and_read():
+    with utils.temp_dir_created() as dirname:
+        results_file = os.path.join(dirname, "results.json")
+        data = _get_results(2.0, 100.0)
+        results.write_results(
+            results_file, {"commit": None}, {"seed": 0},
+            data[results.RESULTS])
+
+        read_data = results.read_results(results_file)
+        assert read_data[results.RESULTS] == data[results.RESULTS]
+        assert read_data[results.ENVIRONMENT] == {"commit": None}
+
+
+@pytest.mark.parametrize("wall_time,peak_memory,succeeded,regression", [
+    (2.2, 100.0, True, False),
+    (3.0, 100.0, True, True),
+    (2.0, 120.0, True, True),
+    (2.0, 100.0, False, True),
+])
+def test_compare_results_detects_regressions(
+        wall_time, peak_memory, succeeded, regression):
+    comparisons = compare_benchmarks.compare_results(
+        _get_results(2.0, 100.0),
+        _get_results(wall_time, peak_memory, succeeded), 20, 10)
+
+    assert len(comparisons) == 1
+    assert comparisons[0].regression == regression
+
+
+@pytest.mark.parametrize("command", [
+    po.PREPARE_READ_DIRS, po.CREATE_READS, po.CHECK_READS, po.QUANTIFY,
+    po.CHECK_QUANTIFICATION
+])
+def test_lightweight_piquant_commands_do_not_import_heavy_modules(command):
+    startup_time = time_startup.time_startup(
+        command, time_startup.get_piquant_command_code(command))
+    assert startup_time.heavy_modules == []
+
+
+def test_analysis_support_script_imports_heavy_modules():
+    script = "analyse_quantification_run"
+    startup_time = time_startup.time_startup(
+        script, time_startup.get_support_script_code(script))
+    assert "pandas" in startup_time.heavy_modules
+
+
+@pytest.mark.parametrize("script", [
+    "calculate_reads_for_depth", "count_transcripts_for_genes"
+])
+def test_annotation_support_scripts_do_not_import_heavy_modules(script):
+    startup_time = time_startup.time_startup(
+        script, time_startup.get_support_script_code(script))
+    assert startup_time.heavy_modules == []
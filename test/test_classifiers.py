@@ -4,16 +4,17 @@ import piquant.classifiers as classifiers
 
 def _get_test_classifier(
         column_name="dummy", value_extractor=lambda x: x,
-        grouped_stats=True, distribution_plot_range=None):
+        grouped_stats=True, distribution_plot_range=None, vectorized=True):
     return classifiers._Classifier(
-        column_name, value_extractor, grouped_stats, distribution_plot_range)
+        column_name, value_extractor, grouped_stats, distribution_plot_range,
+        vectorized=vectorized)
 
 
 def _get_test_levels_classifier(
         column_name="dummy", value_extractor=lambda x: x,
-        levels=[10, 20, 30], closed=True):
+        levels=[10, 20, 30], closed=True, vectorized=True):
     return classifiers._LevelsClassifier(
-        column_name, value_extractor, levels, closed)
+        column_name, value_extractor, levels, closed, vectorized=vectorized)
 
 
 def test_get_classifiers_returns_classifiers_instances():
@@ -43,6 +44,23 @@ def test_classifier_get_classification_value_returns_correct_value():
     assert c.get_classification_value(df.ix[0]) == col_value
 
 
+def test_classifier_get_values_returns_correct_values():
+    col_name = "column name"
+    col_values = [1, 2, 3]
+    df = pd.DataFrame.from_dict({col_name: col_values})
+    c = _get_test_classifier(value_extractor=lambda x: x[col_name] * 2)
+    assert list(c.get_values(df)) == [v * 2 for v in col_values]
+
+
+def test_classifier_get_values_applies_row_wise_if_not_vectorized():
+    col_name = "column name"
+    col_values = [1, 2, 3]
+    df = pd.DataFrame.from_dict({col_name: col_values})
+    c = _get_test_classifier(
+        value_extractor=lambda x: float(x[col_name]) * 2, vectorized=False)
+    assert list(c.get_values(df)) == [v * 2 for v in col_values]
+
+
 def test_classifier_produces_grouped_stats_returns_correct_value():
     gs = False
     c = _get_test_classifier(grouped_stats=gs)
@@ -91,6 +109,15 @@ def test_levels_classifier_get_classification_value_returns_correct_value():
     assert c.get_classification_value(df.ix[0]) == 2
 
 
+def test_levels_classifier_get_classification_values_matches_row_wise_values():
+    col_name = "column name"
+    df = pd.DataFrame.from_dict(
+        {col_name: [5, 10, 15, 20, 25, 30, 35, float('nan')]})
+    c = _get_test_levels_classifier(value_extractor=lambda x: x[col_name])
+    row_wise = [c.get_classification_value(row) for i, row in df.iterrows()]
+    assert list(c.get_classification_values(df)) == row_wise
+
+
 def test_levels_classifier_get_value_labels_returns_correct_labels_for_closed_classifier():
     levels = [10, 20, 30, 40]
     c = _get_test_levels_classifier(levels=levels)
@@ -0,0 +1,86 @@
+import numpy as np
+import os.path
+import pandas as pd
+import piquant.columnar as columnar
+import pytest
+import utils
+
+TABLE_BASENAME = "table"
+
+
+def _get_data_frame():
+    return pd.DataFrame.from_items([
+        ("transcript", ["T1", "T2", "T1", "T3"]),
+        ("length", [100, 200, 300, 400]),
+        ("tpm", [0.5, 1.5, 2.5, 3.5])])
+
+
+@pytest.fixture(params=columnar.DATA_FORMATS)
+def data_format(request):
+    return request.param
+
+
+def _write_data(dirname, data_format, **kwargs):
+    data_file = columnar.get_data_file(
+        os.path.join(dirname, TABLE_BASENAME), data_format)
+    columnar.write_data(data_file, _get_data_frame(), **kwargs)
+    return data_file
+
+
+def test_get_data_file_adds_format_suffix():
+    assert columnar.get_data_file("tpms", columnar.CSV_FORMAT) == \
+        "tpms" + columnar.CSV_SUFFIX
+    assert columnar.get_data_file("tpms", columnar.COLUMNAR_FORMAT) == \
+        "tpms" + columnar.COLUMNAR_SUFFIX
+
+
+def test_read_data_returns_written_data(data_format):
+    with utils.temp_dir_created() as dirname:
+        data_file = _write_data(dirname, data_format)
+        data = columnar.read_data(data_file)
+
+        expected = _get_data_frame()
+        assert data.columns.tolist() == expected.columns.tolist()
+        for column in expected.columns:
+            assert data[column].tolist() == expected[column].tolist()
+
+
+def test_read_data_returns_only_requested_columns(data_format):
+    with utils.temp_dir_created() as dirname:
+        data_file = _write_data(dirname, data_format)
+        data = columnar.read_data(data_file, columns=["tpm", "length"])
+
+        assert data.columns.tolist() == ["tpm", "length"]
+        assert data["tpm"].tolist() == [0.5, 1.5, 2.5, 3.5]
+
+
+def test_write_data_writes_only_specified_columns(data_format):
+    with utils.temp_dir_created() as dirname:
+        data_file = _write_data(
+            dirname, data_format, columns=["length", "transcript"])
+        data = columnar.read_data(data_file)
+
+        assert data.columns.tolist() == ["length", "transcript"]
+
+
+def test_read_data_restores_missing_and_unicode_columnar_strings():
+    with utils.temp_dir_created() as dirname:
+        data_file = columnar.get_data_file(
+            os.path.join(dirname, TABLE_BASENAME), columnar.COLUMNAR_FORMAT)
+        columnar.write_data(data_file, pd.DataFrame(
+            {"transcript": ["x", np.nan, u"y\u00e9", "x"]}))
+        data = columnar.read_data(data_file)
+
+        assert data["transcript"][[0, 2, 3]].tolist() == \
+            ["x", u"y\u00e9", "x"]
+        assert pd.isnull(data["transcript"][1])
+
+
+def test_write_data_replaces_existing_columnar_data():
+    with utils.temp_dir_created() as dirname:
+        _write_data(dirname, columnar.COLUMNAR_FORMAT)
+        data_file = _write_data(
+            dirname, columnar.COLUMNAR_FORMAT, columns=["tpm"])
+
+        assert columnar.read_data(data_file).columns.tolist() == ["tpm"]
+        assert os.listdir(dirname) == [os.path.basename(data_file)]
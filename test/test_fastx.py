@@ -0,0 +1,94 @@
+import gzip
+import os.path
+import piquant.fastx as fastx
+import pytest
+import utils
+
+FASTA_LINES = [">r1/1\n", "ACGT\n", ">r1/2\n", "GGCC\n",
+               ">r2/1\n", "TTAA\n", ">r2/2\n", "CATG\n"]
+FASTQ_LINES = ["@r1\n", "ACGT\n", "+\n", "IIII\n",
+               "@r2\n", "TTAA\n", "+\n", "IIII\n"]
+
+
+def _write_reads_file(dirname, file_name, lines):
+    reads_file = os.path.join(dirname, file_name)
+    open_file = gzip.open if file_name.endswith(".gz") else open
+    with open_file(reads_file, "wb") as f:
+        f.writelines(lines)
+    return reads_file
+
+
+def test_is_fastq_detects_fastq_file_names():
+    assert fastx.is_fastq("reads.fastq")
+    assert fastx.is_fastq("reads.fq.gz")
+    assert not fastx.is_fastq("reads.fasta")
+    assert not fastx.is_fastq("reads.fasta.gz")
+
+
+def test_get_lines_per_fragment_returns_correct_counts():
+    assert fastx.get_lines_per_fragment("reads.fasta") == 2
+    assert fastx.get_lines_per_fragment("reads.fasta", True) == 4
+    assert fastx.get_lines_per_fragment("reads.fastq") == 4
+    assert fastx.get_lines_per_fragment("reads.fastq", True) == 8
+
+
+def test_read_fragments_yields_single_end_reads():
+    with utils.temp_dir_created() as dirname:
+        reads_file = _write_reads_file(dirname, "r.fastq", FASTQ_LINES)
+        fragments = list(fastx.read_fragments(reads_file))
+        assert [f.lines for f in fragments] == \
+            [tuple(FASTQ_LINES[0:4]), tuple(FASTQ_LINES[4:8])]
+
+
+def test_read_fragments_yields_paired_end_reads():
+    with utils.temp_dir_created() as dirname:
+        reads_file = _write_reads_file(dirname, "r.fasta", FASTA_LINES)
+        fragments = list(fastx.read_fragments(reads_file, paired_end=True))
+        assert [f.lines for f in fragments] == \
+            [tuple(FASTA_LINES[0:4]), tuple(FASTA_LINES[4:8])]
+
+
+def test_read_fragments_records_byte_offsets():
+    with utils.temp_dir_created() as dirname:
+        reads_file = _write_reads_file(dirname, "r.fasta", FASTA_LINES)
+        offsets = [f.offset for f in fastx.read_fragments(reads_file)]
+        expected = [sum([len(l) for l in FASTA_LINES[0:i]])
+                    for i in range(0, 8, 2)]
+        assert offsets == expected
+
+
+def test_read_fragments_raises_error_for_incomplete_fragment():
+    with utils.temp_dir_created() as dirname:
+        reads_file = _write_reads_file(dirname, "r.fasta", FASTA_LINES[0:3])
+        with pytest.raises(ValueError):
+            list(fastx.read_fragments(reads_file))
+
+
+@pytest.mark.parametrize("file_name", ["r.fasta", "r.fasta.gz"])
+def test_read_fragments_at_returns_fragments_at_offsets(file_name):
+    with utils.temp_dir_created() as dirname:
+        reads_file = _write_reads_file(dirname, file_name, FASTA_LINES)
+        fragments = list(fastx.read_fragments(reads_file))
+        offsets = [fragments[1].offset, fragments[3].offset]
+        assert list(fastx.read_fragments_at(reads_file, offsets)) == \
+            [fragments[1], fragments[3]]
+
+
+@pytest.mark.parametrize("file_name", ["r.fasta", "r.fasta.gz"])
+def test_count_fragments_returns_number_of_fragments(file_name):
+    with utils.temp_dir_created() as dirname:
+        reads_file = _write_reads_file(dirname, file_name, FASTA_LINES)
+        assert fastx.count_fragments(reads_file) == 4
+        assert fastx.count_fragments(reads_file, paired_end=True) == 2
+
+
+def test_write_fragment_writes_gzipped_output():
+    with utils.temp_dir_created() as dirname:
+        reads_file = _write_reads_file(dirname, "r.fasta", FASTA_LINES)
+        out_file = os.path.join(dirname, "out.fasta.gz")
+        with fastx.open_reads_file(out_file, "w") as f:
+            for fragment in fastx.read_fragments(reads_file):
+                fastx.write_fragment(f, fragment)
+
+        with gzip.open(out_file, "rb") as f:
+            assert f.readlines() == FASTA_LINES
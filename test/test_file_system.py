@@ -0,0 +1,13 @@
+import piquant.classifiers as classifiers
+import piquant.file_system as fsys
+
+
+def test_get_stats_file_returns_overall_stats_file():
+    assert fsys.get_stats_file("dir", "run") == "dir/run_stats.csv"
+
+
+def test_get_stats_file_returns_stratified_stats_file():
+    clsfr = [c for c in classifiers.get_classifiers()
+             if c.produces_grouped_stats()][0]
+    assert fsys.get_stats_file("dir", fsys.OVERALL_STATS_PREFIX, clsfr) == \
+        "dir/overall" + clsfr.get_stats_file_suffix() + ".csv"
@@ -1,5 +1,6 @@
 import os.path
 import piquant.flux_simulator as fs
+import shutil
 import subprocess
 
 from utils import temp_dir_created
@@ -53,6 +54,67 @@ def test_read_expression_profiles_returns_data_frame_with_correct_number_of_rows
     assert len(profiles) == num_lines
 
 
+def _get_test_profile_path():
+    return os.path.join(os.path.abspath(os.path.dirname(__file__)),
+                        "flux_simulator_expression.pro")
+
+
+def test_read_expression_profiles_reads_only_specified_columns():
+    columns = [fs.PRO_FILE_TRANSCRIPT_ID_COL, fs.PRO_FILE_LENGTH_COL]
+    profiles = fs.read_expression_profiles(
+        _get_test_profile_path(), columns=columns)
+    all_profiles = fs.read_expression_profiles(_get_test_profile_path())
+
+    assert list(profiles.columns) == columns
+    assert (profiles[fs.PRO_FILE_LENGTH_COL] ==
+            all_profiles[fs.PRO_FILE_LENGTH_COL]).all()
+
+
+def test_get_expression_profile_summary_returns_correct_values():
+    with temp_dir_created() as dirname:
+        pro_file = os.path.join(dirname, "test.pro")
+        shutil.copy(_get_test_profile_path(), pro_file)
+
+        profiles = fs.read_expression_profiles(pro_file)
+        expressed = profiles[profiles[fs.PRO_FILE_NUM_COL] > 0]
+
+        summary = fs.get_expression_profile_summary(pro_file)
+        assert summary.expressed_length == \
+            expressed[fs.PRO_FILE_LENGTH_COL].sum()
+        assert summary.num_expressed == len(expressed)
+        assert summary.num_transcripts == len(profiles)
+
+
+def test_get_expression_profile_summary_is_cached_until_profile_changes():
+    with temp_dir_created() as dirname:
+        pro_file = os.path.join(dirname, "test.pro")
+        with open(pro_file, "w") as f:
+            f.write("1:1-10W\tT1\tNC\t10\t0.5\t5\n")
+        summary_file = pro_file + fs.PRO_FILE_SUMMARY_SUFFIX
+
+        summary = fs.get_expression_profile_summary(pro_file)
+        assert summary.expressed_length == 10
+        assert os.path.exists(summary_file)
+        assert fs.get_expression_profile_summary(pro_file) == summary
+
+        with open(pro_file, "a") as f:
+            f.write("1:1-30W\tT2\tNC\t20\t0.5\t5\n")
+        summary = fs.get_expression_profile_summary(pro_file)
+        assert summary.expressed_length == 30
+        assert summary.num_transcripts == 2
+
+
+def test_get_expression_profile_summary_leaves_no_temporary_files():
+    with temp_dir_created() as dirname:
+        pro_file = os.path.join(dirname, "test.pro")
+        with open(pro_file, "w") as f:
+            f.write("1:1-10W\tT1\tNC\t10\t0.5\t5\n")
+
+        fs.get_expression_profile_summary(pro_file)
+        assert sorted(os.listdir(dirname)) == \
+            ["test.pro", "test.pro" + fs.PRO_FILE_SUMMARY_SUFFIX]
+
+
 def test_write_flux_simulator_params_files_writes_expression_params_file():
     with temp_dir_created() as dirname:
         _write_flux_simulator_params_files(dirname)
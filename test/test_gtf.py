@@ -0,0 +1,84 @@
+import os.path
+import piquant.gtf as gtf
+
+from utils import temp_dir_created
+
+GTF_LINES = [
+    "#!comment line",
+    "chr1\tsrc\tgene\t10\t100\t.\t+\t.\tgene_id \"G1\";",
+    "chr1\tsrc\texon\t10\t50\t.\t+\t.\t" +
+    "gene_id \"G1\"; transcript_id \"T1\"; exon_number 1;",
+    "chr1\tsrc\texon\t60\t100\t.\t+\t.\t" +
+    "gene_id \"G1\"; transcript_id \"T1\"; exon_number 2;",
+    "chr2\tsrc\texon\t5\t25\t.\t-\t.\t" +
+    "gene_id \"G2\"; transcript_id \"T2\";",
+]
+
+GTF_FILE = "test.gtf"
+
+
+def _read_records(dirname, **kwargs):
+    gtf_file = os.path.join(dirname, GTF_FILE)
+    with open(gtf_file, "w") as f:
+        f.write("\n".join(GTF_LINES) + "\n")
+    return list(gtf.read_gtf_records(gtf_file, **kwargs))
+
+
+def _flatten(chunks):
+    return [record for chunk in chunks for record in chunk]
+
+
+def test_read_gtf_records_skips_comment_lines():
+    with temp_dir_created() as dirname:
+        records = _flatten(_read_records(dirname))
+        assert len(records) == len(GTF_LINES) - 1
+
+
+def test_read_gtf_records_filters_features():
+    with temp_dir_created() as dirname:
+        records = _flatten(_read_records(
+            dirname, features=[gtf.EXON_FEATURE]))
+        assert len(records) == 3
+        assert all([r.feature == gtf.EXON_FEATURE for r in records])
+
+
+def test_read_gtf_records_returns_typed_fields():
+    with temp_dir_created() as dirname:
+        record = _flatten(_read_records(
+            dirname, features=[gtf.EXON_FEATURE]))[-1]
+        assert record.sequence == "chr2"
+        assert record.start == 5
+        assert record.end == 25
+        assert record.strand == "-"
+
+
+def test_read_gtf_records_extracts_only_requested_attributes():
+    with temp_dir_created() as dirname:
+        records = _flatten(_read_records(
+            dirname, features=[gtf.EXON_FEATURE],
+            attributes=[gtf.TRANSCRIPT_ID_ATTRIBUTE]))
+        assert [r.attributes for r in records] == \
+            [{gtf.TRANSCRIPT_ID_ATTRIBUTE: t} for t in ["T1", "T1", "T2"]]
+
+
+def test_read_gtf_records_extracts_unquoted_attributes():
+    with temp_dir_created() as dirname:
+        records = _flatten(_read_records(
+            dirname, features=[gtf.EXON_FEATURE],
+            attributes=[gtf.GENE_ID_ATTRIBUTE, "exon_number"]))
+        assert records[1].attributes == \
+            {gtf.GENE_ID_ATTRIBUTE: "G1", "exon_number": "2"}
+
+
+def test_read_gtf_records_sets_missing_attributes_to_none():
+    with temp_dir_created() as dirname:
+        records = _flatten(_read_records(
+            dirname, features=["gene"],
+            attributes=[gtf.TRANSCRIPT_ID_ATTRIBUTE]))
+        assert records[0].attributes[gtf.TRANSCRIPT_ID_ATTRIBUTE] is None
+
+
+def test_read_gtf_records_yields_chunks_of_specified_size():
+    with temp_dir_created() as dirname:
+        chunks = _read_records(dirname, chunk_size=3)
+        assert [len(c) for c in chunks] == [3, 1]
@@ -164,6 +164,15 @@ def test_validate_int_option_raises_exception_for_negative_if_nonneg_specified()
         validate_int_option(-1, "dummy", nonneg=True)
 
 
+def test_validate_int_option_raises_exception_for_zero_if_positive_specified():
+    with pytest.raises(SchemaError):
+        validate_int_option(0, "dummy", positive=True)
+
+
+def test_validate_int_option_does_not_raise_exception_for_zero_if_positive_not_specified():
+    assert validate_int_option(0, "dummy", nonneg=True) == 0
+
+
 def test_validate_int_option_does_not_raise_exception_for_negative_if_nonneg_not_specified():
     validate_int_option(-1, "dummy")
 
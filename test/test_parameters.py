@@ -1,6 +1,7 @@
 import piquant.parameters as parameters
 import pytest
 import schema
+import sys
 import tempfile
 
 
@@ -27,7 +28,8 @@ def _get_ignore_params():
         parameters.BIAS,
         parameters.TRANSCRIPT_GTF,
         parameters.GENOME_FASTA_DIR,
-        parameters.NUM_MOLECULES
+        parameters.NUM_MOLECULES,
+        parameters.SEED
     ]
 
 
@@ -263,3 +265,49 @@ def test_execute_for_param_sets_executes_for_correct_sets_of_parameters():
     assert set([params1[0], params2[1]]) in execute_record
     assert set([params1[1], params2[0]]) in execute_record
     assert set([params1[1], params2[1]]) in execute_record
+
+
+def test_execute_for_param_sets_passes_results_to_accumulating_callables_in_order():
+    class Accumulator:
+        def __init__(self):
+            self.results = []
+
+        def __call__(self, logger, options, **params):
+            return params["read_length"] * params["read_depth"]
+
+        def add_result(self, result):
+            self.results.append(result)
+
+    serial = Accumulator()
+    parameters.execute_for_param_sets(
+        [serial], None, None, read_length=[1, 2, 3], read_depth=[10, 20])
+    parallel = Accumulator()
+    parameters.execute_for_param_sets(
+        [parallel], None, None, num_jobs=3,
+        read_length=[1, 2, 3], read_depth=[10, 20])
+
+    assert sorted(serial.results) == [10, 20, 20, 30, 40, 60]
+    assert parallel.results == serial.results
+
+
+def test_execute_for_param_sets_exits_if_callable_exits_in_parallel():
+    def exiter(logger, options, **params):
+        if params["read_length"] == 2:
+            sys.exit("exiting")
+
+    with pytest.raises(SystemExit):
+        parameters.execute_for_param_sets(
+            [exiter], None, None, num_jobs=2, read_length=[1, 2, 3])
+
+
+def test_execute_for_param_sets_executes_serial_only_callables_in_main_process():
+    execute_record = []
+
+    @parameters.serial_only
+    def callable1(logger, options, **params):
+        execute_record.append(params["read_length"])
+
+    parameters.execute_for_param_sets(
+        [callable1], None, None, num_jobs=2, read_length=[1, 2])
+
+    assert sorted(execute_record) == [1, 2]
@@ -1,8 +1,15 @@
+import logging
 import os
 import os.path
+import pandas as pd
 import piquant.piquant as piq
 import piquant.piquant_options as po
+import piquant.prepare_quantification_run as prq
+import piquant.prepare_read_simulation as prs
+import piquant.process as process
 import piquant.quantifiers as quant
+import piquant.resource_usage as ru
+import piquant.run_ledger as run_ledger
 import pytest
 import time
 import utils
@@ -13,7 +20,14 @@ def _get_test_options(output_dir):
         po.OUTPUT_DIRECTORY: output_dir,
         po.NO_CLEANUP: True,
         po.PLOT_FORMAT: "pdf",
-        po.GROUPED_THRESHOLD: 3000
+        po.GROUPED_THRESHOLD: 3000,
+        po.DISTRIBUTION_POINTS: 20,
+        po.DATA_FORMAT: "csv",
+        po.JOBS: 1,
+        po.FORCE: False,
+        po.JOB_CPU_TIME: None,
+        po.JOB_MEMORY: None,
+        po.SUBSAMPLE_DEPTHS: None
     }
 
 
@@ -82,17 +96,127 @@ def test_read_directory_checker_returns_correct_checker_if_directory_shouldnt_ex
             directory_checker(None, test_options, **_get_test_params())
 
 
+def _get_read_simulation_params(read_depth=30, num_molecules=1000):
+    params = _get_test_params()
+    params["read_depth"] = read_depth
+    params["transcript_gtf"] = "transcripts.gtf"
+    params["genome_fasta"] = "genome"
+    params["num_molecules"] = num_molecules
+    return params
+
+
 def test_prepare_read_simulation_creates_correct_files():
     with utils.temp_dir_created() as dir_path:
         options = _get_test_options(dir_path)
-        params = _get_test_params()
+        params = _get_read_simulation_params()
         piq._prepare_read_simulation(None, options, **params)
 
         reads_dir = piq._get_parameters_dir(options, **params)
         _check_file_exists(reads_dir, "run_simulation.sh")
-        _check_file_exists(reads_dir, "flux_simulator_expression.par")
         _check_file_exists(reads_dir, "flux_simulator_simulation.par")
 
+        profile_dir = prs.get_expression_profile_dir(reads_dir)
+        _check_file_exists(profile_dir, "run_expression_profile.sh")
+        _check_file_exists(profile_dir, "flux_simulator_expression.par")
+
+
+def test_prepare_read_simulation_shares_expression_profiles():
+    with utils.temp_dir_created() as dir_path:
+        options = _get_test_options(dir_path)
+        all_params = [_get_read_simulation_params(read_depth=10),
+                      _get_read_simulation_params(read_depth=30),
+                      _get_read_simulation_params(
+                          read_depth=60, num_molecules=2000)]
+        for params in all_params:
+            piq._prepare_read_simulation(None, options, **params)
+
+        profile_dirs = [prs.get_expression_profile_dir(
+                        piq._get_parameters_dir(options, **params))
+                        for params in all_params]
+        assert profile_dirs[0] == profile_dirs[1]
+        assert profile_dirs[0] != profile_dirs[2]
+        assert os.path.dirname(profile_dirs[0]) == os.path.realpath(dir_path)
+
+
+def test_read_simulation_script_records_number_of_reads():
+    with utils.temp_dir_created() as dir_path:
+        options = _get_test_options(dir_path)
+        params = _get_read_simulation_params()
+        piq._prepare_read_simulation(None, options, **params)
+
+        reads_dir = piq._get_parameters_dir(options, **params)
+        with open(os.path.join(reads_dir, "run_simulation.sh")) as f:
+            count_command = [line for line in f
+                             if prs.READ_COUNT_FILE in line][0]
+
+        for reads_file in ["reads.1.fasta", "reads.2.fasta"]:
+            with open(os.path.join(reads_dir, reads_file), "w") as f:
+                f.write(">r1\nACGT\n>r2\nACGT\n>r3\nACGT\n")
+        utils.write_executable_script(
+            reads_dir, "count_reads.sh", count_command)
+        _run_script(options, params, "./count_reads.sh")
+
+        with open(os.path.join(reads_dir, prs.READ_COUNT_FILE)) as f:
+            assert int(f.read()) == 6
+
+
+def test_read_simulation_script_fails_if_shared_profile_is_missing():
+    with utils.temp_dir_created() as dir_path:
+        options = _get_test_options(dir_path)
+        params = _get_read_simulation_params()
+        piq._prepare_read_simulation(None, options, **params)
+
+        _run_script(options, params, "./run_simulation.sh")
+
+        reads_dir = piq._get_parameters_dir(options, **params)
+        with piq._get_run_ledger(options) as ledger:
+            record = ledger.get_run(os.path.basename(reads_dir))
+        assert record.state == run_ledger.FAILED
+        assert not os.path.exists(
+            os.path.join(reads_dir, "flux_simulator_expression.pro"))
+
+
+def test_create_expression_profile_executes_profile_script_once():
+    with utils.temp_dir_created() as dir_path:
+        options = _get_test_options(dir_path)
+        all_params = [_get_read_simulation_params(read_depth=10),
+                      _get_read_simulation_params(read_depth=30)]
+        for params in all_params:
+            piq._prepare_read_simulation(None, options, **params)
+
+        profile_dir = prs.get_expression_profile_dir(
+            piq._get_parameters_dir(options, **all_params[0]))
+        utils.write_executable_script(
+            profile_dir, "run_expression_profile.sh", "echo run >> runs.txt")
+
+        logger = logging.getLogger(__name__)
+        for params in all_params:
+            piq._create_expression_profile(logger, options, **params)
+        options[po.FORCE] = True
+        for params in all_params:
+            piq._create_expression_profile(logger, options, **params)
+
+        with open(os.path.join(profile_dir, "runs.txt")) as f:
+            assert len(f.readlines()) == 1
+
+
+def test_prepare_read_simulation_subsamples_lower_read_depths():
+    with utils.temp_dir_created() as dir_path:
+        options = _get_test_options(dir_path)
+        options[po.SUBSAMPLE_DEPTHS] = 60
+        params = _get_test_params()
+        piq._prepare_read_simulation(None, options, **params)
+
+        reads_dir = piq._get_parameters_dir(options, **params)
+        _check_file_exists(reads_dir, "run_simulation.sh")
+        assert not os.path.exists(
+            os.path.join(reads_dir, "flux_simulator_simulation.par"))
+
+        source_params = dict(params)
+        source_params["read_depth"] = 60
+        assert prs.get_subsampling_source(reads_dir) == \
+            piq._get_parameters_dir(options, **source_params)
+
 
 def test_create_reads_executes_run_simulation_script():
     with utils.temp_dir_created() as dir_path:
@@ -106,12 +230,215 @@ def test_create_reads_executes_run_simulation_script():
         utils.write_executable_script(
             reads_dir, "run_simulation.sh", "touch " + test_filename)
 
-        piq._create_reads(None, options, **params)
-        time.sleep(0.1)
+        _run_script(options, params, "./run_simulation.sh")
 
         assert os.path.exists(reads_dir + os.path.sep + test_filename)
 
 
+def _run_script(options, params, script, output_files=[]):
+    runner = piq._ScriptRunner(script, lambda options, **params: output_files)
+    runner.add_result(runner(None, options, **params))
+    runner.run_jobs(logging.getLogger(__name__), options)
+
+
+def test_script_runner_records_run_in_ledger():
+    with utils.temp_dir_created() as dir_path:
+        options = _get_test_options(dir_path)
+        params = _get_test_params()
+
+        reads_dir = piq._get_parameters_dir(options, **params)
+        os.mkdir(reads_dir)
+        utils.write_executable_script(reads_dir, "run_simulation.sh", "exit 3")
+
+        _run_script(options, params, "./run_simulation.sh")
+
+        with piq._get_run_ledger(options) as ledger:
+            record = ledger.get_run(os.path.basename(reads_dir))
+            assert record.state == run_ledger.FAILED
+            assert record.exit_status == 3
+
+
+def test_script_runner_skips_runs_already_completed():
+    with utils.temp_dir_created() as dir_path:
+        options = _get_test_options(dir_path)
+        params = _get_test_params()
+
+        reads_dir = piq._get_parameters_dir(options, **params)
+        os.mkdir(reads_dir)
+        utils.write_executable_script(
+            reads_dir, "run_simulation.sh", "echo run >> runs.txt")
+
+        _run_script(options, params, "./run_simulation.sh")
+        _run_script(options, params, "./run_simulation.sh")
+        options[po.FORCE] = True
+        _run_script(options, params, "./run_simulation.sh")
+
+        with open(os.path.join(reads_dir, "runs.txt")) as f:
+            assert len(f.readlines()) == 2
+
+
+def test_script_runner_reexecutes_completed_runs_whose_outputs_changed():
+    with utils.temp_dir_created() as dir_path:
+        options = _get_test_options(dir_path)
+        params = _get_test_params()
+
+        reads_dir = piq._get_parameters_dir(options, **params)
+        os.mkdir(reads_dir)
+        utils.write_executable_script(
+            reads_dir, "run_simulation.sh",
+            "echo run >> runs.txt; echo reads > reads.txt")
+        reads_file = os.path.join(reads_dir, "reads.txt")
+
+        _run_script(options, params, "./run_simulation.sh", [reads_file])
+        _run_script(options, params, "./run_simulation.sh", [reads_file])
+        os.remove(reads_file)
+        _run_script(options, params, "./run_simulation.sh", [reads_file])
+
+        with open(os.path.join(reads_dir, "runs.txt")) as f:
+            assert len(f.readlines()) == 2
+
+
+def test_script_runner_records_output_files_of_quantification_runs():
+    with utils.temp_dir_created() as dir_path:
+        options = _get_test_options(dir_path)
+        runner = piq._ScriptRunner(
+            "./run_quantification.sh", piq._get_quantification_output_files)
+
+        run_dirs = []
+        for read_depth in [10, 30]:
+            params = _get_test_params(quant_method="Cufflinks")
+            params["read_depth"] = read_depth
+            run_dir = piq._get_parameters_dir(options, **params)
+            os.mkdir(run_dir)
+            stats_file = piq._get_main_stats_file(options, **params)
+            utils.write_executable_script(
+                run_dir, "run_quantification.sh",
+                "touch " + os.path.basename(stats_file))
+            runner.add_result(runner(None, options, **params))
+            run_dirs.append((run_dir, stats_file))
+
+        runner.run_jobs(logging.getLogger(__name__), options)
+
+        with piq._get_run_ledger(options) as ledger:
+            for run_dir, stats_file in run_dirs:
+                record = ledger.get_run(os.path.basename(run_dir))
+                assert record.state == run_ledger.COMPLETED
+                assert record.output_checksums.keys() == \
+                    [os.path.basename(stats_file)]
+                assert record.output_checksums.values() == \
+                    [[os.path.getsize(stats_file),
+                      os.path.getmtime(stats_file)]]
+
+
+def _run_dependent_scripts(options, source_command):
+    source_dir = os.path.join(options[po.OUTPUT_DIRECTORY], "source")
+    dependent_dir = os.path.join(options[po.OUTPUT_DIRECTORY], "dependent")
+    for run_dir in [source_dir, dependent_dir]:
+        os.mkdir(run_dir)
+    utils.write_executable_script(source_dir, "run.sh", source_command)
+    utils.write_executable_script(
+        dependent_dir, "run.sh", "cp ../source/reads.txt .")
+
+    runner = piq._ScriptRunner(
+        "./run.sh", lambda options, **params: [],
+        source_run_getter=lambda run_dir:
+            source_dir if run_dir == dependent_dir else None)
+    for run_dir in [dependent_dir, source_dir]:
+        runner.add_result((process.Job(run_dir, "./run.sh", None), []))
+    runner.run_jobs(logging.getLogger(__name__), options)
+
+    return dependent_dir
+
+
+def test_script_runner_executes_dependent_runs_after_source_runs():
+    with utils.temp_dir_created() as dir_path:
+        options = _get_test_options(dir_path)
+        options[po.JOBS] = 2
+        dependent_dir = _run_dependent_scripts(
+            options, "sleep 0.2; touch reads.txt")
+
+        assert os.path.exists(os.path.join(dependent_dir, "reads.txt"))
+        with piq._get_run_ledger(options) as ledger:
+            assert ledger.is_completed("dependent")
+
+
+def test_script_runner_skips_dependent_runs_if_source_run_failed():
+    with utils.temp_dir_created() as dir_path:
+        options = _get_test_options(dir_path)
+        _run_dependent_scripts(options, "touch reads.txt; exit 1")
+
+        with piq._get_run_ledger(options) as ledger:
+            assert ledger.get_run("dependent") is None
+
+
+def test_run_completed_uses_ledger_state_for_recorded_runs():
+    with utils.temp_dir_created() as dir_path:
+        options = _get_test_options(dir_path)
+        completed_dir = os.path.join(dir_path, "completed")
+        failed_dir = os.path.join(dir_path, "failed")
+
+        with piq._get_run_ledger(options) as ledger:
+            ledger.record_finished("completed", time.time(), 0)
+            ledger.record_finished("failed", time.time(), 1)
+
+        assert piq._run_completed(options, completed_dir, "missing_file")
+        assert not piq._run_completed(options, failed_dir, __file__)
+
+
+def _record_completed_run(options, run_name, output_file):
+    run_dir = os.path.join(options[po.OUTPUT_DIRECTORY], run_name)
+    os.mkdir(run_dir)
+    output_file = os.path.join(run_dir, output_file)
+    with open(output_file, "w") as f:
+        f.write("output\n")
+
+    with piq._get_run_ledger(options) as ledger:
+        ledger.record_finished(
+            run_name, time.time(), 0,
+            piq._get_output_checksums([output_file]))
+    return run_dir, output_file
+
+
+def test_run_completed_checks_outputs_of_recorded_runs_are_unchanged():
+    with utils.temp_dir_created() as dir_path:
+        options = _get_test_options(dir_path)
+        unchanged_dir, unchanged_file = _record_completed_run(
+            options, "unchanged", "out.txt")
+        changed_dir, changed_file = _record_completed_run(
+            options, "changed", "out.txt")
+        deleted_dir, deleted_file = _record_completed_run(
+            options, "deleted", "out.txt")
+
+        with open(changed_file, "a") as f:
+            f.write("more output\n")
+        os.remove(deleted_file)
+
+        assert piq._run_completed(options, unchanged_dir, unchanged_file)
+        assert not piq._run_completed(options, changed_dir, changed_file)
+        assert not piq._run_completed(options, deleted_dir, deleted_file)
+
+
+def test_run_completed_checks_output_file_for_runs_recorded_as_started():
+    with utils.temp_dir_created() as dir_path:
+        options = _get_test_options(dir_path)
+        run_dir = os.path.join(dir_path, "run")
+
+        with piq._get_run_ledger(options) as ledger:
+            ledger.record_started("run", time.time())
+
+        assert piq._run_completed(options, run_dir, __file__)
+        assert not piq._run_completed(options, run_dir, "missing_file")
+
+
+def test_run_completed_checks_output_file_for_unrecorded_runs():
+    with utils.temp_dir_created() as dir_path:
+        options = _get_test_options(dir_path)
+        run_dir = os.path.join(dir_path, "run")
+
+        assert piq._run_completed(options, run_dir, __file__)
+        assert not piq._run_completed(options, run_dir, "missing_file")
+
+
 def test_prepare_quantification_creates_correct_file():
     with utils.temp_dir_created() as dir_path:
         options = _get_test_options(dir_path)
@@ -120,3 +447,79 @@ def test_prepare_quantification_creates_correct_file():
 
         quant_dir = piq._get_parameters_dir(options, **params)
         _check_file_exists(quant_dir, "run_quantification.sh")
+
+
+def test_prepare_quantification_times_script_stages():
+    with utils.temp_dir_created() as dir_path:
+        options = _get_test_options(dir_path)
+        params = _get_test_params(quant_method=quant._Cufflinks())
+        piq._prepare_quantification(None, options, **params)
+
+        quant_dir = piq._get_parameters_dir(options, **params)
+        with open(os.path.join(quant_dir, "run_quantification.sh")) as f:
+            script = f.read()
+
+        for stage in [prq.PREQUANTIFICATION_STAGE, prq.QUANTIFICATION_STAGE,
+                      prq.ASSEMBLE_DATA_STAGE, prq.ANALYSE_DATA_STAGE]:
+            assert "--stage={s} --metrics-file={f}".format(
+                s=stage, f=ru.METRICS_FILE) in script
+
+
+def _write_stage_usage(options, params, *stage_usage):
+    run_dir = piq._get_parameters_dir(options, **params)
+    os.mkdir(run_dir)
+    for usage in stage_usage:
+        ru.record_stage_usage(os.path.join(run_dir, ru.METRICS_FILE), usage)
+
+
+def test_resource_usage_accumulator_summarises_usage_per_quantifier():
+    with utils.temp_dir_created() as dir_path:
+        options = _get_test_options(dir_path)
+        options[po.STATS_DIRECTORY] = dir_path
+
+        all_params = [
+            _get_test_params(quant_method=quant._Cufflinks()),
+            dict(_get_test_params(quant_method=quant._Cufflinks()),
+                 read_depth=10),
+            _get_test_params(quant_method=quant._RSEM())]
+        _write_stage_usage(
+            options, all_params[0],
+            ru.StageUsage("quantification", 10.0, 30.0, 2.0, 500.0, 0))
+        _write_stage_usage(
+            options, all_params[1],
+            ru.StageUsage("quantification", 4.0, 12.0, 2.0, 300.0, 0))
+        _write_stage_usage(
+            options, all_params[2],
+            ru.StageUsage("quantification", 6.0, 5.0, 1.0, 900.0, 1))
+
+        accumulator = piq._ResourceUsageAccumulator()
+        for params in all_params:
+            accumulator.add_result(accumulator(None, options, **params))
+        usage_df = accumulator.write_usage(
+            logging.getLogger(__name__), options)
+
+        assert len(usage_df) == 3
+        assert sorted(usage_df[ru.CPU_TIME]) == [6.0, 14.0, 32.0]
+
+        summary = pd.read_csv(
+            os.path.join(dir_path, ru.SUMMARY_FILE), index_col=[0, 1])
+        cufflinks = summary.loc[("Cufflinks", "quantification")]
+        assert cufflinks[ru.RUNS] == 2
+        assert cufflinks[ru.FAILURES] == 0
+        assert cufflinks[ru.MEAN_WALL_TIME] == 7.0
+        assert cufflinks[ru.TOTAL_CPU_TIME] == 46.0
+        assert cufflinks[ru.MAX_PEAK_MEMORY] == 500.0
+
+        rsem = summary.loc[("RSEM", "quantification")]
+        assert rsem[ru.RUNS] == 0
+        assert rsem[ru.FAILURES] == 1
+
+
+def test_resource_usage_accumulator_ignores_runs_without_metrics():
+    with utils.temp_dir_created() as dir_path:
+        options = _get_test_options(dir_path)
+        params = _get_test_params(quant_method=quant._Cufflinks())
+        os.mkdir(piq._get_parameters_dir(options, **params))
+
+        accumulator = piq._ResourceUsageAccumulator()
+        assert accumulator(None, options, **params) is None
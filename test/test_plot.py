@@ -0,0 +1,99 @@
+import json
+import os
+import os.path
+import pandas as pd
+import piquant.plot as plot
+import utils
+
+
+def _get_plot_job(dirname, name, yvals, fformat="png"):
+    stats = pd.DataFrame({"x": [1, 2, 3], "y": yvals})
+    draw = lambda: plot.plt.plot(stats["x"], stats["y"])
+    return plot._PlotJob(
+        os.path.join(dirname, name), fformat, stats, draw)
+
+
+def _get_plot_jobs(dirname, num_jobs=3):
+    return [_get_plot_job(dirname, "plot" + str(i), [i, i + 1, i + 2])
+            for i in range(num_jobs)]
+
+
+def _get_plot_files(jobs):
+    return [job.file_name + "." + job.fformat for job in jobs]
+
+
+def test_render_plots_renders_all_plots():
+    with utils.temp_dir_created() as dirname:
+        jobs = _get_plot_jobs(dirname)
+        assert plot._render_plots(dirname, jobs, 1, False) == len(jobs)
+        assert all([os.path.exists(f) for f in _get_plot_files(jobs)])
+
+
+def test_render_plots_renders_all_plots_in_parallel():
+    with utils.temp_dir_created() as dirname:
+        jobs = _get_plot_jobs(dirname, num_jobs=5)
+        assert plot._render_plots(dirname, jobs, 2, False) == len(jobs)
+        assert all([os.path.exists(f) for f in _get_plot_files(jobs)])
+
+
+def test_render_plots_records_digest_for_each_plot():
+    with utils.temp_dir_created() as dirname:
+        jobs = _get_plot_jobs(dirname)
+        plot._render_plots(dirname, jobs, 1, False)
+
+        with open(os.path.join(dirname, plot.PLOT_INPUTS_FILE)) as f:
+            digests = json.load(f)
+        assert sorted(digests.keys()) == \
+            sorted([os.path.basename(f) for f in _get_plot_files(jobs)])
+
+
+def test_render_plots_skips_unchanged_plots():
+    with utils.temp_dir_created() as dirname:
+        plot._render_plots(dirname, _get_plot_jobs(dirname), 1, False)
+
+        jobs = _get_plot_jobs(dirname)
+        jobs[1] = _get_plot_job(dirname, "plot1", [3, 2, 1])
+        assert plot._render_plots(dirname, jobs, 1, True) == 1
+
+
+def test_render_plots_renders_unchanged_plots_if_not_skipping():
+    with utils.temp_dir_created() as dirname:
+        plot._render_plots(dirname, _get_plot_jobs(dirname), 1, False)
+
+        jobs = _get_plot_jobs(dirname)
+        assert plot._render_plots(dirname, jobs, 1, False) == len(jobs)
+
+
+def test_render_plots_renders_unchanged_plots_whose_files_are_missing():
+    with utils.temp_dir_created() as dirname:
+        jobs = _get_plot_jobs(dirname)
+        plot._render_plots(dirname, jobs, 1, False)
+
+        os.remove(_get_plot_files(jobs)[0])
+        assert plot._render_plots(dirname, jobs, 1, True) == 1
+        assert os.path.exists(_get_plot_files(jobs)[0])
+
+
+def _get_usage_df(exit_status=0):
+    return pd.DataFrame({
+        plot.parameters.QUANT_METHOD.name: ["Cufflinks", "Salmon"],
+        plot.ru.STAGE: ["quantify", "quantify"],
+        plot.ru.EXIT_STATUS: [exit_status, exit_status],
+        plot.ru.WALL_TIME: [1.0, 2.0],
+        plot.ru.CPU_TIME: [1.0, 2.0],
+        plot.ru.PEAK_MEMORY: [10.0, 20.0]})
+
+
+def test_draw_resource_usage_graphs_skips_unchanged_graphs():
+    with utils.temp_dir_created() as dirname:
+        usage_df = _get_usage_df()
+        assert plot.draw_resource_usage_graphs("png", dirname, usage_df) == \
+            len(plot.RESOURCE_USAGE_MEASURES)
+        assert plot.draw_resource_usage_graphs(
+            "png", dirname, usage_df, skip_unchanged=True) == 0
+
+
+def test_draw_resource_usage_graphs_draws_nothing_if_no_stage_succeeded():
+    with utils.temp_dir_created() as dirname:
+        assert plot.draw_resource_usage_graphs(
+            "png", dirname, _get_usage_df(exit_status=1)) == 0
@@ -1,28 +1,77 @@
 import piquant.process as ps
 import os.path
-import time
 import utils
 
 SCRIPT_NAME = "./script.sh"
 
 
-def _write_and_run_script(dirname, command):
-    utils.write_executable_script(dirname, SCRIPT_NAME, command)
-    ps.run_in_directory(dirname, SCRIPT_NAME)
-    time.sleep(0.1)
+def test_run_jobs_waits_for_jobs_to_complete():
+    with utils.temp_dir_created() as dirname:
+        utils.write_executable_script(
+            dirname, SCRIPT_NAME, "sleep 0.2; touch out.txt")
+        ps.run_jobs([ps.Job(dirname, SCRIPT_NAME, None)])
+        assert os.path.exists(os.path.join(dirname, "out.txt"))
+
+
+def test_run_jobs_returns_exit_status_for_each_job_in_order():
+    with utils.temp_dir_created() as dirname:
+        jobs = []
+        for exit_status in [3, 0, 1]:
+            run_dir = os.path.join(dirname, str(exit_status))
+            os.mkdir(run_dir)
+            utils.write_executable_script(
+                run_dir, SCRIPT_NAME, "exit " + str(exit_status))
+            jobs.append(ps.Job(run_dir, SCRIPT_NAME, None))
+
+        statuses = ps.run_jobs(jobs, max_jobs=2)
+        assert [s.run_dir for s in statuses] == [j.run_dir for j in jobs]
+        assert [s.exit_status for s in statuses] == [3, 0, 1]
+
+
+def test_run_jobs_runs_no_more_than_max_jobs_concurrently():
+    with utils.temp_dir_created() as dirname:
+        utils.write_executable_script(
+            dirname, SCRIPT_NAME,
+            "echo start >> log.txt; sleep 0.3; echo end >> log.txt")
+        ps.run_jobs([ps.Job(dirname, SCRIPT_NAME, None)] * 4, max_jobs=2)
 
+        running = max_running = 0
+        with open(os.path.join(dirname, "log.txt")) as f:
+            for line in f:
+                running += 1 if line.strip() == "start" else -1
+                max_running = max(running, max_running)
+        assert max_running == 2
 
-def test_run_in_directory_executes_command_in_directory():
+
+def test_run_jobs_records_job_status_in_run_directory():
+    with utils.temp_dir_created() as dirname:
+        utils.write_executable_script(dirname, SCRIPT_NAME, "exit 2")
+        ps.run_jobs([ps.Job(dirname, SCRIPT_NAME, None)])
+
+        job_status = ps.read_job_status(dirname)
+        assert job_status.exit_status == 2
+        assert job_status.wall_time >= 0
+
+
+def test_read_job_status_returns_none_if_no_job_has_run():
     with utils.temp_dir_created() as dirname:
-        _write_and_run_script(dirname, "pwd > out.txt")
+        assert ps.read_job_status(dirname) is None
+
 
-        with open(dirname + os.path.sep + 'out.txt') as f:
-            path = f.readlines()[0].strip()
-            assert path == dirname
+def test_run_jobs_applies_cpu_time_limit():
+    with utils.temp_dir_created() as dirname:
+        utils.write_executable_script(
+            dirname, SCRIPT_NAME, "while true; do :; done")
+        statuses = ps.run_jobs(
+            [ps.Job(dirname, SCRIPT_NAME, None)], cpu_time=1)
+        assert statuses[0].exit_status != 0
 
 
-def test_run_in_directory_include_command_line_args():
+def test_run_jobs_writes_job_output_to_run_directory():
     with utils.temp_dir_created() as dirname:
-        ps.run_in_directory(dirname, "touch", [SCRIPT_NAME])
-        time.sleep(0.1)
-        assert os.path.exists(dirname + os.path.sep + SCRIPT_NAME)
+        utils.write_executable_script(
+            dirname, SCRIPT_NAME, "echo out; echo err >&2")
+        ps.run_jobs([ps.Job(dirname, SCRIPT_NAME, None)])
+
+        with open(os.path.join(dirname, ps.JOB_OUTPUT_FILE)) as f:
+            assert sorted(f.read().split()) == ["err", "out"]
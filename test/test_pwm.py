@@ -0,0 +1,74 @@
+import math
+import numpy as np
+import os.path
+import piquant.pwm as pwm
+import utils
+
+PWM_FILE = "test.pwm"
+
+# Rows of weights for bases A, C, G and T; columns are positions
+PWM_LINES = [
+    "0.1,0.2,0.3",
+    "0.2,0.3,0.4",
+    "0.3,0.4,0.2",
+    "0.4,0.1,0.1",
+]
+
+
+def _get_pwm(dirname):
+    pwm_file = os.path.join(dirname, PWM_FILE)
+    with open(pwm_file, "w") as f:
+        f.write("\n".join(PWM_LINES) + "\n")
+    return pwm.PWM(pwm_file)
+
+
+def test_pwm_has_correct_length():
+    with utils.temp_dir_created() as dirname:
+        assert _get_pwm(dirname).length == 3
+
+
+def test_score_multiplies_positional_base_weights():
+    with utils.temp_dir_created() as dirname:
+        bias_pwm = _get_pwm(dirname)
+        assert np.isclose(bias_pwm.score("acg"), 0.1 * 0.3 * 0.2)
+        assert np.isclose(bias_pwm.score("TTA"), 0.4 * 0.1 * 0.3)
+
+
+def test_score_ignores_bases_beyond_pwm_length():
+    with utils.temp_dir_created() as dirname:
+        bias_pwm = _get_pwm(dirname)
+        assert np.isclose(bias_pwm.score("acgtttt"), bias_pwm.score("acg"))
+
+
+def test_score_gives_neutral_score_to_missing_and_unknown_bases():
+    with utils.temp_dir_created() as dirname:
+        bias_pwm = _get_pwm(dirname)
+        neutral = pwm.NEUTRAL_SCORE
+        assert np.isclose(bias_pwm.score("a"), 0.1 * neutral * neutral)
+        assert np.isclose(bias_pwm.score("anx"), 0.1 * neutral * neutral)
+
+
+def test_log_scores_scores_each_sequence():
+    with utils.temp_dir_created() as dirname:
+        bias_pwm = _get_pwm(dirname)
+        sequences = ["acg", "ttt", "ca", "gatc"]
+        log_scores = bias_pwm.log_scores(sequences)
+        assert np.allclose(
+            log_scores, [math.log(bias_pwm.score(s)) for s in sequences])
+
+
+def test_log_scores_does_not_underflow_for_long_sequences():
+    with utils.temp_dir_created() as dirname:
+        pwm_file = os.path.join(dirname, PWM_FILE)
+        with open(pwm_file, "w") as f:
+            for i in range(4):
+                f.write(",".join(["0.001"] * 200) + "\n")
+        bias_pwm = pwm.PWM(pwm_file)
+
+        log_scores = bias_pwm.log_scores(["a" * 200, "c" * 200])
+        assert np.allclose(log_scores, 200 * math.log(0.001))
+
+
+def test_log_scores_returns_empty_array_for_no_sequences():
+    with utils.temp_dir_created() as dirname:
+        assert len(_get_pwm(dirname).log_scores([])) == 0
@@ -0,0 +1,85 @@
+import logging
+import os.path
+import piquant.resource_usage as ru
+import piquant.time_stage as ts
+import utils
+
+
+def _get_usage(stage, wall_time=1.0, exit_status=0):
+    return ru.StageUsage(stage, wall_time, 0.5, 0.25, 100.0, exit_status)
+
+
+def _get_time_stage_options(metrics_file, stage, command):
+    return {
+        ts.STAGE: stage,
+        ts.METRICS_FILE: metrics_file,
+        ts.COMMAND: command[0],
+        ts.ARGS: command[1:]
+    }
+
+
+def test_read_stage_usage_returns_empty_list_if_no_metrics_file():
+    with utils.temp_dir_created() as dir_name:
+        metrics_file = os.path.join(dir_name, ru.METRICS_FILE)
+        assert ru.read_stage_usage(metrics_file) == []
+
+
+def test_read_stage_usage_returns_recorded_usage():
+    with utils.temp_dir_created() as dir_name:
+        metrics_file = os.path.join(dir_name, ru.METRICS_FILE)
+        usage = [_get_usage("first"), _get_usage("second", exit_status=1)]
+        for stage_usage in usage:
+            ru.record_stage_usage(metrics_file, stage_usage)
+
+        assert ru.read_stage_usage(metrics_file) == usage
+
+
+def test_read_stage_usage_returns_latest_usage_for_each_stage():
+    with utils.temp_dir_created() as dir_name:
+        metrics_file = os.path.join(dir_name, ru.METRICS_FILE)
+        ru.record_stage_usage(metrics_file, _get_usage("first", 1.0))
+        ru.record_stage_usage(metrics_file, _get_usage("second", 2.0))
+        ru.record_stage_usage(metrics_file, _get_usage("first", 3.0))
+
+        usage = ru.read_stage_usage(metrics_file)
+        assert [u.stage for u in usage] == ["first", "second"]
+        assert [u.wall_time for u in usage] == [3.0, 2.0]
+
+
+def test_read_stage_usage_ignores_incomplete_records():
+    with utils.temp_dir_created() as dir_name:
+        metrics_file = os.path.join(dir_name, ru.METRICS_FILE)
+        ru.record_stage_usage(metrics_file, _get_usage("first"))
+        with open(metrics_file, "a") as f:
+            f.write("second,1.0\n")
+
+        assert [u.stage for u in ru.read_stage_usage(metrics_file)] == \
+            ["first"]
+
+
+def test_time_stage_records_usage_and_returns_exit_status():
+    with utils.temp_dir_created() as dir_name:
+        metrics_file = os.path.join(dir_name, ru.METRICS_FILE)
+        exit_status = ts._time_stage(
+            logging.getLogger(__name__), _get_time_stage_options(
+                metrics_file, "sleep", ["bash", "-c", "sleep 0.1; exit 3"]))
+
+        assert exit_status == 3
+        usage = ru.read_stage_usage(metrics_file)
+        assert len(usage) == 1
+        assert usage[0].stage == "sleep"
+        assert usage[0].wall_time >= 0.1
+        assert usage[0].peak_memory_mb > 0
+        assert usage[0].exit_status == 3
+
+
+def test_time_stage_returns_error_status_if_command_cannot_be_executed():
+    with utils.temp_dir_created() as dir_name:
+        metrics_file = os.path.join(dir_name, ru.METRICS_FILE)
+        exit_status = ts._time_stage(
+            logging.getLogger(__name__), _get_time_stage_options(
+                metrics_file, "missing",
+                [os.path.join(dir_name, "no_such_command")]))
+
+        assert exit_status == ts.COMMAND_NOT_FOUND_STATUS
+        assert not os.path.exists(metrics_file)
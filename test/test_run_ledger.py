@@ -0,0 +1,77 @@
+import os.path
+import piquant.run_ledger as run_ledger
+import utils
+
+RUN_NAME = "run"
+
+
+def _get_ledger(dirname):
+    return run_ledger.RunLedger(run_ledger.get_ledger_file(dirname))
+
+
+def test_get_run_returns_none_for_unrecorded_run():
+    with utils.temp_dir_created() as dirname:
+        with _get_ledger(dirname) as ledger:
+            assert ledger.get_run(RUN_NAME) is None
+            assert not ledger.is_completed(RUN_NAME)
+
+
+def test_record_started_records_run_as_started():
+    with utils.temp_dir_created() as dirname:
+        with _get_ledger(dirname) as ledger:
+            ledger.record_started(RUN_NAME, 10)
+            record = ledger.get_run(RUN_NAME)
+            assert record.state == run_ledger.STARTED
+            assert record.start_time == 10
+            assert record.end_time is None
+
+
+def test_record_finished_records_successful_run_as_completed():
+    with utils.temp_dir_created() as dirname:
+        with _get_ledger(dirname) as ledger:
+            ledger.record_started(RUN_NAME, 10)
+            ledger.record_finished(RUN_NAME, 20, 0, {"out.txt": "abc"})
+            record = ledger.get_run(RUN_NAME)
+            assert record.state == run_ledger.COMPLETED
+            assert record.start_time == 10
+            assert record.end_time == 20
+            assert record.exit_status == 0
+            assert record.output_checksums == {"out.txt": "abc"}
+            assert ledger.is_completed(RUN_NAME)
+
+
+def test_record_finished_records_unsuccessful_run_as_failed():
+    with utils.temp_dir_created() as dirname:
+        with _get_ledger(dirname) as ledger:
+            ledger.record_finished(RUN_NAME, 20, 1)
+            assert ledger.get_run(RUN_NAME).state == run_ledger.FAILED
+            assert not ledger.is_completed(RUN_NAME)
+
+
+def test_record_started_discards_previous_record():
+    with utils.temp_dir_created() as dirname:
+        with _get_ledger(dirname) as ledger:
+            ledger.record_finished(RUN_NAME, 20, 0)
+            ledger.record_started(RUN_NAME, 30)
+            record = ledger.get_run(RUN_NAME)
+            assert record.state == run_ledger.STARTED
+            assert record.exit_status is None
+
+
+def test_ledger_persists_between_connections():
+    with utils.temp_dir_created() as dirname:
+        with _get_ledger(dirname) as ledger:
+            ledger.record_finished(RUN_NAME, 20, 0)
+        assert os.path.exists(run_ledger.get_ledger_file(dirname))
+        with _get_ledger(dirname) as ledger:
+            assert ledger.is_completed(RUN_NAME)
+
+
+def test_get_runs_returns_all_records():
+    with utils.temp_dir_created() as dirname:
+        with _get_ledger(dirname) as ledger:
+            ledger.record_finished("run1", 20, 0)
+            ledger.record_finished("run2", 20, 1)
+            runs = ledger.get_runs()
+            assert sorted(runs.keys()) == ["run1", "run2"]
+            assert runs["run2"].state == run_ledger.FAILED
@@ -0,0 +1,107 @@
+import os.path
+import piquant.shuffle_reads as shuffle_reads
+import utils
+
+
+def _get_fasta_lines(num_reads, paired_end=False):
+    lines = []
+    for i in range(num_reads):
+        if paired_end:
+            lines += [">r{i}/1\n".format(i=i), "ACGT\n",
+                      ">r{i}/2\n".format(i=i), "TTGG\n"]
+        else:
+            lines += [">r{i}\n".format(i=i), "ACGT\n"]
+    return lines
+
+
+def _write_reads_file(dirname, lines):
+    reads_file = os.path.join(dirname, "reads.fasta")
+    with open(reads_file, "w") as f:
+        f.writelines(lines)
+    return reads_file
+
+
+def _read_lines(reads_file):
+    with open(reads_file) as f:
+        return f.readlines()
+
+
+def _get_read_names(lines):
+    return [line for line in lines if line.startswith(">")]
+
+
+def test_shuffle_reads_retains_all_single_end_reads():
+    with utils.temp_dir_created() as dirname:
+        lines = _get_fasta_lines(100)
+        reads_file = _write_reads_file(dirname, lines)
+        shuffle_reads.shuffle_reads(reads_file, [reads_file], seed=1)
+
+        shuffled = _read_lines(reads_file)
+        assert sorted(shuffled) == sorted(lines)
+        assert shuffled != lines
+
+
+def test_shuffle_reads_keeps_reads_together_with_sequences():
+    with utils.temp_dir_created() as dirname:
+        lines = [">r{i}\n{i}\n".format(i=i) for i in range(50)]
+        reads_file = _write_reads_file(dirname, lines)
+        shuffle_reads.shuffle_reads(reads_file, [reads_file], seed=1)
+
+        shuffled = _read_lines(reads_file)
+        for name, sequence in zip(shuffled[::2], shuffled[1::2]):
+            assert name[2:] == sequence
+
+
+def test_shuffle_reads_is_reproducible_with_seed():
+    with utils.temp_dir_created() as dirname:
+        reads_file = _write_reads_file(dirname, _get_fasta_lines(100))
+        out_files = [os.path.join(dirname, f) for f in ["a.fasta", "b.fasta"]]
+        for out_file in out_files:
+            shuffle_reads.shuffle_reads(reads_file, [out_file], seed=7)
+
+        assert _read_lines(out_files[0]) == _read_lines(out_files[1])
+
+
+def test_shuffle_reads_splits_paired_end_reads():
+    with utils.temp_dir_created() as dirname:
+        reads_file = _write_reads_file(
+            dirname, _get_fasta_lines(100, paired_end=True))
+        out_files = [os.path.join(dirname, f)
+                     for f in ["reads.1.fasta", "reads.2.fasta"]]
+        shuffle_reads.shuffle_reads(reads_file, out_files, seed=1)
+
+        left_names = _get_read_names(_read_lines(out_files[0]))
+        right_names = _get_read_names(_read_lines(out_files[1]))
+        assert len(left_names) == 100
+        assert all([name.endswith("/1\n") for name in left_names])
+        assert [name[:-3] for name in left_names] == \
+            [name[:-3] for name in right_names]
+
+
+def test_shuffle_reads_puts_left_reads_first_when_pairs_are_reversed():
+    with utils.temp_dir_created() as dirname:
+        reads_file = _write_reads_file(
+            dirname, [">r0/2\n", "TTGG\n", ">r0/1\n", "ACGT\n"])
+        out_files = [os.path.join(dirname, f)
+                     for f in ["reads.1.fasta", "reads.2.fasta"]]
+        shuffle_reads.shuffle_reads(reads_file, out_files)
+
+        assert _read_lines(out_files[0]) == [">r0/1\n", "ACGT\n"]
+        assert _read_lines(out_files[1]) == [">r0/2\n", "TTGG\n"]
+
+
+def test_shuffle_reads_via_buckets_retains_all_reads(monkeypatch):
+    monkeypatch.setattr(shuffle_reads, "_get_num_buckets",
+                        lambda reads_file, max_memory: 4)
+    with utils.temp_dir_created() as dirname:
+        lines = _get_fasta_lines(100, paired_end=True)
+        reads_file = _write_reads_file(dirname, lines)
+        out_files = [os.path.join(dirname, f)
+                     for f in ["reads.1.fasta", "reads.2.fasta"]]
+        shuffle_reads.shuffle_reads(reads_file, out_files, seed=1)
+
+        left = _read_lines(out_files[0])
+        right = _read_lines(out_files[1])
+        assert sorted(left + right) == sorted(lines)
+        assert sorted(os.listdir(dirname)) == \
+            ["reads.1.fasta", "reads.2.fasta", "reads.fasta"]
@@ -0,0 +1,87 @@
+import numpy as np
+import os.path
+import piquant.fastx as fastx
+import piquant.pwm as pwm
+import piquant.simulate_read_bias as srb
+import random
+import utils
+
+READS_FILE = "reads.fasta"
+PWM_FILE = "test.pwm"
+NUM_READS = 200
+
+
+def _write_test_files(dirname):
+    rng = random.Random(0)
+    reads_file = os.path.join(dirname, READS_FILE)
+    with open(reads_file, "w") as f:
+        for i in range(NUM_READS):
+            f.write(">read{i}\n".format(i=i))
+            f.write("".join([rng.choice("ACGT") for j in range(20)]) + "\n")
+
+    pwm_file = os.path.join(dirname, PWM_FILE)
+    with open(pwm_file, "w") as f:
+        for base in range(4):
+            f.write(",".join([str(rng.random()) for j in range(10)]) + "\n")
+
+    return reads_file, pwm.PWM(pwm_file)
+
+
+def _select_fragments(reads_file, bias_pwm, num_fragments, chunk_size):
+    default_chunk_size = srb.SCORING_CHUNK_SIZE
+    srb.SCORING_CHUNK_SIZE = chunk_size
+    try:
+        return srb._select_fragments(
+            reads_file, bias_pwm, num_fragments, False,
+            np.random.RandomState(1))
+    finally:
+        srb.SCORING_CHUNK_SIZE = default_chunk_size
+
+
+def test_select_top_scores_retains_highest_scores():
+    scores, offsets = srb._select_top_scores(
+        np.array([0.5, 0.1, 0.9, 0.3]), np.array([10, 11, 12, 13]), 2)
+    assert sorted(scores) == [0.5, 0.9]
+    assert sorted(offsets) == [10, 12]
+
+
+def test_select_top_scores_retains_nothing_if_no_fragments_required():
+    scores, offsets = srb._select_top_scores(
+        np.array([0.5, 0.1]), np.array([10, 11]), 0)
+    assert len(scores) == 0
+    assert len(offsets) == 0
+
+
+def test_select_fragments_returns_sorted_fragment_offsets():
+    with utils.temp_dir_created() as dirname:
+        reads_file, bias_pwm = _write_test_files(dirname)
+        offsets, num_scored = _select_fragments(
+            reads_file, bias_pwm, 50, 1000)
+
+        all_offsets = [f.offset for f in fastx.read_fragments(reads_file)]
+        assert num_scored == NUM_READS
+        assert len(offsets) == 50
+        assert set(offsets) <= set(all_offsets)
+        assert (np.diff(offsets) > 0).all()
+
+
+def test_select_fragments_is_independent_of_chunk_size():
+    with utils.temp_dir_created() as dirname:
+        reads_file, bias_pwm = _write_test_files(dirname)
+        offsets, num_scored = _select_fragments(
+            reads_file, bias_pwm, 50, 1000)
+        chunked_offsets, num_scored = _select_fragments(
+            reads_file, bias_pwm, 50, 7)
+
+        assert offsets.tolist() == chunked_offsets.tolist()
+
+
+def test_select_fragments_is_reproducible_with_seeded_random_state():
+    with utils.temp_dir_created() as dirname:
+        reads_file, bias_pwm = _write_test_files(dirname)
+        offsets, num_scored = _select_fragments(
+            reads_file, bias_pwm, 50, 1000)
+        repeat_offsets, num_scored = _select_fragments(
+            reads_file, bias_pwm, 50, 1000)
+
+        assert offsets.tolist() == repeat_offsets.tolist()
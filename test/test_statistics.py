@@ -1,6 +1,8 @@
+import piquant.resource_usage as ru
 import piquant.statistics as statistics
 import piquant.tpms as t
 import numpy as np
+import numpy.testing as npt
 import pandas as pd
 import scipy.stats as scistats
 import test_tpms
@@ -20,17 +22,6 @@ def _get_test_tpms():
     return tpms, t.get_true_positives(tpms)
 
 
-def __get_test_grouped_tpms():
-    tpms, tp_tpms = _get_test_tpms()
-
-    grouped = tpms.groupby(test_tpms.GROUP_TEST_COL)
-    tp_grouped = tp_tpms.groupby(test_tpms.GROUP_TEST_COL)
-    summary = grouped.describe()
-    tp_summary = tp_grouped.describe()
-
-    return grouped, summary, tp_grouped, tp_summary
-
-
 def _tpm_pairs(filter=lambda r, c: True):
     return [(r, c) for r, c in zip(test_tpms.REAL_TPMS_VALS,
                                    test_tpms.CALC_TPMS_VALS)
@@ -62,13 +53,13 @@ def _check_statistic_value(stat_class, calculator, pair_func):
 
 
 def _check_grouped_statistic_values(stat_class, calculator, grouped_pair_func):
-    g, s, tp_g, tp_s = __get_test_grouped_tpms()
+    tpms, tp_tpms = _get_test_tpms()
     stat = stat_class()
-    grouped_stats = stat.calculate_grouped(g, s, tp_g, tp_s)
-    correct_value_calculator = lambda x: calculator(grouped_pair_func(x))
-    group_count_test = \
-        lambda x: grouped_stats.ix[x] == correct_value_calculator(x)
-    assert all([group_count_test(gv) for gv in set(test_tpms.GROUPS)])
+    grouped_stats = t.get_grouped_stats(
+        tpms, tp_tpms, test_tpms.GROUP_TEST_COL, [stat])[stat.name]
+    for gv in set(test_tpms.GROUPS):
+        npt.assert_almost_equal(
+            grouped_stats.ix[gv], calculator(grouped_pair_func(gv)))
 
 
 def test_get_statistics_returns_statistics_instances():
@@ -87,6 +78,64 @@ def test_get_graphable_statistics_returns_graphable_instances():
     assert all([s.graphable for s in g_stats])
 
 
+def test_get_resource_statistics_returns_resource_statistics_instances():
+    stats = statistics.get_resource_statistics()
+    assert all([isinstance(s, statistics._BaseResourceStatistic)
+                for s in stats])
+
+
+def test_get_graphable_statistics_excludes_resource_statistics_by_default():
+    r_stats = statistics.get_resource_statistics()
+    assert not (statistics.get_graphable_statistics() & r_stats)
+    assert r_stats <= statistics.get_graphable_statistics(
+        include_resource=True)
+
+
+def _get_test_usage(wall_time=4.0, exit_status=0):
+    return ru.StageUsage(
+        ru.QUANTIFICATION_STAGE, wall_time, 3.0, 1.0, 256.0, exit_status)
+
+
+def _check_resource_statistic_value(stat_class, correct_value, num_reads=100):
+    stat = stat_class()
+    assert stat.calculate_for_usage(_get_test_usage(), num_reads) == \
+        correct_value
+
+
+def test_resource_statistics_are_nan_if_usage_not_recorded():
+    for stat in statistics.get_resource_statistics():
+        assert np.isnan(stat.calculate_for_usage(None, 100))
+
+
+def test_resource_statistics_are_nan_if_quantification_failed():
+    usage = _get_test_usage(exit_status=1)
+    for stat in statistics.get_resource_statistics():
+        assert np.isnan(stat.calculate_for_usage(usage, 100))
+
+
+def test_quantification_time_statistic_calculates_correct_value():
+    _check_resource_statistic_value(statistics._QuantificationTime, 4.0)
+
+
+def test_quantification_cpu_time_statistic_calculates_correct_value():
+    _check_resource_statistic_value(statistics._QuantificationCPUTime, 4.0)
+
+
+def test_quantification_peak_memory_statistic_calculates_correct_value():
+    _check_resource_statistic_value(
+        statistics._QuantificationPeakMemory, 256.0)
+
+
+def test_quantification_throughput_statistic_calculates_correct_value():
+    _check_resource_statistic_value(
+        statistics._QuantificationThroughput, 25.0)
+
+
+def test_quantification_throughput_statistic_is_nan_if_reads_not_known():
+    stat = statistics._QuantificationThroughput()
+    assert np.isnan(stat.calculate_for_usage(_get_test_usage(), None))
+
+
 def _number_of_tpms(tpm_pairs):
     return len(tpm_pairs)
 
@@ -197,3 +246,28 @@ def test_specificity_statistic_calculates_correct_value():
 def test_specificity_statistic_calculates_correct_grouped_values():
     _check_grouped_statistic_values(
         statistics._Specificity, _specificity, _group_tpm_pairs)
+
+
+def test_grouped_values_match_values_calculated_for_each_group():
+    random_state = np.random.RandomState(1)
+    tpms = pd.DataFrame.from_dict({
+        t.REAL_TPM: np.round(random_state.lognormal(size=1000), 1),
+        t.CALCULATED_TPM: np.round(random_state.lognormal(size=1000), 1),
+        test_tpms.GROUP_TEST_COL: random_state.randint(5, size=1000)
+    })
+    t.calculate_log_ratios(tpms)
+    t.calculate_percent_error(tpms)
+    t.mark_positives_and_negatives(tpms)
+    tp_tpms = t.get_true_positives(tpms)
+
+    stats = statistics.get_statistics()
+    grouped_stats = t.get_grouped_stats(
+        tpms, tp_tpms, test_tpms.GROUP_TEST_COL, stats)
+
+    for gv in range(5):
+        group_tpms = tpms[tpms[test_tpms.GROUP_TEST_COL] == gv]
+        group_tp_tpms = tp_tpms[tp_tpms[test_tpms.GROUP_TEST_COL] == gv]
+        for stat in stats:
+            npt.assert_almost_equal(
+                grouped_stats[stat.name].ix[gv],
+                stat.calculate(group_tpms, group_tp_tpms))
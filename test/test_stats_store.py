@@ -0,0 +1,87 @@
+import os
+import os.path
+import pandas as pd
+import piquant.stats_store as ss
+import utils
+
+STORE_NAME = "overall_stats"
+
+
+def _write_stats_file(dirname, run_name, values):
+    stats_file = os.path.join(dirname, run_name + "_stats.csv")
+    pd.DataFrame({"run": [run_name] * len(values), "value": values}).\
+        to_csv(stats_file, index=False)
+    return run_name, stats_file
+
+
+def _get_store(dirname):
+    return ss.StatsStore(os.path.join(dirname, ss.STORE_DIRECTORY),
+                         STORE_NAME)
+
+
+def test_update_reads_new_stats_files():
+    with utils.temp_dir_created() as dirname:
+        run_files = [_write_stats_file(dirname, "run1", [1, 2]),
+                     _write_stats_file(dirname, "run2", [3])]
+        store = _get_store(dirname)
+        assert store.update(run_files) == 2
+
+
+def test_get_stats_returns_stats_in_run_order():
+    with utils.temp_dir_created() as dirname:
+        run_files = [_write_stats_file(dirname, "run1", [1, 2]),
+                     _write_stats_file(dirname, "run2", [3])]
+        store = _get_store(dirname)
+        store.update(run_files)
+        stats = store.get_stats(["run2", "run1"])
+        assert stats["value"].tolist() == [3, 1, 2]
+        assert stats["run"].tolist() == ["run2", "run1", "run1"]
+
+
+def test_get_stats_returns_empty_data_frame_for_no_runs():
+    with utils.temp_dir_created() as dirname:
+        assert len(_get_store(dirname).get_stats([])) == 0
+
+
+def test_written_store_does_not_reread_unchanged_files():
+    with utils.temp_dir_created() as dirname:
+        run_files = [_write_stats_file(dirname, "run1", [1, 2]),
+                     _write_stats_file(dirname, "run2", [3])]
+        store = _get_store(dirname)
+        store.update(run_files)
+        store.write()
+
+        store = _get_store(dirname)
+        assert store.update(run_files) == 0
+        assert store.get_stats(["run1", "run2"])["value"].tolist() == [1, 2, 3]
+
+
+def test_written_store_rereads_changed_files():
+    with utils.temp_dir_created() as dirname:
+        run_files = [_write_stats_file(dirname, "run1", [1, 2])]
+        store = _get_store(dirname)
+        store.update(run_files)
+        store.write()
+
+        run_files = [_write_stats_file(dirname, "run1", [4, 5, 6])]
+        stats_file = run_files[0][1]
+        mtime = os.stat(stats_file).st_mtime + 10
+        os.utime(stats_file, (mtime, mtime))
+
+        store = _get_store(dirname)
+        assert store.update(run_files) == 1
+        assert store.get_stats(["run1"])["value"].tolist() == [4, 5, 6]
+
+
+def test_written_store_retains_runs_not_updated():
+    with utils.temp_dir_created() as dirname:
+        store = _get_store(dirname)
+        store.update([_write_stats_file(dirname, "run1", [1])])
+        store.write()
+
+        store = _get_store(dirname)
+        store.update([_write_stats_file(dirname, "run2", [2])])
+        store.write()
+
+        store = _get_store(dirname)
+        assert store.get_stats(["run1", "run2"])["value"].tolist() == [1, 2]
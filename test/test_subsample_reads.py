@@ -0,0 +1,81 @@
+import numpy as np
+import os.path
+import piquant.subsample_reads as subsample_reads
+import pytest
+import utils
+
+NUM_READS = 100
+
+
+def _write_reads_file(dirname, file_name, end=""):
+    reads_file = os.path.join(dirname, file_name)
+    with open(reads_file, "w") as f:
+        for i in range(NUM_READS):
+            f.write(">r{i}{e}\n{i}\n".format(i=i, e=end))
+    return reads_file
+
+
+def _read_lines(reads_file):
+    with open(reads_file) as f:
+        return f.readlines()
+
+
+def _subsample_reads(dirname, reads_files, num_fragments, chunk_size, seed=1):
+    out_dir = os.path.join(dirname, "out")
+    if not os.path.exists(out_dir):
+        os.mkdir(out_dir)
+    out_files = [os.path.join(out_dir, os.path.basename(f))
+                 for f in reads_files]
+
+    default_chunk_size = subsample_reads.SAMPLING_CHUNK_SIZE
+    subsample_reads.SAMPLING_CHUNK_SIZE = chunk_size
+    try:
+        subsample_reads.subsample_reads(
+            reads_files, out_files, num_fragments,
+            np.random.RandomState(seed))
+    finally:
+        subsample_reads.SAMPLING_CHUNK_SIZE = default_chunk_size
+
+    return [_read_lines(f) for f in out_files]
+
+
+@pytest.mark.parametrize("chunk_size", [7, 1000])
+def test_subsample_reads_writes_required_number_of_reads(chunk_size):
+    with utils.temp_dir_created() as dirname:
+        reads_file = _write_reads_file(dirname, "reads.fasta")
+        lines, = _subsample_reads(dirname, [reads_file], 30, chunk_size)
+
+        assert len(lines) == 60
+        assert set(lines) <= set(_read_lines(reads_file))
+        ids = [int(l[2:]) for l in lines[::2]]
+        assert ids == sorted(set(ids))
+        assert [l.strip() for l in lines[1::2]] == [str(i) for i in ids]
+
+
+def test_subsample_reads_is_reproducible_with_seed():
+    with utils.temp_dir_created() as dirname:
+        reads_file = _write_reads_file(dirname, "reads.fasta")
+        first, = _subsample_reads(dirname, [reads_file], 30, 7)
+        second, = _subsample_reads(dirname, [reads_file], 30, 7)
+        other, = _subsample_reads(dirname, [reads_file], 30, 7, seed=2)
+
+        assert first == second
+        assert first != other
+
+
+def test_subsample_reads_keeps_paired_end_reads_together():
+    with utils.temp_dir_created() as dirname:
+        reads_files = [_write_reads_file(dirname, "reads.1.fasta", "/1"),
+                       _write_reads_file(dirname, "reads.2.fasta", "/2")]
+        left, right = _subsample_reads(dirname, reads_files, 20, 7)
+
+        assert len(left) == 40
+        assert [l.replace("/1", "") for l in left] == \
+            [l.replace("/2", "") for l in right]
+
+
+def test_subsample_reads_exits_if_not_enough_reads():
+    with utils.temp_dir_created() as dirname:
+        reads_file = _write_reads_file(dirname, "reads.fasta")
+        with pytest.raises(SystemExit):
+            _subsample_reads(dirname, [reads_file], NUM_READS + 1, 7)
@@ -49,14 +49,14 @@ class _DummyStatistic:
     def __init__(self, name, true_positives):
         self.name = name
         self.true_positives = true_positives
+        self.aggregations = [t.Aggregation(t.COUNT, None, true_positives)]
 
     def calculate(self, tpms, tp_tpms):
         df = tp_tpms if self.true_positives else tpms
         return len(df)
 
-    def calculate_grouped(self, grouped, summary, tp_grouped, tp_summary):
-        df = tp_summary if self.true_positives else summary
-        return df[t.REAL_TPM].unstack()["count"]
+    def calculate_grouped(self, aggregates):
+        return aggregates[self.aggregations[0]]
 
 
 class _DummyClassifier:
@@ -175,6 +175,20 @@ def test_apply_classifiers_calculates_correct_values():
         assert row[name] == CALC_TPMS_VALS[index] + val
 
 
+def test_apply_classifiers_uses_column_wise_values_if_available():
+    name = "dummy"
+    val = 5
+    classifier = _DummyClassifier(name)
+    classifier.get_classification_values = \
+        lambda df: df[t.CALCULATED_TPM] + val
+
+    tpms = _get_test_tpms()
+    t.apply_classifiers(tpms, [classifier])
+
+    for index, row in tpms.iterrows():
+        assert row[name] == CALC_TPMS_VALS[index] + val
+
+
 def test_get_stats_returns_correct_number_of_statistics():
     num_statistics = 5
     statistics = [_DummyStatistic(str(i), False)
@@ -250,3 +264,40 @@ def test_get_grouped_stats_calculates_correct_values():
     for group in set(GROUPS):
         assert stats[name1].ix[group] == len(tpms[tpms[GROUP_TEST_COL] == group])
         assert stats[name2].ix[group] == len(tp_tpms[tp_tpms[GROUP_TEST_COL] == group])
+
+
+class _DummyDistributionClassifier:
+    def __init__(self, plot_range=None):
+        self.plot_range = plot_range
+
+    def get_values(self, tpms):
+        return tpms[t.REAL_TPM]
+
+    def get_distribution_plot_range(self):
+        return self.plot_range
+
+
+def _check_distribution(ascending, plot_range, num_points):
+    tpms = _get_test_tpms()
+    xvals, yvals = t.get_distribution(
+        tpms, _DummyDistributionClassifier(plot_range), ascending, num_points)
+
+    values = np.array(REAL_TPMS_VALS)
+    expected = [100.0 * len(values[values < x if ascending else values > x]) /
+                len(values) for x in xvals]
+
+    assert len(xvals) == num_points
+    npt.assert_array_almost_equal(yvals, expected)
+
+
+def test_get_distribution_calculates_correct_ascending_values():
+    _check_distribution(True, None, 20)
+
+
+def test_get_distribution_calculates_correct_descending_values():
+    _check_distribution(False, None, 20)
+
+
+def test_get_distribution_uses_plot_range_and_number_of_points():
+    _check_distribution(True, (0, 30), 1000)
+    _check_distribution(False, (0, 30), 1000)